@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Time clean_text against the original pass-per-rule implementation on the corpus."""
+
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import re
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from agentic_rag.data.cleaning import clean_text
+
+
+def clean_text_reference(text: str) -> str:
+    """The original pass-per-rule implementation; clean_text must match it exactly."""
+    if not text:
+        return ""
+
+    # Decode escaped HTML codes
+    text = html.unescape(text)
+    text = text.replace("\x00", "")
+
+    # fix line endings
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+    # excessive indentation
+    text = re.sub(r"\n[ \t]+", "\n", text)
+
+    # blank lines
+    text = re.sub(r"\n{3,}", "\n\n", text)
+
+    # Normalize spaces (but NOT newlines)
+    text = re.sub(r"[ \t]{2,}", " ", text)
+    return text.strip()
+
+
+def load_texts(path: Path, limit: int | None) -> List[str]:
+    texts = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            texts.append(f"{row.get('title') or ''}\n\n{row.get('text') or ''}")
+            if limit and len(texts) >= limit:
+                break
+    return texts
+
+
+def best_of(fn: Callable[[str], str], texts: List[str], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        default=Path("data/raw/corpus.jsonl"),
+        help="corpus.jsonl written by download_dataset.py.",
+    )
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N documents.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per implementation; the best is kept.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    texts = load_texts(args.corpus.expanduser().resolve(), args.limit)
+    mb = sum(len(t) for t in texts) / 1e6
+
+    mismatches = sum(clean_text(t) != clean_text_reference(t) for t in texts)
+    if mismatches:
+        raise SystemExit(f"[benchmark_clean_text] {mismatches} documents differ from the reference")
+
+    reference = best_of(clean_text_reference, texts, args.repeat)
+    current = best_of(clean_text, texts, args.repeat)
+    print(f"[benchmark_clean_text] {len(texts)} documents, {mb:.1f}M chars, outputs identical")
+    print(f"[benchmark_clean_text] reference  {reference:.3f}s  ({mb / reference:.1f}M chars/s)")
+    print(f"[benchmark_clean_text] clean_text {current:.3f}s  ({mb / current:.1f}M chars/s)")
+    print(f"[benchmark_clean_text] speedup    {reference / current:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,97 @@
-from .types import Message, PlanStep
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+from ..retrieval.base import BaseReranker, BaseRetriever
+from ..retrieval.schemas import Query, RetrievedChunk
+from ..settings import get_settings
+from ..utils import resolve_dotted_path
 from .controller import BaseAgentController
+from .types import Message, PlanStep, Role
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _default_retriever() -> BaseRetriever:
+    path = get_settings().retriever_class
+    if path:
+        return resolve_dotted_path(path)()
+    from ..retrieval.retriever import PgVectorRetriever
+
+    return PgVectorRetriever()
+
+
+def _default_reranker() -> Optional[BaseReranker]:
+    settings = get_settings()
+    model = settings.vector_store.cross_encoder_model
+    if not model or model == "null":
+        return None
+    if settings.reranker_class:
+        return resolve_dotted_path(settings.reranker_class)()
+    from ..retrieval.reranker import BatchingCrossEncoderReranker
+
+    # concurrent requests share cross-encoder forward passes
+    return BatchingCrossEncoderReranker()
+
 
 class AgentController(BaseAgentController):
-    
-    def __init__(self, retriever):
-        self.retriever = retriever
-        
-    def plan(self, history):
-        return [
-            PlanStep(
-                kind="retrieve",
-                payload={"k": 5}
-            ),
-            PlanStep(
-                kind="respond",
-                payload={}
-            )
-        ]
-    def run(self, history):
-        user_query = history[-1].content
-        chunks = self.retriever.search(user_query)
-        answer = "\n\n".join(chunk.text for chunk in chunks)
+    """
+    Retrieve-then-respond controller: fetches candidates, reranks them when
+    a cross-encoder is configured and answers with the best passages.
+    Defaults to the configured retriever_class / reranker_class.
+    """
+
+    def __init__(self, retriever: Optional[BaseRetriever] = None, reranker: Optional[BaseReranker] = None):
+        self.retriever = retriever or _default_retriever()
+        self.reranker = reranker if reranker is not None else _default_reranker()
+
+    def warmup(self) -> None:
+        """Load models and verify indexes once, before the first request."""
+        from ..embeddings.model import get_embedding_model
+
+        get_embedding_model()
+        self.retriever.warmup()
+        if self.reranker is not None:
+            self.reranker.warmup()
 
+    def retrieval_k(self, k: int) -> int:
+        """Candidates to fetch for a final top-k: the reranking depth when reranking."""
+        return max(get_settings().vector_store.retrieval_k, k) if self.reranker else k
+
+    def plan(self, history: Sequence[Message]) -> Sequence[PlanStep]:
+        config = get_settings().vector_store
+        k = config.reranker_top_k if self.reranker else config.top_k
+        steps = [PlanStep(name="retrieve", arguments={"k": self.retrieval_k(k)})]
+        if self.reranker:
+            steps.append(PlanStep(name="rerank", arguments={"k": k}, depends_on=("retrieve",)))
+        steps.append(PlanStep(name="respond", depends_on=(steps[-1].name,)))
+        return steps
+
+    def rerank(self, query: Query, chunks: Sequence[RetrievedChunk], k: int) -> Sequence[RetrievedChunk]:
+        if self.reranker is None:
+            return list(chunks)[:k]
+        return self.reranker.rerank(query, chunks, k=k)
+
+    def respond(self, query: Query, chunks: Sequence[RetrievedChunk]) -> Message:
         return Message(
-            role="assistant",
-            content=answer
+            role=Role.ASSISTANT,
+            content="\n\n".join(chunk.text for chunk in chunks),
+            metadata={"chunk_ids": [chunk.chunk_id for chunk in chunks]},
         )
 
+    def run(self, history: Sequence[Message]) -> Message:
+        query = Query(text=history[-1].content)
+        chunks: Sequence[RetrievedChunk] = []
+        for step in self.plan(history):
+            if step.name == "retrieve":
+                chunks = self.retriever.search(query, k=step.arguments["k"])
+            elif step.name == "rerank":
+                chunks = self.rerank(query, chunks, step.arguments["k"])
+        return self.respond(query, chunks)
+
+    def serve(self) -> None:
+        """Serve retrieval and answers over HTTP (see agent.server) until interrupted."""
+        from .server import serve
 
+        serve(self)
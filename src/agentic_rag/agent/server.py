@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+from ..retrieval.batching import AsyncMicroBatcher
+from ..retrieval.schemas import Query, RetrievedChunk
+from ..settings import get_settings
+from .agent import AgentController
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyHistogram:
+    """Request latencies in fixed millisecond buckets, reported cumulatively like Prometheus."""
+
+    def __init__(self, buckets_ms: Sequence[float]):
+        self.bounds = sorted(buckets_ms)
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative, buckets = 0, {}
+        for bound, count in zip([*self.bounds, "+Inf"], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum_ms": self.sum_ms,
+            "mean_ms": self.sum_ms / self.count if self.count else 0.0,
+            "buckets": buckets,
+        }
+
+
+class ServingMetrics:
+    """Per-stage latency histograms and the number of requests in flight."""
+
+    def __init__(self, buckets_ms: Sequence[float]):
+        self.buckets_ms = buckets_ms
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.in_flight = 0
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        histogram = self.latency.get(stage)
+        if histogram is None:
+            histogram = self.latency[stage] = LatencyHistogram(self.buckets_ms)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe((time.perf_counter() - start) * 1000)
+
+    @contextmanager
+    def request(self, endpoint: str) -> Iterator[None]:
+        self.in_flight += 1
+        try:
+            with self.time(endpoint):
+                yield
+        finally:
+            self.in_flight -= 1
+
+
+class RetrieveRequest(BaseModel):
+    query: str = Field(min_length=1)
+    k: Optional[int] = Field(default=None, ge=1, description="Chunks to return; defaults to the configured top-k")
+    rerank: bool = Field(default=True, description="Rerank with the cross-encoder when one is configured")
+
+
+class AnswerRequest(BaseModel):
+    query: str = Field(min_length=1)
+    k: Optional[int] = Field(default=None, ge=1, description="Passages the answer is built from")
+
+
+class ChunkOut(BaseModel):
+    chunk_id: str
+    text: str
+    score: float
+    metadata: Optional[Dict[str, Any]] = None
+
+
+def _chunks_out(chunks: Sequence[RetrievedChunk]) -> List[ChunkOut]:
+    return [
+        ChunkOut(chunk_id=c.chunk_id, text=c.text, score=c.score, metadata=c.metadata)
+        for c in chunks
+    ]
+
+
+class AgentService:
+    """
+    Request handling behind the HTTP app. Concurrent retrievals are
+    coalesced into one `asearch_many` call (one embedding pass, one
+    pipelined round-trip); reranks run in worker threads, where a
+    BatchingCrossEncoderReranker merges them into shared forward passes.
+    """
+
+    def __init__(self, controller: AgentController):
+        config = get_settings().serving
+        self.controller = controller
+        self.metrics = ServingMetrics(config.latency_buckets_ms)
+        self.batcher = AsyncMicroBatcher(
+            self._search_batch,
+            max_batch_size=config.max_batch_size,
+            max_wait_ms=config.batch_wait_ms,
+        )
+
+    async def _search_batch(self, requests: List[Tuple[Query, int]]) -> List[Sequence[RetrievedChunk]]:
+        depth = max(k for _, k in requests)
+        with self.metrics.time("search_batch"):
+            results = await self.controller.retriever.asearch_many([q for q, _ in requests], k=depth)
+        return [hits[:k] for hits, (_, k) in zip(results, requests)]
+
+    def _top_k(self, k: Optional[int], rerank: bool) -> int:
+        config = get_settings().vector_store
+        return k or (config.reranker_top_k if rerank and self.controller.reranker else config.top_k)
+
+    async def retrieve(self, query: Query, k: Optional[int], *, rerank: bool = True) -> Sequence[RetrievedChunk]:
+        rerank = rerank and self.controller.reranker is not None
+        k = self._top_k(k, rerank)
+        depth = self.controller.retrieval_k(k) if rerank else k
+        chunks = await self.batcher.submit((query, depth))
+        if rerank:
+            with self.metrics.time("rerank"):
+                chunks = await asyncio.to_thread(self.controller.rerank, query, chunks, k)
+        return chunks
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth = {"retrieval": self.batcher.pending()}
+        reranker_batcher = getattr(self.controller.reranker, "batcher", None)
+        if reranker_batcher is not None:
+            depth["rerank"] = reranker_batcher.pending()
+        return depth
+
+    def snapshot(self) -> Dict[str, Any]:
+        reranker = self.controller.reranker
+        return {
+            "in_flight": self.metrics.in_flight,
+            "queue_depth": self.queue_depth(),
+            "latency_ms": {stage: h.snapshot() for stage, h in self.metrics.latency.items()},
+            "retrieval_batches": {
+                "batches": self.batcher.batches,
+                "mean_batch_size": self.batcher.mean_batch_size(),
+            },
+            "retriever": self.controller.retriever.stats(),
+            "reranker": reranker.stats() if reranker is not None else {},
+        }
+
+    async def close(self) -> None:
+        from ..storage.pool import close_async_pool
+
+        await self.batcher.close()
+        close = getattr(self.controller.reranker, "close", None)
+        if close is not None:
+            await asyncio.to_thread(close)
+        await close_async_pool()
+
+
+def create_app(controller: AgentController):
+    """
+    FastAPI app serving `controller`:
+
+        POST /retrieve   top-k chunks for a query
+        POST /answer     assistant message built from the top chunks
+        GET  /metrics    latency histograms, queue depth, cache counters
+        GET  /healthz    liveness
+
+    Models are loaded and indexes verified once at startup.
+    """
+    from fastapi import FastAPI
+
+    service = AgentService(controller)
+
+    @asynccontextmanager
+    async def lifespan(_app):
+        logger.info("Warming up agent controller")
+        await asyncio.to_thread(controller.warmup)
+        logger.info("Agent controller ready")
+        yield
+        await service.close()
+
+    app = FastAPI(title="agentic-rag", lifespan=lifespan)
+    app.state.service = service
+
+    @app.get("/healthz")
+    async def healthz() -> Dict[str, str]:
+        return {"status": "ok"}
+
+    @app.post("/retrieve")
+    async def retrieve(request: RetrieveRequest) -> Dict[str, List[ChunkOut]]:
+        with service.metrics.request("retrieve"):
+            chunks = await service.retrieve(Query(text=request.query), request.k, rerank=request.rerank)
+        return {"chunks": _chunks_out(chunks)}
+
+    @app.post("/answer")
+    async def answer(request: AnswerRequest) -> Dict[str, Any]:
+        with service.metrics.request("answer"):
+            query = Query(text=request.query)
+            chunks = await service.retrieve(query, request.k)
+            message = controller.respond(query, chunks)
+        return {"answer": message.content, "chunks": _chunks_out(chunks)}
+
+    @app.get("/metrics")
+    async def metrics() -> Dict[str, Any]:
+        return service.snapshot()
+
+    return app
+
+
+def serve(controller: AgentController) -> None:
+    """Run the HTTP app with uvicorn in this process (one copy of the models)."""
+    import uvicorn
+
+    config = get_settings().serving
+    logger.info(f"Serving on {config.host}:{config.port}")
+    uvicorn.run(create_app(controller), host=config.host, port=config.port, log_config=None)
@@ -1,20 +1,24 @@
 from __future__ import annotations
 
+from itertools import islice
 from pathlib import Path
 from typing import Optional, Type
 
 import typer
 
+from agentic_rag.evaluation.checkpoint import EvaluationCheckpoint, settings_run_key
 from agentic_rag.evaluation.runner import QrelsEvaluator
 from agentic_rag.evaluation.metrics import MetricSuite, RecallAtK, MRR
+from agentic_rag.evaluation.sweep import AnnSweep
 from agentic_rag.retrieval.base import BaseReranker, BaseRetriever
+from agentic_rag.retrieval.schemas import AnnSearchParams, Query
 
 from .agent import BaseAgentController
 from .data import BaseIngestionPipeline
 from .evaluation import BaseEvaluator
 from .logging_utils import configure_logging
 from .settings import get_settings
-from .utils import resolve_dotted_path
+from .utils import read_jsonl, resolve_dotted_path, write_jsonl
 import logging 
 
 logger = logging.getLogger(__name__)
@@ -64,6 +68,7 @@ def ingest(
         pipeline.run(raw_path, output_path)
         logger.info("=== Evaluation Results ===")
         logger.info(f"embedding model: {settings.vector_store.embedding_model}")
+        logger.info(f"chunking.strategy: {settings.chunking.strategy}")
         logger.info(f"chunking.overlap: {settings.chunking.overlap}")
         logger.info(f"chunking.max_tokens: {settings.chunking.max_tokens}")
         logger.info("Data ingestion completed successfully")
@@ -114,6 +119,7 @@ def evaluate() -> None:
     try:
         logger.debug("Instantiating retriever")
         retriever = _instantiate(settings.retriever_class, BaseRetriever)
+        retriever.warmup()
         
         # Initialize reranker if configured
         reranker = None
@@ -140,16 +146,45 @@ def evaluate() -> None:
             extra={"metric_count": len(metrics._metrics)}
         )
         
+        checkpoint = None
+        if settings.evaluation.checkpoint:
+            checkpoint = EvaluationCheckpoint(
+                settings.evaluation.checkpoint_path or settings.artifacts_dir / "eval_checkpoint.jsonl",
+                settings_run_key(settings),
+            )
+
         evaluator = QrelsEvaluator(
             retriever=retriever,
             metrics=metrics,
             reranker=reranker,
             data_dir=settings.raw_data_dir,  # TODO: temp using raw data dir
+            checkpoint=checkpoint,
         )
         
         logger.info("Running evaluation")
         evaluator.evaluate()
-        
+
+        for name, value in retriever.stats().items():
+            logger.info(f"Retriever {name}: {value}")
+        footprint = retriever.footprint()
+        if footprint:
+            logger.info(f"Retriever footprint: {footprint}", extra=footprint)
+        if reranker:
+            for name, value in reranker.stats().items():
+                logger.info(f"Reranker {name}: {value}")
+
+            # one row per run, so budgets can be compared on quality vs. reranker time
+            tradeoff_path = settings.artifacts_dir / "rerank_tradeoff.jsonl"
+            write_jsonl(tradeoff_path, [{
+                "reranker_class": settings.reranker_class,
+                "retrieval_k": settings.vector_store.retrieval_k,
+                "reranker_top_k": settings.vector_store.reranker_top_k,
+                "cascade_budget": getattr(reranker, "budget", None),
+                "cascade_first_stage": getattr(reranker, "first_stage", None),
+                **evaluator.summary,
+            }], append=True)
+            logger.info(f"Reranking trade-off appended to {tradeoff_path}")
+
         logger.info("Evaluation completed successfully")
         
     except Exception as e:
@@ -161,6 +196,151 @@ def evaluate() -> None:
         raise
 
 
+@app.command("ann-sweep")
+def ann_sweep(
+    ef_search: str = typer.Option("40,64,100,200,400", help="Comma-separated hnsw.ef_search values"),
+    k: Optional[int] = typer.Option(None, help="Top-k to measure; defaults to vector_store.retrieval_k"),
+    limit: int = typer.Option(200, help="Number of evaluation queries to use"),
+) -> None:
+    """Report recall@k vs. p50/p99 latency for each ANN search setting."""
+    logger.info("Starting ANN parameter sweep")
+
+    settings = get_settings()
+    k = k or settings.vector_store.retrieval_k
+    try:
+        retriever = _instantiate(settings.retriever_class, BaseRetriever)
+        retriever.warmup()
+
+        queries = [
+            Query(text=obj["text"], metadata={"query_id": obj["_id"]})
+            for obj in islice(read_jsonl(settings.raw_data_dir / "queries.jsonl"), limit)
+        ]
+        grid = [AnnSearchParams(ef_search=int(v)) for v in ef_search.split(",")]
+        results = AnnSweep(retriever, queries, k=k).run(grid)
+
+        out_path = settings.artifacts_dir / "ann_sweep.jsonl"
+        write_jsonl(out_path, [r.to_row() for r in results])
+        logger.info(f"ANN sweep results written to {out_path}")
+    except Exception as e:
+        logger.error(
+            "ANN sweep failed",
+            extra={"error": str(e)},
+            exc_info=True
+        )
+        raise
+
+
+@app.command("compression-report")
+def compression_report(
+    rescore_factor: str = typer.Option("1,2,4,8", help="Comma-separated shortlist multipliers to re-score"),
+    k: Optional[int] = typer.Option(None, help="Top-k to measure; defaults to vector_store.retrieval_k"),
+    limit: int = typer.Option(200, help="Number of evaluation queries to use"),
+) -> None:
+    """Report index memory saving vs. recall@k loss against exact float search."""
+    logger.info("Starting compression report")
+
+    settings = get_settings()
+    vs = settings.vector_store
+    k = k or vs.retrieval_k
+    try:
+        retriever = _instantiate(settings.retriever_class, BaseRetriever)
+        retriever.warmup()
+        footprint = retriever.footprint()
+        saving = 1 - footprint["index_bytes"] / footprint["float32_bytes"] if footprint.get("float32_bytes") else None
+
+        queries = [
+            Query(text=obj["text"], metadata={"query_id": obj["_id"]})
+            for obj in islice(read_jsonl(settings.raw_data_dir / "queries.jsonl"), limit)
+        ]
+        grid = [AnnSearchParams(rescore_factor=int(v)) for v in rescore_factor.split(",")]
+        results = AnnSweep(retriever, queries, k=k).run(grid)
+
+        # appended, so runs with different compression settings end up side by side
+        out_path = settings.artifacts_dir / "compression_report.jsonl"
+        write_jsonl(out_path, [{
+            "retriever_class": settings.retriever_class,
+            "compression": vs.compression,
+            "faiss_index_type": vs.faiss_index_type,
+            **footprint,
+            "memory_saving": saving,
+            "recall_loss": 1 - r.recall,
+            **r.to_row(),
+        } for r in results], append=True)
+        logger.info(f"Compression report appended to {out_path}")
+    except Exception as e:
+        logger.error(
+            "Compression report failed",
+            extra={"error": str(e)},
+            exc_info=True
+        )
+        raise
+
+
+@app.command("inference-parity")
+def inference_parity(
+    samples: int = typer.Option(64, help="Queries (and query/passage pairs) to compare"),
+) -> None:
+    """Compare embedder and cross-encoder outputs of the configured backend against PyTorch."""
+    from agentic_rag.embeddings.model import get_embedding_model
+    from agentic_rag.retrieval.reranker import load_cross_encoder
+    from agentic_rag.utils.inference import TORCH, embedding_parity, score_parity
+
+    settings = get_settings()
+    backend = settings.inference.backend
+    if backend == TORCH:
+        raise typer.BadParameter("inference.backend is torch; set it to onnx or onnx-int8 to compare")
+
+    queries = [obj["text"] for obj in islice(read_jsonl(settings.raw_data_dir / "queries.jsonl"), samples)]
+    passages = [obj.get("text", "") for obj in islice(read_jsonl(settings.raw_data_dir / "corpus.jsonl"), samples)]
+    normalize = settings.vector_store.normalize_embeddings
+    failed = False
+
+    reference = get_embedding_model(backend=TORCH).encode(queries, normalize_embeddings=normalize)
+    candidate = get_embedding_model(backend=backend).encode(queries, normalize_embeddings=normalize)
+    report = embedding_parity(reference, candidate)
+    logger.info(f"Embedder parity ({backend} vs torch): {report}")
+    if report["min_cosine"] < settings.inference.parity_min_cosine:
+        logger.error(f"Embedder parity below {settings.inference.parity_min_cosine}")
+        failed = True
+
+    model_name = settings.vector_store.cross_encoder_model
+    if model_name and model_name != "null":
+        pairs = [[q, p] for q, p in zip(queries, passages)]
+        reference = load_cross_encoder(model_name, backend=TORCH).predict(pairs)
+        candidate = load_cross_encoder(model_name, backend=backend).predict(pairs)
+        report = score_parity(reference, candidate)
+        logger.info(f"Cross-encoder parity ({backend} vs torch): {report}")
+        if report["max_abs_diff"] > settings.inference.parity_max_score_diff:
+            logger.error(f"Cross-encoder scores differ by more than {settings.inference.parity_max_score_diff}")
+            failed = True
+
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@app.command("export-faiss")
+def export_faiss(
+    kind: Optional[str] = typer.Option(None, help="hnsw or ivfpq; defaults to vector_store.faiss_index_type"),
+    out: Optional[Path] = typer.Option(None, help="Index directory; defaults to vector_store.faiss_index_dir"),
+) -> None:
+    """Build a local FAISS index (plus chunk sidecar) from the ingested embeddings."""
+    from agentic_rag.retrieval.faiss_index import export_faiss_index
+
+    if kind not in (None, "hnsw", "ivfpq"):
+        raise typer.BadParameter("kind must be hnsw or ivfpq")
+    logger.info("Exporting embeddings to FAISS")
+    try:
+        count = export_faiss_index(out, kind=kind)
+        logger.info(f"Exported {count} vectors")
+    except Exception as e:
+        logger.error(
+            "FAISS export failed",
+            extra={"error": str(e)},
+            exc_info=True
+        )
+        raise
+
+
 if __name__ == "__main__":  # pragma: no cover
 
     app()
@@ -1,76 +1,153 @@
-from typing import List
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence, Tuple
 from ..settings import get_settings
+from ..utils.models import model_registry
+import logging
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
-def chunk_text(text: str) -> List[str]:
+_WORD_RE = re.compile(r"\S+")
+
+
+class TextChunk(NamedTuple):
+    """A chunk and the [char_start, char_end) span it covers in the source text."""
+
+    text: str
+    char_start: int
+    char_end: int
+    token_count: int
+
+
+def _model_file(model_name: str, filename: str) -> Optional[Path]:
+    """`filename` from a local model directory or the Hugging Face Hub; None if the model has none."""
+    local = Path(model_name)
+    if local.is_dir():
+        path = local / filename
+        return path if path.exists() else None
+
+    from huggingface_hub import hf_hub_download
+    from huggingface_hub.errors import EntryNotFoundError
+
+    # sentence-transformers resolves bare model names in its own namespace
+    repo = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    try:
+        return Path(hf_hub_download(repo, filename))
+    except EntryNotFoundError:
+        return None
+
+
+def get_tokenizer(model_name: Optional[str] = None):
+    """
+    Return the shared fast (Rust) tokenizer of the embedding model, loaded
+    with the `tokenizers` library so chunking workers never import torch.
+    Truncation and padding are disabled: chunking needs every token.
+    """
+    model_name = model_name or settings.chunking.tokenizer or settings.vector_store.embedding_model
+
+    def load():
+        from tokenizers import Tokenizer
+
+        path = _model_file(model_name, "tokenizer.json")
+        if path is None:
+            raise ValueError(f"{model_name} has no fast tokenizer (tokenizer.json)")
+        tokenizer = Tokenizer.from_file(str(path))
+        tokenizer.no_truncation()
+        tokenizer.no_padding()
+        return tokenizer
+
+    return model_registry.get(("tokenizer", model_name), load)
+
+
+def use_tokenizer(tokenizer, model_name: Optional[str] = None) -> None:
+    """Share an already loaded tokenizer, e.g. one sent to a worker process, instead of loading it again."""
+    model_name = model_name or settings.chunking.tokenizer or settings.vector_store.embedding_model
+    model_registry.get(("tokenizer", model_name), lambda: tokenizer)
+
+
+@lru_cache(maxsize=None)
+def max_seq_length(model_name: str) -> int:
+    """Tokens `model_name` embeds before truncating, special tokens included."""
+    path = _model_file(model_name, "sentence_bert_config.json")
+    if path is not None:
+        return int(json.loads(path.read_text())["max_seq_length"])
+    path = _model_file(model_name, "tokenizer_config.json")
+    limit = json.loads(path.read_text()).get("model_max_length") if path is not None else None
+    if not limit or limit > 1_000_000:  # transformers' "no limit" sentinel is ~1e30
+        raise ValueError(f"Cannot determine the token limit of {model_name}; set chunking.max_tokens")
+    return int(limit)
+
+
+def token_budget() -> int:
+    """
+    Tokens per chunk. With the tokens strategy this is `chunking.max_tokens`
+    or, when unset, the embedding model's max_seq_length minus the special
+    tokens it adds, so chunks fill the window exactly; a larger
+    `max_tokens` would be silently truncated by the embedder and is rejected.
+    """
+    config = settings.chunking
+    if config.strategy == "words":
+        return config.max_tokens
+
+    model_name = settings.vector_store.embedding_model
+    limit = max_seq_length(model_name) - get_tokenizer().num_special_tokens_to_add(False)
+    budget = config.max_tokens or limit
+    if budget > limit:
+        raise ValueError(f"chunking.max_tokens={budget} exceeds the {limit} tokens {model_name} embeds")
+    if config.overlap >= budget:
+        raise ValueError(f"chunking.overlap={config.overlap} must be smaller than the {budget}-token budget")
+    return budget
+
+
+def _pack(text: str, offsets: Sequence[Tuple[int, int]], max_tokens: int, overlap: int) -> List[TextChunk]:
+    """
+    Cut `text` into windows of exactly `max_tokens` tokens (the last one may
+    be shorter), each starting `overlap` tokens before the previous one ends.
+    Chunk text is the source slice from the first to the last token, so
+    whitespace and casing survive tokenization.
     """
-    Split text into chunks suitable for embedding.
-    
+    chunks: List[TextChunk] = []
+    start, n = 0, len(offsets)
+    while start < n:
+        end = min(start + max_tokens, n)
+        char_start, char_end = offsets[start][0], offsets[end - 1][1]
+        chunks.append(TextChunk(text[char_start:char_end], char_start, char_end, end - start))
+        if end == n:
+            break
+        start = end - overlap
+    return chunks
+
+
+def chunk_texts(texts: Sequence[str], *, budget: Optional[int] = None) -> List[List[TextChunk]]:
+    """
+    Split each text into chunks suitable for embedding.
+
+    With the `tokens` strategy the whole batch is tokenized in one
+    `encode_batch` call (parallel in Rust) and chunks are packed to exactly
+    `token_budget()` embedding tokens, so they fill the model window
+    without being truncated by it. The `words` strategy counts whitespace
+    separated words instead and needs no tokenizer.
+
     Args:
-        text: Input cleaned text.
-        max_tokens: Approximate max number of words per chunk.
-        overlap: Number of words to overlap between consecutive chunks.
-    
+        texts: Cleaned input texts.
+        budget: Tokens per chunk; resolved with token_budget() when omitted.
+
     Returns:
-        List of text chunks.
+        One list of chunks per input text (empty for blank text).
     """
-    #TODO use langchain or tiktoken for tokenization? and chunking
-    words = text.split()
-    chunks = []
-    start = 0
-    while start < len(words):
-        end = min(start + settings.chunking.max_tokens, len(words))
-        chunk = " ".join(words[start:end])
-        chunks.append(chunk)
-        start += settings.chunking.max_tokens - settings.chunking.overlap
-    return chunks
+    config = settings.chunking
+    if config.strategy == "words":
+        offsets = [[m.span() for m in _WORD_RE.finditer(text)] for text in texts]
+    else:
+        encodings = get_tokenizer().encode_batch(list(texts), add_special_tokens=False)
+        offsets = [encoding.offsets for encoding in encodings]
+    budget = budget or token_budget()
+    return [_pack(text, spans, budget, config.overlap) for text, spans in zip(texts, offsets)]
 
 
-# def chunk_text(text: str) -> List[str]:
-#     """
-#     Split text into chunks suitable for embedding.
-    
-#     Args:
-#         text: Input cleaned text.
-    
-#     Returns:
-#         List of text chunks.
-#     """
-#     # Handle empty input
-#     if not text or not text.strip():
-#         return [text]  # Return original (even if empty)
-    
-#     words = text.split()
-    
-#     # Handle single word or very short text
-#     if len(words) <= settings.chunking.max_tokens:
-#         return [text]
-    
-#     # Validate settings
-#     if settings.chunking.max_tokens <= 0:
-#         raise ValueError(f"max_tokens must be positive, got {settings.chunking.max_tokens}")
-    
-#     if settings.chunking.overlap >= settings.chunking.max_tokens:
-#         raise ValueError(
-#             f"overlap ({settings.chunking.overlap}) must be less than "
-#             f"max_tokens ({settings.chunking.max_tokens})"
-#         )
-    
-#     chunks = []
-#     start = 0
-#     step = settings.chunking.max_tokens - settings.chunking.overlap
-    
-#     while start < len(words):
-#         end = min(start + settings.chunking.max_tokens, len(words))
-#         chunk = " ".join(words[start:end])
-#         chunks.append(chunk)
-        
-#         # Move to next chunk
-#         start += step
-        
-#         # Prevent infinite loop or tiny final chunks
-#         if step <= 0:
-#             break
-    
-#     return chunks
\ No newline at end of file
+def chunk_text(text: str) -> List[str]:
+    """Chunk a single text; see chunk_texts."""
+    return [chunk.text for chunk in chunk_texts([text])[0]]
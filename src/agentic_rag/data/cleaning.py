@@ -1,23 +1,41 @@
 import html
 import re
 
+# Precompiled, and each guarded by a cheap `in` scan so a pass only runs (and
+# only copies the string) when the text actually contains what it rewrites.
+_INDENT_RE = re.compile(r"\n[ \t]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_SPACE_RUN_RE = re.compile(r"[ \t]{2,}")
+# Same as _SPACE_RUN_RE for tab-free text; the literal "  " prefix lets the
+# matcher skip single spaces instead of trying a match at every one of them.
+_DOUBLE_SPACE_RE = re.compile(r"  +")
+
+
 def clean_text(text: str) -> str:
     if not text:
         return ""
 
-    # Decode escaped HTML codes
+    # Decode escaped HTML codes (returns the input untouched when there is no '&')
     text = html.unescape(text)
-    text = text.replace("\x00", "")
+
+    if "\x00" in text:
+        text = text.replace("\x00", "")
 
     # fix line endings
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
 
     # excessive indentation
-    text = re.sub(r"\n[ \t]+", "\n", text)
+    if "\n " in text or "\n\t" in text:
+        text = _INDENT_RE.sub("\n", text)
 
     # blank lines
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    if "\n\n\n" in text:
+        text = _BLANK_LINES_RE.sub("\n\n", text)
 
     # Normalize spaces (but NOT newlines)
-    text = re.sub(r"[ \t]{2,}", " ", text)
+    if "\t" in text:
+        text = _SPACE_RUN_RE.sub(" ", text)
+    elif "  " in text:
+        text = _DOUBLE_SPACE_RE.sub(" ", text)
     return text.strip()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import orjson
+
+from .types import Chunk, RawRecord
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when cleaning/chunking logic changes so every record is re-ingested.
+MANIFEST_VERSION = 2
+
+
+def record_hash(record: RawRecord) -> str:
+    """Content hash of the fields that feed chunking."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(record.title.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(record.body.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def ingest_fingerprint(*parts: object) -> str:
+    """Hash of the settings that change chunk text or vectors (model, chunking params)."""
+    raw = "|".join([str(MANIFEST_VERSION), *(str(p) for p in parts)])
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+
+@dataclass(slots=True)
+class ManifestEntry:
+    content_hash: str
+    chunk_count: int
+
+
+class IngestManifest:
+    """
+    record_id -> (content hash, chunk count) from the last successful ingest.
+
+    A manifest written under a different fingerprint still provides chunk
+    counts for orphan cleanup, but reports every record as changed.
+    """
+
+    def __init__(
+        self,
+        fingerprint: str,
+        entries: Optional[Dict[str, ManifestEntry]] = None,
+        *,
+        source_fingerprint: Optional[str] = None,
+    ):
+        self.fingerprint = fingerprint
+        self.entries: Dict[str, ManifestEntry] = entries or {}
+        self.source_fingerprint = source_fingerprint or fingerprint
+
+    @classmethod
+    def load(cls, path: Path, fingerprint: str) -> "IngestManifest":
+        if not path.exists():
+            return cls(fingerprint)
+        data = orjson.loads(path.read_bytes())
+        entries = {
+            record_id: ManifestEntry(content_hash=h, chunk_count=n)
+            for record_id, (h, n) in data["records"].items()
+        }
+        if data.get("fingerprint") != fingerprint:
+            logger.info("Ingestion settings changed since last run; all records will be re-ingested")
+        return cls(fingerprint, entries, source_fingerprint=data.get("fingerprint"))
+
+    def save(self, path: Path) -> None:
+        """Atomically replace `path` with this manifest."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "fingerprint": self.fingerprint,
+            "records": {
+                record_id: [e.content_hash, e.chunk_count] for record_id, e in self.entries.items()
+            },
+        }
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(orjson.dumps(payload))
+        os.replace(tmp, path)
+
+    def unchanged(self, record_id: str, content_hash: str) -> bool:
+        if self.source_fingerprint != self.fingerprint:
+            return False
+        entry = self.entries.get(record_id)
+        return entry is not None and entry.content_hash == content_hash
+
+
+class ChangeTracker:
+    """
+    Filters records against a previous manifest and builds the next one.
+
+    Wrap the record stream with `changed_records`, the chunk stream with
+    `count_chunks`, and call `orphans()` once both are exhausted.
+    """
+
+    def __init__(self, previous: IngestManifest):
+        self.previous = previous
+        self.current = IngestManifest(previous.fingerprint)
+        self.skipped = 0
+
+    def changed_records(self, records: Iterable[RawRecord]) -> Iterator[RawRecord]:
+        for record in records:
+            content_hash = record_hash(record)
+            if self.previous.unchanged(record.identifier, content_hash):
+                self.current.entries[record.identifier] = self.previous.entries[record.identifier]
+                self.skipped += 1
+                continue
+            self.current.entries[record.identifier] = ManifestEntry(content_hash, 0)
+            yield record
+
+    def count_chunks(self, chunks: Iterable[Chunk]) -> Iterator[Chunk]:
+        for chunk in chunks:
+            self.current.entries[chunk.record_id].chunk_count += 1
+            yield chunk
+
+    def orphans(self) -> Tuple[list[str], Dict[str, int]]:
+        """
+        Return (record ids that vanished, {record id: new chunk count} for
+        records whose chunk count shrank). Rows beyond the new count are stale.
+        """
+        removed = [rid for rid in self.previous.entries if rid not in self.current.entries]
+        shrunk = {
+            rid: entry.chunk_count
+            for rid, entry in self.current.entries.items()
+            if rid in self.previous.entries
+            and entry.chunk_count < self.previous.entries[rid].chunk_count
+        }
+        return removed, shrunk
@@ -1,103 +1,208 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Iterable, List
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime
 import json
+import threading
+import numpy as np
 from .pipeline import BaseIngestionPipeline
 from .types import Chunk, RawRecord
-from agentic_rag.utils.io import read_jsonl
-from agentic_rag.embeddings.model import embed_batch
-from agentic_rag.storage.db import get_connection, ensure_schema
+from agentic_rag.utils.io import external_sort, read_jsonl
+from agentic_rag.embeddings.model import embed_batch, embedding_cache_key
+from agentic_rag.embeddings.cache import EmbeddingCache
+from agentic_rag.storage.db import ensure_schema_once, iter_documents
+from agentic_rag.storage.pool import pooled_connection
+from agentic_rag.storage.bulk import copy_documents, delete_orphans
+from agentic_rag.storage.index import create_embedding_index, drop_embedding_index
+from agentic_rag.retrieval.bm25 import bm25_index_path, build_bm25_index
 from .cleaning import clean_text
-from .chunk_text import chunk_text
+from .stages import Stage, StagedPipeline, ordered_map
+from .manifest import ChangeTracker, IngestManifest, ingest_fingerprint
+from .chunk_text import chunk_texts, get_tokenizer, token_budget, use_tokenizer
 from ..settings import get_settings
+from ..settings.schema import ChunkingConfig
 import logging
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+
+# Set in each worker of a transform pool by _init_transform_worker
+_worker_budget: Optional[int] = None
+
+
+def _init_transform_worker(chunking: ChunkingConfig, embedding_model: str, tokenizer, budget: int) -> None:
+    """Give a spawned transform worker the parent's chunking settings, loaded tokenizer and token budget."""
+    global _worker_budget
+    settings.chunking = chunking
+    settings.vector_store.embedding_model = embedding_model
+    if tokenizer is not None:
+        use_tokenizer(tokenizer)
+    _worker_budget = budget
+
+
+def _chunk_records_in_worker(records: Sequence[RawRecord]) -> List[Chunk]:
+    return chunk_records(records, budget=_worker_budget)
+
+
+def chunk_records(records: Sequence[RawRecord], *, budget: Optional[int] = None) -> List[Chunk]:
+    """
+    Clean and chunk a batch of records with one batched tokenizer call;
+    chunk ids depend only on the record id and chunk position. Chunk
+    metadata keeps the character span of each chunk in the cleaned record
+    text and its token count. `budget` defaults to token_budget().
+    """
+    texts = [clean_text(record.title + "\n\n" + record.body) for record in records]
+    return [
+        Chunk(
+            chunk_id=f"{record.identifier}_{i}",
+            record_id=record.identifier,
+            text=piece.text,
+            metadata={
+                "original_id": record.identifier,  # make sure this original id addition doesnt break anything
+                "chunk_index": i,
+                "char_start": piece.char_start,
+                "char_end": piece.char_end,
+                "token_count": piece.token_count,
+            },
+        )
+        for record, pieces in zip(records, chunk_texts(texts, budget=budget))
+        for i, piece in enumerate(pieces)
+    ]
+
+
 class WordPressIngestionPipeline(BaseIngestionPipeline):
     """Ingestion pipeline for WordPress export XML files."""
+
+    def __init__(self) -> None:
+        self._jsonl_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._embedding_cache: Optional[EmbeddingCache] = None
     
     def load_raw(self, raw_dir: Path) -> Iterable[RawRecord]:
+        """Stream raw records from corpus.jsonl, optionally ordered by id via external sort."""
         path = raw_dir / "corpus.jsonl"
         logger.info(f"Loading raw data from {path}")
-        rows = []
-        for obj in read_jsonl(path): 
-            rows.append(
-                RawRecord(
-                    identifier=obj["_id"],
-                    title=obj.get("title", ""),
-                    body=obj.get("text", ""),
-                    metadata={"source": "cqadupstack-wordpress"},
-                )
+
+        rows = read_jsonl(path)
+        if settings.ingestion.sort_records:
+            rows = external_sort(
+                rows,
+                key=lambda obj: obj["_id"],
+                run_size=settings.ingestion.sort_run_size,
+            )
+
+        count = 0
+        for obj in rows:
+            count += 1
+            yield RawRecord(
+                identifier=obj["_id"],
+                title=obj.get("title", ""),
+                body=obj.get("text", ""),
+                metadata={"source": "cqadupstack-wordpress"},
             )
         logger.info(
-                f"Loaded {len(rows)} raw records",
-                extra={"record_count": len(rows), "source_file": str(path)}
+                f"Loaded {count} raw records",
+                extra={"record_count": count, "source_file": str(path)}
             )
-        return sorted(rows, key=lambda r: r.identifier)
 
     def transform(self, records: Iterable[RawRecord]) -> Iterable[Chunk]:
-        logger.info("Transforming raw records into chunks")
-        for record in records:
-            text = clean_text(record.title + "\n\n" + record.body)
-            for i, chunk_text_str in enumerate(chunk_text(text)):
-                yield Chunk(
-                    chunk_id=f"{record.identifier}_{i}",
-                    record_id=record.identifier,
-                    text=chunk_text_str,
-                    metadata={"original_id": record.identifier, "chunk_index": i}, #make sure this original id addition doesnt break anything
-                )
+        workers = settings.ingestion.transform_workers
+        logger.info(f"Transforming raw records into chunks ({workers} worker(s))")
+        if workers == 1:
+            records = iter(records)
+            size = settings.ingestion.transform_batch_size
+            budget = token_budget()
+            for batch in iter(lambda: list(islice(records, size)), []):
+                yield from chunk_records(batch, budget=budget)
+        else:
+            yield from self._transform_parallel(records, workers)
         logger.info("Transformation complete")
 
+    @staticmethod
+    def _transform_parallel(records: Iterable[RawRecord], workers: int) -> Iterator[Chunk]:
+        """
+        Fan batches of records out to a process pool. Batches are yielded in
+        input order as they finish, with at most two per worker in flight, so
+        the output equals the serial transform and memory stays bounded.
+
+        Workers are spawned rather than forked: this runs in a pipeline
+        thread next to the embed/write threads and the connection pool, and
+        forking a multithreaded process can deadlock the child. Each worker
+        receives the chunking settings, the already loaded tokenizer and the
+        token budget resolved here, so no worker looks anything up on the Hub.
+        """
+        size = settings.ingestion.transform_batch_size
+        records = iter(records)
+        batches = iter(lambda: list(islice(records, size)), [])
+        tokenizer = get_tokenizer() if settings.chunking.strategy == "tokens" else None
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_transform_worker,
+            initargs=(settings.chunking, settings.vector_store.embedding_model, tokenizer, token_budget()),
+        ) as pool:
+            for chunks in ordered_map(_chunk_records_in_worker, batches, pool, window=2 * workers):
+                yield from chunks
+
     def persist(self, chunks: List[Chunk], output_dir: Path) -> None:
         """Persist a batch of chunks to Postgres + pgvector and write JSONL for inspection."""
         if not chunks:
             logger.warning("No chunks to persist")
             return
 
-        logger.debug(f"Persisting batch of {len(chunks)} chunks")
+        self.write(*self.embed(chunks), output_dir)
+
+    def embed(self, chunks: List[Chunk]) -> Tuple[List[Chunk], np.ndarray]:
+        """Embed a batch of chunks, returning the batch alongside its vectors."""
+        logger.debug(f"Embedding batch of {len(chunks)} chunks")
         
         texts = [c.text for c in chunks]
-        embeddings = embed_batch(texts)  # returns list of vectors
+        cache = self._get_embedding_cache()
+        if cache is not None:
+            embeddings = cache.embed(texts, embed_batch)  # only misses hit the model
+        else:
+            embeddings = embed_batch(texts)  # (n, dim) float array
         
         logger.debug(f"Generated {len(embeddings)} embeddings")
         assert len(embeddings) == len(chunks)
+        return chunks, embeddings
 
-        with get_connection() as conn:
-            ensure_schema(conn)
-            sql_query = """
-                INSERT INTO documents (
-                    chunk_id,
-                    record_id,
-                    content,
-                    embedding,
-                    metadata,
-                    created_at
+    def _get_embedding_cache(self) -> Optional[EmbeddingCache]:
+        if not settings.ingestion.embedding_cache:
+            return None
+        with self._cache_lock:
+            if self._embedding_cache is None:
+                path = (
+                    settings.ingestion.embedding_cache_path
+                    or settings.artifacts_dir / "embedding_cache.sqlite3"
                 )
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (chunk_id) DO UPDATE SET
-                    content = EXCLUDED.content,
-                    embedding = EXCLUDED.embedding,
-                    metadata = EXCLUDED.metadata;
-            """
+                self._embedding_cache = EmbeddingCache(
+                    path,
+                    embedding_cache_key(),
+                    dtype=settings.vector_store.embedding_dtype,
+                )
+        return self._embedding_cache
 
+    def write(self, chunks: List[Chunk], embeddings: np.ndarray, output_dir: Path) -> int:
+        """Upsert an embedded batch into Postgres and append it to chunks.jsonl."""
+        with pooled_connection() as conn:
+            ensure_schema_once(conn)
             now = datetime.utcnow()
-            rows = [
-                (
-                    c.chunk_id,
-                    c.record_id,
-                    c.text,
-                    embedding,                
-                    json.dumps(c.metadata),
-                    c.created_at or now,
+            if settings.ingestion.bulk_copy:
+                copy_documents(
+                    conn,
+                    [
+                        (c.chunk_id, c.record_id, c.text, c.metadata, c.created_at or now)
+                        for c in chunks
+                    ],
+                    embeddings,
                 )
-                for c, embedding in zip(chunks, embeddings)
-            ]
-
-            with conn.cursor() as cur:
-                cur.executemany(sql_query, rows)
+            else:
+                self._insert_rows(conn, chunks, embeddings, now)
             conn.commit()
         
         logger.debug(
@@ -108,7 +213,7 @@ class WordPressIngestionPipeline(BaseIngestionPipeline):
         # write batch to JSONL for inspection
         output_dir.mkdir(parents=True, exist_ok=True)
         out_path = output_dir / "chunks.jsonl"
-        with out_path.open("a", encoding="utf-8") as f: 
+        with self._jsonl_lock, out_path.open("a", encoding="utf-8") as f: 
             for c in chunks:
                 f.write(json.dumps({
                     "chunk_id": c.chunk_id,
@@ -116,6 +221,39 @@ class WordPressIngestionPipeline(BaseIngestionPipeline):
                     "text": c.text,
                     "metadata": c.metadata,
                 }) + "\n")
+        return len(chunks)
+
+    @staticmethod
+    def _insert_rows(conn, chunks: List[Chunk], embeddings: np.ndarray, now: datetime) -> None:
+        sql_query = """
+            INSERT INTO documents (
+                chunk_id,
+                record_id,
+                content,
+                embedding,
+                metadata,
+                created_at
+            )
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (chunk_id) DO UPDATE SET
+                content = EXCLUDED.content,
+                embedding = EXCLUDED.embedding,
+                metadata = EXCLUDED.metadata;
+        """
+        rows = [
+            (
+                c.chunk_id,
+                c.record_id,
+                c.text,
+                embedding,                
+                json.dumps(c.metadata),
+                c.created_at or now,
+            )
+            for c, embedding in zip(chunks, embeddings)
+        ]
+
+        with conn.cursor() as cur:
+            cur.executemany(sql_query, rows)
 
     def run(self, raw_dir: Path, output_dir: Path) -> None:
         """Run the ingestion pipeline with batching for embeddings and DB inserts."""
@@ -123,26 +261,124 @@ class WordPressIngestionPipeline(BaseIngestionPipeline):
         logger.info("Starting WordPress ingestion pipeline")
         
         records = self.load_raw(raw_dir)
-        batch: List[Chunk] = []
+        tracker = self._change_tracker(output_dir) if settings.ingestion.incremental else None
+        if tracker is not None:
+            chunks = tracker.count_chunks(self.transform(tracker.changed_records(records)))
+        else:
+            chunks = self.transform(records)
+        batches = self._batched(chunks, settings.chunking.batch_size)
         total_chunks = 0
-        
-        #TODO is raw record a list or dict? do i need to clean all values? checkthis
-        for chunk in self.transform(records):
-            batch.append(chunk)
-            if len(batch) >= settings.chunking.batch_size:
-                self.persist(batch, output_dir)
-                total_chunks += len(batch)
+
+        if settings.ingestion.pipelined:
+            # transform runs in the source thread; embed and write overlap behind it
+            staged = StagedPipeline(
+                [
+                    Stage("embed", self.embed, workers=settings.ingestion.embed_workers),
+                    Stage(
+                        "write",
+                        lambda item: self.write(*item, output_dir),
+                        workers=settings.ingestion.write_workers,
+                    ),
+                ],
+                queue_size=settings.ingestion.queue_size,
+            )
+            written = staged.run(batches)
+        else:
+            written = (self.write(*self.embed(batch), output_dir) for batch in batches)
+
+        # only full loads: an incremental run may write a handful of chunks
+        rebuild_index = (
+            settings.ingestion.bulk_copy
+            and settings.ingestion.rebuild_index
+            and tracker is None
+        )
+        if rebuild_index:
+            with pooled_connection() as conn:
+                ensure_schema_once(conn)
+                drop_embedding_index(conn)
+
+        try:
+            #TODO is raw record a list or dict? do i need to clean all values? checkthis
+            for count in written:
+                total_chunks += count
                 logger.info(
                     f"Progress: {total_chunks} chunks processed",
                     extra={"total_chunks": total_chunks}
                 )
-                batch.clear()
+        finally:
+            if rebuild_index:
+                with pooled_connection() as conn:
+                    vs = settings.vector_store
+                    create_embedding_index(conn, vs.distance_metric, compression=vs.compression, dim=vs.embedding_dim)
 
-        if batch:
-            self.persist(batch, output_dir)
-            total_chunks += len(batch)
+        if tracker is not None:
+            self._finish_incremental(tracker, output_dir)
+
+        if settings.ingestion.build_bm25_index:
+            self._build_bm25_index()
             
+        if self._embedding_cache is not None:
+            logger.info(
+                f"Embedding cache hit rate: {self._embedding_cache.hit_rate():.1%}",
+                extra={
+                    "cache_hits": self._embedding_cache.hits,
+                    "cache_misses": self._embedding_cache.misses,
+                }
+            )
+
         logger.info(
             f"Ingestion pipeline completed",
             extra={"total_chunks": total_chunks, "output_dir": str(output_dir)}
-        )
\ No newline at end of file
+        )
+
+    def _build_bm25_index(self) -> None:
+        """Index every stored chunk (not just this run's) so incremental runs stay complete."""
+        path = bm25_index_path()
+        with pooled_connection() as conn:
+            documents = build_bm25_index(iter_documents(conn), path)
+        logger.info(f"BM25 index rebuilt over {documents} chunks", extra={"path": str(path)})
+
+    def _manifest_path(self, output_dir: Path) -> Path:
+        return settings.ingestion.manifest_path or output_dir / "manifest.json"
+
+    def _change_tracker(self, output_dir: Path) -> ChangeTracker:
+        fingerprint = ingest_fingerprint(
+            embedding_cache_key(),
+            settings.chunking.strategy,
+            settings.chunking.tokenizer or settings.vector_store.embedding_model,
+            token_budget(),
+            settings.chunking.overlap,
+        )
+        return ChangeTracker(IngestManifest.load(self._manifest_path(output_dir), fingerprint))
+
+    def _finish_incremental(self, tracker: ChangeTracker, output_dir: Path) -> None:
+        """Delete rows orphaned since the previous run, then record the new manifest."""
+        removed, shrunk = tracker.orphans()
+        deleted = 0
+        if removed or shrunk:
+            with pooled_connection() as conn:
+                ensure_schema_once(conn)
+                deleted = delete_orphans(conn, removed, shrunk)
+                conn.commit()
+        tracker.current.save(self._manifest_path(output_dir))
+
+        logger.info(
+            f"Incremental ingest: {tracker.skipped} unchanged records skipped, "
+            f"{len(removed)} removed, {deleted} orphaned chunks deleted",
+            extra={
+                "skipped_records": tracker.skipped,
+                "removed_records": len(removed),
+                "deleted_chunks": deleted,
+            }
+        )
+
+    @staticmethod
+    def _batched(chunks: Iterable[Chunk], size: int) -> Iterator[List[Chunk]]:
+        batch: List[Chunk] = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Iterable, Iterator, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+@dataclass(slots=True)
+class Stage:
+    """A named step of a staged pipeline, run by `workers` threads."""
+
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+
+
+class StagedPipeline:
+    """
+    Thread-based producer/consumer pipeline.
+
+    Items flow source -> stage[0] -> ... -> stage[-1] through bounded queues,
+    so a slow stage applies backpressure to everything upstream instead of
+    buffering the whole input. Stages are expected to spend most of their
+    time in code that releases the GIL (model inference, socket/file I/O).
+    With more than one worker per stage, output order is not preserved.
+    The first exception raised by any stage stops the pipeline and is
+    re-raised to the caller.
+    """
+
+    def __init__(self, stages: Sequence[Stage], *, queue_size: int = 4):
+        if not stages:
+            raise ValueError("StagedPipeline needs at least one stage")
+        for stage in stages:
+            if stage.workers < 1:
+                raise ValueError(f"Stage {stage.name!r} needs at least one worker")
+        if queue_size < 1:
+            raise ValueError(f"queue_size must be positive, got {queue_size}")
+
+        self.stages = list(stages)
+        self.queue_size = queue_size
+
+    def run(self, items: Iterable[Any]) -> Iterator[Any]:
+        """Feed `items` through every stage and yield results of the last one."""
+        stop = threading.Event()
+        errors: list[BaseException] = []
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads: list[threading.Thread] = []
+
+        def fail(exc: BaseException) -> None:
+            if not errors:
+                errors.append(exc)
+            stop.set()
+
+        def put(q: queue.Queue, item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def feed() -> None:
+            try:
+                for item in items:
+                    if not put(queues[0], item):
+                        return
+            except BaseException as exc:  # propagate to the consumer
+                fail(exc)
+                return
+            for _ in range(self.stages[0].workers):
+                put(queues[0], _DONE)
+
+        threads.append(threading.Thread(target=feed, name="stage-source", daemon=True))
+
+        for index, stage in enumerate(self.stages):
+            in_q, out_q = queues[index], queues[index + 1]
+            downstream = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+            remaining = [stage.workers]
+            lock = threading.Lock()
+
+            def work(stage=stage, in_q=in_q, out_q=out_q, downstream=downstream,
+                     remaining=remaining, lock=lock) -> None:
+                while not stop.is_set():
+                    try:
+                        item = in_q.get(timeout=_POLL_SECONDS)
+                    except queue.Empty:
+                        continue
+                    if item is _DONE:
+                        break
+                    try:
+                        result = stage.fn(item)
+                    except BaseException as exc:
+                        logger.error(f"Stage {stage.name} failed", exc_info=True)
+                        fail(exc)
+                        return
+                    if not put(out_q, result):
+                        return
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    for _ in range(downstream):
+                        put(out_q, _DONE)
+
+            for n in range(stage.workers):
+                threads.append(
+                    threading.Thread(target=work, name=f"stage-{stage.name}-{n}", daemon=True)
+                )
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                if errors:
+                    break
+                try:
+                    item = queues[-1].get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        if errors:
+            raise errors[0]
+
+
+def ordered_map(fn: Callable[[Any], Any], items: Iterable[Any], executor: Executor, *, window: int) -> Iterator[Any]:
+    """
+    Like `executor.map`, but lazy: at most `window` items are in flight, so
+    a long input is streamed rather than submitted up front. Results come
+    back in input order; an exception from any item is re-raised here and
+    cancels the items not yet started.
+    """
+    if window < 1:
+        raise ValueError(f"window must be positive, got {window}")
+    pending: Deque[Future] = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
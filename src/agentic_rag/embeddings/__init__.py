@@ -0,0 +1,7 @@
+"""Embedding models (loaded lazily on first use)."""
+
+from .cache import EmbeddingCache
+from .model import embed_batch, get_embedding_model
+from .query_cache import QueryEmbeddingCache
+
+__all__ = ["EmbeddingCache", "QueryEmbeddingCache", "embed_batch", "get_embedding_model"]
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from ..utils.cache import CacheStats, SQLiteStore
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def text_key(text: str) -> bytes:
+    """Hash of whitespace-normalized text; texts differing only in spacing share a key."""
+    normalized = " ".join(text.split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingCache(CacheStats):
+    """
+    Persistent embedding cache keyed by (model name, normalized text hash).
+
+    Vectors are stored as raw float32 blobs in a local SQLite database, so a
+    re-ingest only runs the encoder for chunks whose text changed. Safe to
+    share between threads.
+    """
+
+    def __init__(self, path: Path, model_name: str, *, dtype: str = "float32"):
+        super().__init__()
+        self.path = path
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self._store = SQLiteStore(path, "embedding_vectors")
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Return a cached float32 vector per text, or None where it is missing."""
+        keys = [text_key(t) for t in texts]
+        found = self._store.get_many(self.model_name, keys)
+        results = [
+            np.frombuffer(found[k], dtype="<f4") if k in found else None
+            for k in keys
+        ]
+        hits = sum(r is not None for r in results)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def put_many(self, texts: Sequence[str], embeddings: np.ndarray) -> None:
+        """Store one vector per text (rows of `embeddings`)."""
+        matrix = np.ascontiguousarray(embeddings, dtype="<f4")
+        self._store.put_many(
+            self.model_name, [(text_key(text), row.tobytes()) for text, row in zip(texts, matrix)]
+        )
+
+    def embed(self, texts: Sequence[str], embed_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Return embeddings for `texts`, calling `embed_fn` only for cache misses."""
+        if not texts:
+            return np.asarray(embed_fn([]), dtype=self.dtype)
+
+        cached = self.get_many(texts)
+        missing = [i for i, vec in enumerate(cached) if vec is None]
+
+        if len(missing) == len(texts):
+            fresh = embed_fn(list(texts))
+            self.put_many(texts, fresh)
+            return np.ascontiguousarray(fresh, dtype=self.dtype)
+
+        dim = next(vec for vec in cached if vec is not None).shape[0]
+        out = np.empty((len(texts), dim), dtype=self.dtype)
+        for i, vec in enumerate(cached):
+            if vec is not None:
+                out[i] = vec
+        if missing:
+            fresh = embed_fn([texts[i] for i in missing])
+            self.put_many([texts[i] for i in missing], fresh)
+            out[missing] = fresh
+        return out
+
+    def close(self) -> None:
+        self._store.close()
@@ -1,18 +1,47 @@
-from typing import List
-import torch
-from sentence_transformers import SentenceTransformer
+from typing import List, Optional
+import numpy as np
 from ..settings import get_settings
+from ..utils.inference import TORCH, backend_tag, current_backend, load_transformer
+from ..utils.models import model_registry
 import logging
 settings = get_settings()
 logger = logging.getLogger(__name__)
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 
-if DEVICE != "cuda":
-    logger.info("Warning: CUDA not available, using CPU for embeddings. This may be slow.")
 
-model = SentenceTransformer(settings.vector_store.embedding_model, device=DEVICE)
+def get_device() -> str:
+    import torch
 
-def embed_batch(texts: List[str]) -> List[List[float]]:
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    if device != "cuda":
+        logger.info("Warning: CUDA not available, using CPU for embeddings. This may be slow.")
+    return device
+
+
+def get_embedding_model(model_name: Optional[str] = None, *, backend: Optional[str] = None):
+    """
+    Return the shared SentenceTransformer for `model_name`, loading it on
+    first use with the configured inference backend (or `backend`).
+    """
+    model_name = model_name or settings.vector_store.embedding_model
+    backend = current_backend(backend)
+
+    def load():
+        from sentence_transformers import SentenceTransformer
+
+        if backend == TORCH:
+            return load_transformer(SentenceTransformer, model_name, backend=backend, device=get_device())
+        return load_transformer(SentenceTransformer, model_name, backend=backend)  # ONNX Runtime on CPU
+
+    return model_registry.get(("sentence-transformer", model_name, backend), load)
+
+
+def embedding_cache_key(model_name: Optional[str] = None) -> str:
+    """Identify vectors produced by `model_name` under the current normalization and backend settings."""
+    model_name = (model_name or settings.vector_store.embedding_model) + backend_tag()
+    return f"{model_name}#normalized" if settings.vector_store.normalize_embeddings else model_name
+
+
+def embed_batch(texts: List[str]) -> np.ndarray:
     """
     Generate embeddings for a list of texts.
 
@@ -20,7 +49,17 @@ def embed_batch(texts: List[str]) -> List[List[float]]:
         texts: List of strings
 
     Returns:
-        List of embedding vectors (as Python lists)
+        Contiguous (len(texts), dim) array in `vector_store.embedding_dtype`
+        (float32 unless configured as float16). Rows are unit length when
+        `vector_store.normalize_embeddings` is set and can be passed straight
+        to psycopg, which sends them as binary pgvector values.
     """
-    embeddings = model.encode(texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False)
-    return embeddings.tolist()
+    model = get_embedding_model()
+    embeddings = model.encode(
+        texts,
+        batch_size=32,
+        convert_to_numpy=True,
+        normalize_embeddings=settings.vector_store.normalize_embeddings,
+        show_progress_bar=False,
+    )
+    return np.ascontiguousarray(embeddings, dtype=settings.vector_store.embedding_dtype)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..settings import get_settings
+from ..utils.cache import CacheStats
+from .cache import EmbeddingCache, text_key
+from .model import embedding_cache_key
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _Entry:
+    vector: np.ndarray
+    expires_at: Optional[float]
+
+
+class QueryEmbeddingCache(CacheStats):
+    """
+    Bounded LRU of query embeddings keyed by (model, normalized text hash).
+
+    Entries expire after `ttl` seconds. An optional `disk` tier (an
+    EmbeddingCache) is consulted on memory misses and filled with fresh
+    encodings, so repeated evaluation runs never re-encode a query. Every
+    vector is kept in `dtype`, the encoder's output dtype, whichever tier it
+    came from. Safe to share between threads; pickles without its memory
+    tier.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        *,
+        max_entries: int = 4096,
+        ttl: Optional[float] = 3600.0,
+        disk: Optional[EmbeddingCache] = None,
+        dtype: str = "float32",
+    ):
+        super().__init__()
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk = disk
+        self.memory_bytes = 0
+        self._entries: OrderedDict[bytes, _Entry] = OrderedDict()
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        state["_entries"] = OrderedDict()
+        state["memory_bytes"] = 0
+        return state
+
+    @classmethod
+    def from_settings(cls) -> "QueryEmbeddingCache":
+        config = get_settings().vector_store
+        model_name = embedding_cache_key()
+        disk = None
+        if config.query_cache_path:
+            disk = EmbeddingCache(config.query_cache_path, model_name, dtype=config.embedding_dtype)
+        return cls(
+            model_name,
+            max_entries=config.query_cache_size,
+            ttl=config.query_cache_ttl,
+            disk=disk,
+            dtype=config.embedding_dtype,
+        )
+
+    def _lookup(self, key: bytes, now: float) -> Optional[np.ndarray]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at is not None and entry.expires_at <= now:
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry.vector
+
+    def _evict(self, key: bytes) -> None:
+        entry = self._entries.pop(key)
+        self.memory_bytes -= entry.vector.nbytes + len(key)
+
+    def _store(self, key: bytes, vector: np.ndarray, now: float) -> None:
+        if self.max_entries <= 0:
+            return
+        if key in self._entries:
+            self._evict(key)
+        expires_at = now + self.ttl if self.ttl else None
+        self._entries[key] = _Entry(vector, expires_at)
+        self.memory_bytes += vector.nbytes + len(key)
+        while len(self._entries) > self.max_entries:
+            self._evict(next(iter(self._entries)))
+
+    def embed(self, texts: Sequence[str], embed_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Return one embedding per text, calling `embed_fn` only for texts cached in neither tier."""
+        if not texts:
+            return embed_fn([])
+
+        keys = [text_key(t) for t in texts]
+        now = time.monotonic()
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        with self._lock:
+            for i, key in enumerate(keys):
+                vectors[i] = self._lookup(key, now)
+        missing = [i for i, vec in enumerate(vectors) if vec is None]
+        memory_hits = len(texts) - len(missing)
+
+        found: Dict[int, np.ndarray] = {}
+        if missing and self.disk is not None:
+            for i, vec in zip(missing, self.disk.get_many([texts[i] for i in missing])):
+                if vec is not None:
+                    found[i] = vec.astype(self.dtype)  # disk rows are float32
+        disk_hits = len(found)
+
+        # repeated texts in one batch are encoded once
+        to_encode: Dict[bytes, List[int]] = {}
+        for i in missing:
+            if i not in found:
+                to_encode.setdefault(keys[i], []).append(i)
+        if to_encode:
+            unique = [texts[positions[0]] for positions in to_encode.values()]
+            fresh = np.asarray(embed_fn(unique), dtype=self.dtype)
+            if self.disk is not None:
+                self.disk.put_many(unique, fresh)
+            for row, positions in enumerate(to_encode.values()):
+                vec = fresh[row].copy()  # detach from the batch matrix so eviction frees it
+                for i in positions:
+                    found[i] = vec
+
+        with self._lock:
+            for i, vec in found.items():
+                vectors[i] = vec
+                self._store(keys[i], vec, now)
+            self.hits += memory_hits
+            self.disk_hits += disk_hits
+            self.misses += len(texts) - memory_hits - disk_hits
+
+        return np.stack(vectors)
+
+    def _stats(self) -> Dict[str, float]:
+        return {**super()._stats(), "entries": len(self._entries), "memory_bytes": self.memory_bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.memory_bytes = 0
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
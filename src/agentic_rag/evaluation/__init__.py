@@ -1,6 +1,8 @@
 """Evaluation primitives."""
 
+from .checkpoint import EvaluationCheckpoint
 from .metrics import Metric, MetricSuite
 from .runner import BaseEvaluator
+from .sweep import AnnSweep, SweepResult
 
-__all__ = ["Metric", "MetricSuite", "BaseEvaluator"]
+__all__ = ["AnnSweep", "EvaluationCheckpoint", "Metric", "MetricSuite", "BaseEvaluator", "SweepResult"]
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Tuple
+
+import orjson
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Settings that change the scores an evaluation produces: models, retrieval
+# and reranker parameters, k values, metrics, chunking and the dataset.
+# Everything else (database, ingestion, cache sizes and paths, workers) only
+# changes how a run executes.
+_SCORING_SETTINGS = {
+    "dataset": True,
+    "vector_store": {
+        "implementation", "collection", "embedding_model", "embedding_dtype", "distance_metric",
+        "embedding_dim", "compression", "rescore_factor", "normalize_embeddings",
+        "hnsw_ef_search", "hnsw_iterative_scan", "ivfflat_probes",
+        "cross_encoder_model", "rerank_cascade_budget", "rerank_cascade_first_stage", "rerank_cascade_model",
+        "bm25_k1", "bm25_b", "hybrid_fusion", "hybrid_vector_weight", "hybrid_candidates",
+        "faiss_index_type", "faiss_hnsw_m", "faiss_hnsw_ef_construction", "faiss_ivf_lists",
+        "faiss_pq_m", "faiss_pq_bits", "faiss_nprobe", "faiss_train_size",
+        "top_k", "retrieval_k", "reranker_top_k",
+    },
+    "inference": {"backend", "quantization"},
+    "evaluation": {"recall_at_k", "mrr", "ndcg"},
+    "chunking": {"strategy", "tokenizer", "max_tokens", "overlap"},
+    "evaluator_class": True,
+    "retriever_class": True,
+    "reranker_class": True,
+}
+
+
+def run_key(*parts: object) -> str:
+    """Hash of the settings that change evaluation scores (models, k values, metrics)."""
+    raw = "|".join(str(p) for p in parts)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def settings_run_key(settings: Any) -> str:
+    """
+    run_key over the scoring settings, so a checkpoint resumes only under
+    the same models, retrieval parameters and metrics, whatever the
+    database, caches or worker counts. A new setting that changes scores
+    must be added to _SCORING_SETTINGS.
+    """
+    dump = settings.model_dump(mode="json", include=_SCORING_SETTINGS)
+    return run_key(orjson.dumps(dump, option=orjson.OPT_SORT_KEYS).decode("utf-8"))
+
+
+class EvaluationCheckpoint:
+    """
+    Append-only JSONL of per-query scores, one line per query:
+    {"run": <run key>, "query_id": ..., "scores": {...}}.
+
+    Lines written under a different run key belong to another configuration
+    and are discarded when the checkpoint is opened for resuming. A torn last
+    line from an interrupted write is truncated. Safe to share between threads.
+    """
+
+    def __init__(self, path: Path, key: str):
+        self.path = path
+        self.key = key
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict[str, float]]:
+        """Return {query_id: scores} already recorded for this run key."""
+        if not self.path.exists():
+            return {}
+
+        data = self.path.read_bytes()
+        if data and not data.endswith(b"\n"):
+            # drop the torn tail so the next append starts on a fresh line
+            data = data[:data.rfind(b"\n") + 1]
+            self.path.write_bytes(data)
+
+        done: Dict[str, Dict[str, float]] = {}
+        foreign = 0
+        for line in data.splitlines():
+            row = orjson.loads(line)
+            if row.get("run") != self.key:
+                foreign += 1
+                continue
+            done[row["query_id"]] = row["scores"]
+
+        if foreign:
+            logger.info(
+                f"Checkpoint {self.path} was written by a different evaluation configuration; starting over"
+            )
+            self.reset()
+            return {}
+        return done
+
+    def reset(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_bytes(b"")
+
+    def append(self, results: Iterable[Tuple[str, Dict[str, float]]]) -> None:
+        """Durably record scores for a finished batch of queries."""
+        payload = b"".join(
+            orjson.dumps({"run": self.key, "query_id": query_id, "scores": scores}) + b"\n"
+            for query_id, scores in results
+        )
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("ab") as f:
+                f.write(payload)
+                f.flush()
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import abc
-from typing import Iterable, Optional
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from agentic_rag.retrieval import Query, RetrievedChunk
 from collections import defaultdict
 from pathlib import Path
 
 from ..retrieval.base import BaseReranker, BaseRetriever
+from .checkpoint import EvaluationCheckpoint
 from .metrics import MetricSuite
 from ..utils.io import read_jsonl
 from ..settings import get_settings
@@ -15,6 +19,28 @@ import logging
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+QueryScores = Tuple[str, Dict[str, float]]
+
+# Set in each worker of a process pool by _init_worker
+_worker_evaluator: Optional["QrelsEvaluator"] = None
+
+
+def _init_worker(
+    retriever: BaseRetriever,
+    reranker: Optional[BaseReranker],
+    metrics: MetricSuite,
+    qrels: Dict[str, set],
+) -> None:
+    from ..storage.pool import close_pool
+
+    global _worker_evaluator
+    close_pool()  # never share an inherited pool's sockets; the worker opens its own on first use
+    _worker_evaluator = QrelsEvaluator._for_worker(retriever, reranker, metrics, qrels)
+
+
+def _evaluate_batch_in_worker(batch: List[Query]) -> List[QueryScores]:
+    return _worker_evaluator._evaluate_batch(batch)
+
 
 class BaseEvaluator(abc.ABC):
     @abc.abstractmethod
@@ -33,12 +59,19 @@ class QrelsEvaluator(BaseEvaluator):
         retriever: BaseRetriever, 
         reranker: Optional[BaseReranker] = None, 
         metrics: MetricSuite, 
-        data_dir: Path
+        data_dir: Path,
+        workers: Optional[int] = None,
+        executor: Optional[str] = None,
+        checkpoint: Optional[EvaluationCheckpoint] = None,
     ):
         self.retriever = retriever
         self.reranker = reranker
         self.metrics = metrics
         self.data_dir = data_dir
+        self.workers = workers or settings.evaluation.workers
+        self.executor = executor or settings.evaluation.executor
+        self.checkpoint = checkpoint
+        self.summary: Dict[str, float] = {}
         self.queries = self._load_queries()
         self.qrels = self._load_qrels()
         
@@ -47,6 +80,22 @@ class QrelsEvaluator(BaseEvaluator):
         else:
             logger.info("Evaluator initialized WITHOUT reranker")
 
+    @classmethod
+    def _for_worker(
+        cls,
+        retriever: BaseRetriever,
+        reranker: Optional[BaseReranker],
+        metrics: MetricSuite,
+        qrels: Dict[str, set],
+    ) -> "QrelsEvaluator":
+        """Evaluator holding only what _evaluate_batch needs (no queries, no checkpoint)."""
+        evaluator = cls.__new__(cls)
+        evaluator.retriever = retriever
+        evaluator.reranker = reranker
+        evaluator.metrics = metrics
+        evaluator.qrels = qrels
+        return evaluator
+
     def _load_queries(self):
         logger.info("Loading queries")
         queries = {}
@@ -80,72 +129,153 @@ class QrelsEvaluator(BaseEvaluator):
         return self.queries.values()
 
     def evaluate(self) -> None:
-        """Run evaluation with optional reranking."""
-        all_scores = defaultdict(list)
-        total_queries = len(self.queries)
-        
-        logger.info(f"Starting evaluation on {total_queries} queries")
+        """
+        Run evaluation with optional reranking.
+
+        Queries are split into batches of `evaluation.batch_size` and spread
+        over `workers` threads or processes. With a checkpoint, each finished
+        batch is appended to it and queries already recorded are skipped; the
+        checkpoint is cleared once every query is scored, so only an
+        interrupted run is ever resumed.
+        """
+        queries = list(self.iter_queries())
+        total_queries = len(queries)
+
+        done: Dict[str, Dict[str, float]] = {}
+        if self.checkpoint:
+            if settings.evaluation.resume:
+                done = self.checkpoint.load()
+            else:
+                self.checkpoint.reset()
+        pending = [q for q in queries if self._query_id(q) not in done]
+
+        logger.info(
+            f"Starting evaluation on {total_queries} queries",
+            extra={"resumed": len(done), "workers": self.workers, "executor": self.executor}
+        )
+
+        batch_size = settings.evaluation.batch_size
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+        results = dict(done)
+        for batch_results in self._run_batches(batches):
+            if self.checkpoint:
+                self.checkpoint.append(batch_results)
+            previous = len(results)
+            results.update(batch_results)
 
-        for idx, query in enumerate(self.iter_queries(), 1):
-            query_id = query.metadata.get("query_id") if query.metadata else None
-            
             # Progress logging every 100 queries
-            if idx % 100 == 0:
+            if len(results) // 100 > previous // 100:
                 logger.info(
-                    f"Progress: {idx}/{total_queries} queries evaluated",
-                    extra={"progress": idx, "total": total_queries}
+                    f"Progress: {len(results)}/{total_queries} queries evaluated",
+                    extra={"progress": len(results), "total": total_queries}
                 )
-            
-            # Step 1: Initial retrieval
-            # Retrieve more if using reranker, otherwise retrieve final amount
-            retrieval_k = settings.vector_store.retrieval_k if self.reranker else settings.vector_store.top_k
-            retrieved_chunks: list[RetrievedChunk] = self.retriever.search(
+
+        if self.checkpoint:
+            self.checkpoint.reset()
+
+        all_scores = defaultdict(list)
+        for query in queries:
+            for name, value in results[self._query_id(query)].items():
+                all_scores[name].append(value)
+
+        self._log_results(all_scores)
+
+    @staticmethod
+    def _query_id(query: Query) -> Optional[str]:
+        return query.metadata.get("query_id") if query.metadata else None
+
+    def _make_executor(self) -> Executor:
+        if self.executor == "process":
+            # Each process gets its own copy of the retriever, reranker and
+            # metrics and loads its own models; the checkpoint stays here.
+            # Spawned, not forked: the parent already runs pool threads and
+            # holds open connections.
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.retriever, self.reranker, self.metrics, self.qrels),
+            )
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="evaluate")
+
+    def _run_batches(self, batches: List[List[Query]]) -> Iterator[List[QueryScores]]:
+        """Yield per-query scores of each batch as it finishes (completion order)."""
+        if self.workers == 1 or len(batches) <= 1:
+            yield from map(self._evaluate_batch, batches)
+            return
+
+        pool = self._make_executor()
+        fn = _evaluate_batch_in_worker if self.executor == "process" else self._evaluate_batch
+        try:
+            futures = [pool.submit(fn, batch) for batch in batches]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def _evaluate_batch(self, batch: List[Query]) -> List[QueryScores]:
+        # Retrieve more if using reranker, otherwise retrieve final amount
+        retrieval_k = settings.vector_store.retrieval_k if self.reranker else settings.vector_store.top_k
+
+        # Step 1: Initial retrieval, one embedding pass and connection per batch
+        batch_results = self.retriever.search_many(batch, k=retrieval_k)
+
+        return [
+            (self._query_id(query), self._score_query(query, retrieved_chunks))
+            for query, retrieved_chunks in zip(batch, batch_results)
+        ]
+
+    def _score_query(self, query: Query, retrieved_chunks: list[RetrievedChunk]) -> dict[str, float]:
+        """Rerank (if configured) and score one query's retrieved candidates."""
+        query_id = query.metadata.get("query_id") if query.metadata else None
+
+        logger.debug(
+            f"Query {query_id}: Retrieved {len(retrieved_chunks)} candidates",
+            extra={"query_id": query_id, "retrieved_count": len(retrieved_chunks)}
+        )
+
+        # Step 2: Rerank if reranker is available
+        rerank_seconds = 0.0
+        if self.reranker:
+            start = time.perf_counter()
+            reranked_chunks = self.reranker.rerank(
                 query, 
-                k=retrieval_k
+                retrieved_chunks, 
+                k=settings.vector_store.reranker_top_k
             )
+            rerank_seconds = time.perf_counter() - start
             
             logger.debug(
-                f"Query {query_id}: Retrieved {len(retrieved_chunks)} candidates",
-                extra={"query_id": query_id, "retrieved_count": len(retrieved_chunks)}
+                f"Query {query_id}: Reranked to {len(reranked_chunks)} results",
+                extra={
+                    "query_id": query_id, 
+                    "reranked_count": len(reranked_chunks),
+                    "score_change": (
+                        reranked_chunks[0].score - retrieved_chunks[0].score
+                        if reranked_chunks and retrieved_chunks else 0
+                    )
+                }
             )
             
-            # Step 2: Rerank if reranker is available
-            if self.reranker:
-                reranked_chunks = self.reranker.rerank(
-                    query, 
-                    retrieved_chunks, 
-                    k=settings.vector_store.reranker_top_k
-                )
-                
-                logger.debug(
-                    f"Query {query_id}: Reranked to {len(reranked_chunks)} results",
-                    extra={
-                        "query_id": query_id, 
-                        "reranked_count": len(reranked_chunks),
-                        "score_change": (
-                            reranked_chunks[0].score - retrieved_chunks[0].score
-                            if reranked_chunks and retrieved_chunks else 0
-                        )
-                    }
-                )
-                
-                final_chunks = reranked_chunks
-            else:
-                final_chunks = retrieved_chunks[:settings.vector_store.top_k]
-            
-            # Step 3: Evaluate against qrels
-            relevant_qrels = self.qrels.get(query_id, set())
+            final_chunks = reranked_chunks
+        else:
+            final_chunks = retrieved_chunks[:settings.vector_store.top_k]
+        
+        # Step 3: Evaluate against qrels
+        relevant_qrels = self.qrels.get(query_id, set())
 
-            scores = self.metrics.evaluate(
-                query=query,
-                retrieved_chunks=final_chunks,
-                relevant_qrels=relevant_qrels,
-            )
+        scores = self.metrics.evaluate(
+            query=query,
+            retrieved_chunks=final_chunks,
+            relevant_qrels=relevant_qrels,
+        )
+        if self.reranker:
+            # wall-clock cost of reranking, to weigh against recall/MRR
+            scores["rerank_seconds"] = rerank_seconds
+        return scores
 
-            # Accumulate scores
-            for name, value in scores.items():
-                all_scores[name].append(value)
-        
+    def _log_results(self, all_scores: dict[str, list[float]]) -> None:
         # Log final results
         logger.info("=" * 50)
         logger.info("=== Evaluation Results ===")
@@ -158,11 +288,18 @@ class QrelsEvaluator(BaseEvaluator):
         else:
             logger.info("No reranker used")
         
-        logger.info(f"Chunking - overlap: {settings.chunking.overlap}, max_tokens: {settings.chunking.max_tokens}")
+        logger.info(f"Chunking - strategy: {settings.chunking.strategy}, overlap: {settings.chunking.overlap}, max_tokens: {settings.chunking.max_tokens}")
         logger.info("-" * 50)
         
+        self.summary = {}
         for name, values in all_scores.items():
             mean = sum(values) / len(values) if values else 0.0
+            self.summary[name] = mean
             logger.info(f"{name}: {mean:.4f}")
+
+        if "rerank_seconds" in all_scores:
+            total = sum(all_scores["rerank_seconds"])
+            self.summary["rerank_seconds_total"] = total
+            logger.info(f"Reranker time: {total:.2f}s total (cached pairs cost ~0s)")
         
         logger.info("=" * 50)
\ No newline at end of file
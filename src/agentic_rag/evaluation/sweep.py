@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from ..retrieval import AnnSearchParams, Query
+from ..retrieval.base import BaseRetriever
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class SweepResult:
+    params: AnnSearchParams
+    recall: float  # mean overlap of the top-k with exact (index-free) search
+    p50_ms: float
+    p99_ms: float
+    mean_ms: float
+
+    def to_row(self) -> dict:
+        return {**asdict(self.params), **{k: v for k, v in asdict(self).items() if k != "params"}}
+
+
+class AnnSweep:
+    """
+    Measure recall@k against exact search and search latency for a list of
+    ANN parameter settings, so ef_search & co. can be picked from data.
+    Latency covers the whole `retriever.search` call.
+    """
+
+    def __init__(self, retriever: BaseRetriever, queries: Sequence[Query], *, k: int):
+        if not queries:
+            raise ValueError("AnnSweep needs at least one query")
+        self.retriever = retriever
+        self.queries = list(queries)
+        self.k = k
+
+    def _ids(self, query: Query, params: AnnSearchParams) -> list[str]:
+        return [c.chunk_id for c in self.retriever.search(replace(query, ann=params), k=self.k)]
+
+    def run(self, settings: Iterable[AnnSearchParams]) -> list[SweepResult]:
+        logger.info(f"Computing exact top-{self.k} for {len(self.queries)} queries")
+        exact = [set(self._ids(q, AnnSearchParams(exact=True))) for q in self.queries]
+
+        results = []
+        for params in settings:
+            self._ids(self.queries[0], params)  # warm caches/connections before timing
+            latencies, recalls = [], []
+            for query, truth in zip(self.queries, exact):
+                start = time.perf_counter()
+                ids = self._ids(query, params)
+                latencies.append((time.perf_counter() - start) * 1000)
+                recalls.append(len(truth.intersection(ids)) / len(truth) if truth else 1.0)
+
+            result = SweepResult(
+                params=params,
+                recall=float(np.mean(recalls)),
+                p50_ms=float(np.percentile(latencies, 50)),
+                p99_ms=float(np.percentile(latencies, 99)),
+                mean_ms=float(np.mean(latencies)),
+            )
+            logger.info(
+                f"{params}: recall@{self.k}={result.recall:.4f} "
+                f"p50={result.p50_ms:.2f}ms p99={result.p99_ms:.2f}ms",
+                extra=result.to_row(),
+            )
+            results.append(result)
+        return results
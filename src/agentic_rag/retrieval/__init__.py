@@ -1,6 +1,6 @@
 """Retrieval interfaces."""
 
 from .base import BaseReranker, BaseRetriever
-from .schemas import Query, RetrievedChunk
+from .schemas import AnnSearchParams, Query, RetrievedChunk
 
-__all__ = ["BaseRetriever", "BaseReranker", "Query", "RetrievedChunk"]
+__all__ = ["AnnSearchParams", "BaseRetriever", "BaseReranker", "Query", "RetrievedChunk"]
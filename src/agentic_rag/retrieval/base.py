@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import abc
-from typing import Iterable, Sequence
+import asyncio
+from typing import Any, Dict, Iterable, List, Sequence
 
 from .schemas import Query, RetrievedChunk
 
@@ -11,8 +12,38 @@ class BaseRetriever(abc.ABC):
     def search(self, query: Query, *, k: int = 5) -> Sequence[RetrievedChunk]:
         """Return the top-k retrieved chunks."""
 
+    def search_many(self, queries: Sequence[Query], *, k: int = 5) -> List[Sequence[RetrievedChunk]]:
+        """Return the top-k chunks for each query, in input order. Override to batch the work."""
+        return [self.search(query, k=k) for query in queries]
+
+    async def asearch(self, query: Query, *, k: int = 5) -> Sequence[RetrievedChunk]:
+        """Async `search`; runs it in a worker thread unless overridden with native async I/O."""
+        return await asyncio.to_thread(self.search, query, k=k)
+
+    async def asearch_many(self, queries: Sequence[Query], *, k: int = 5) -> List[Sequence[RetrievedChunk]]:
+        """Async `search_many`; runs it in a worker thread unless overridden."""
+        return await asyncio.to_thread(self.search_many, queries, k=k)
+
+    def warmup(self) -> None:
+        """Optional startup hook (load models, verify indexes) run before serving queries."""
+
+    def stats(self) -> Dict[str, Any]:
+        """Runtime counters (cache hit rates, memory use) for logging; empty by default."""
+        return {}
+
+    def footprint(self) -> Dict[str, int]:
+        """Index size next to the size of the same vectors as float32; empty when not applicable."""
+        return {}
+
 
 class BaseReranker(abc.ABC):
     @abc.abstractmethod
     def rerank(self, query: Query, candidates: Iterable[RetrievedChunk], *, k: int = 5) -> Sequence[RetrievedChunk]:
         """Rerank retrieved candidates and return k best."""
+
+    def warmup(self) -> None:
+        """Optional startup hook (load models) run before serving queries."""
+
+    def stats(self) -> Dict[str, Any]:
+        """Runtime counters (cache hit rates) for logging; empty by default."""
+        return {}
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+Pairs = List[Any]  # (query, passage) pairs for rerankers, or any per-item request
+
+
+class MicroBatcher:
+    """
+    Coalesces `predict` calls from concurrent callers into larger batches.
+
+    The first pending request opens a batch; requests arriving within
+    `max_wait_ms` join it until it holds `max_batch_size` pairs. One
+    `predict_fn` call scores the whole batch and each caller gets back its
+    own slice. A single request larger than `max_batch_size` runs alone.
+    The worker thread starts on first use.
+
+    `predict_fn` may return any sliceable sequence aligned with its input
+    (scores, embeddings, result lists), so the same batcher serves
+    cross-encoder pairs and whole retrieval requests.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[Pairs], Sequence[Any]],
+        *,
+        max_batch_size: int = 256,
+        max_wait_ms: float = 5.0,
+        name: str = "rerank-batcher",
+    ):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be positive, got {max_batch_size}")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self.batches = 0
+        self.pairs = 0
+        self._queue: "queue.Queue[Optional[Tuple[Pairs, Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._carry: Optional[Tuple[Pairs, Future]] = None  # overflow request that opens the next batch
+
+    def predict(self, pairs: Pairs) -> np.ndarray:
+        """Score `pairs`, possibly together with other callers' pairs; blocks until done."""
+        if not pairs:
+            return np.empty(0, dtype=np.float32)
+        return self.submit(pairs).result()
+
+    def submit(self, pairs: Pairs) -> Future:
+        """Queue `pairs` and return a Future for their slice (wrap with asyncio.wrap_future in async code)."""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((pairs, future))
+        return future
+
+    def pending(self) -> int:
+        """Requests waiting for a batch (queue depth), not counting the batch being scored."""
+        return self._queue.qsize() + (self._carry is not None)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _collect(self, first: Tuple[Pairs, Future]) -> Tuple[List[Tuple[Pairs, Future]], bool]:
+        """Gather requests for one batch; the flag is True when close() was requested."""
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            if size + len(item[0]) > self.max_batch_size:
+                self._carry = item  # keep batches bounded
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            item, self._carry = self._carry or self._queue.get(), None
+            if item is None:
+                return
+            batch, closing = self._collect(item)
+
+            pairs = [pair for request, _ in batch for pair in request]
+            try:
+                scores = self.predict_fn(pairs)
+            except BaseException as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+            else:
+                self.batches += 1
+                self.pairs += len(pairs)
+                offset = 0
+                for request, future in batch:
+                    future.set_result(scores[offset:offset + len(request)])
+                    offset += len(request)
+            if closing:
+                return
+
+    def mean_batch_size(self) -> float:
+        return self.pairs / self.batches if self.batches else 0.0
+
+    def close(self) -> None:
+        """Stop the worker after it drains requests already queued."""
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+
+class AsyncMicroBatcher:
+    """
+    Event-loop counterpart of MicroBatcher for one item per request: items
+    submitted within `max_wait_ms` of each other (up to `max_batch_size`)
+    go to a single `batch_fn` call, which returns one result per item.
+    Batches are dispatched as tasks, so a slow batch does not hold back the
+    next one; the collector task starts on first use.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Awaitable[Sequence[Any]]],
+        *,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+    ):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be positive, got {max_batch_size}")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._dispatched: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        if self._collector is None:
+            self._queue = asyncio.Queue()
+            self._collector = asyncio.create_task(self._collect())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    def pending(self) -> int:
+        """Items waiting for a batch (queue depth)."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatched.add(task)
+            task.add_done_callback(self._dispatched.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            results = await self.batch_fn([item for item, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():  # the caller may have been cancelled
+                future.set_result(result)
+
+    def mean_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    async def close(self) -> None:
+        """Stop collecting and wait for batches already dispatched."""
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+        if self._dispatched:
+            await asyncio.gather(*self._dispatched, return_exceptions=True)
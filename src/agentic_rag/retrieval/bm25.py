@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import re
+import shutil
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+import orjson
+
+from ..settings import get_settings
+from ..utils.io import atomic_replace_dir
+from .chunk_store import ChunkStore, ChunkStoreWriter
+from .schemas import RetrievedChunk
+import logging
+
+logger = logging.getLogger(__name__)
+
+BM25_FORMAT_VERSION = 1
+
+# Keeps identifiers like wp_enqueue_scripts, the_content or 404 as single terms.
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25IndexBuilder:
+    """
+    Accumulates postings chunk by chunk and writes a BM25Index directory:
+
+        meta.json          document count, average length, format version
+        vocab.json         term -> term id
+        term_offsets.npy   int64, postings of term t are [offsets[t], offsets[t+1])
+        postings_doc.npy   int32 document ids, grouped by term
+        postings_tf.npy    uint16 term frequencies aligned with postings_doc
+        doc_lengths.npy    int32 tokens per document
+        docs.bin, doc_offsets.npy   chunk sidecar (see ChunkStore)
+
+    Every array is loaded memory-mapped, so opening the index costs only
+    the vocabulary and pages are read on demand. Chunk records are streamed
+    to the sidecar in `<path>.tmp` as they are added, so only the postings
+    are held in memory; `write()` moves the finished index into `path`.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        self._tmp.mkdir(parents=True)
+        self._store = ChunkStoreWriter(self._tmp)
+        self._vocab: Dict[str, int] = {}
+        self._postings: List[Tuple[array, array]] = []
+        self._doc_lengths = array("i")
+
+    def add(self, chunk_id: str, text: str, metadata: Optional[Mapping[str, Any]] = None) -> None:
+        doc_id = len(self._doc_lengths)
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                term_id = self._vocab[term] = len(self._postings)
+                self._postings.append((array("i"), array("H")))
+            docs, tfs = self._postings[term_id]
+            docs.append(doc_id)
+            tfs.append(min(tf, 0xFFFF))
+        self._doc_lengths.append(len(tokens))
+        self._store.add(chunk_id, text, metadata)
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def write(self) -> None:
+        """Write the index to `path`, replacing any previous index only once complete."""
+        path, tmp = self.path, self._tmp
+        lengths = np.frombuffer(self._doc_lengths, dtype=np.int32) if len(self) else np.zeros(0, np.int32)
+        offsets = np.zeros(len(self._postings) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(docs) for docs, _ in self._postings])
+        postings_doc = np.concatenate(
+            [np.frombuffer(docs, dtype=np.int32) for docs, _ in self._postings]
+        ) if self._postings else np.zeros(0, np.int32)
+        postings_tf = np.concatenate(
+            [np.frombuffer(tfs, dtype=np.uint16) for _, tfs in self._postings]
+        ) if self._postings else np.zeros(0, np.uint16)
+
+        np.save(tmp / "term_offsets.npy", offsets)
+        np.save(tmp / "postings_doc.npy", postings_doc)
+        np.save(tmp / "postings_tf.npy", postings_tf)
+        np.save(tmp / "doc_lengths.npy", lengths)
+        self._store.close()
+        (tmp / "vocab.json").write_bytes(orjson.dumps(self._vocab))
+        (tmp / "meta.json").write_bytes(orjson.dumps({
+            "version": BM25_FORMAT_VERSION,
+            "documents": len(self),
+            "avg_doc_length": float(lengths.mean()) if len(self) else 0.0,
+        }))
+
+        atomic_replace_dir(tmp, path)
+        logger.info(
+            f"Wrote BM25 index with {len(self)} documents and {len(self._vocab)} terms to {path}"
+        )
+
+
+class BM25Index:
+    """Read-only, memory-mapped BM25 index written by BM25IndexBuilder."""
+
+    def __init__(self, path: Path, *, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._open()
+
+    def _open(self) -> None:
+        meta = orjson.loads((self.path / "meta.json").read_bytes())
+        if meta["version"] != BM25_FORMAT_VERSION:
+            raise ValueError(
+                f"BM25 index at {self.path} has format {meta['version']}, "
+                f"expected {BM25_FORMAT_VERSION}; re-run ingestion"
+            )
+        self.documents: int = meta["documents"]
+        self.avg_doc_length: float = meta["avg_doc_length"] or 1.0
+        self.vocab: Dict[str, int] = orjson.loads((self.path / "vocab.json").read_bytes())
+
+        def load(name: str) -> np.ndarray:
+            return np.load(self.path / name, mmap_mode="r")
+
+        self.term_offsets = load("term_offsets.npy")
+        self.postings_doc = load("postings_doc.npy")
+        self.postings_tf = load("postings_tf.npy")
+        self.doc_lengths = load("doc_lengths.npy")
+        self.chunks = ChunkStore(self.path)
+
+        # Per-document BM25 length normalization, precomputed once
+        self._length_norm = (
+            self.k1 * (1 - self.b + self.b * np.asarray(self.doc_lengths, dtype=np.float32) / self.avg_doc_length)
+        )
+
+    def __getstate__(self) -> dict:
+        # memory maps are re-opened rather than copied into the pickle
+        return {"path": self.path, "k1": self.k1, "b": self.b}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self) -> int:
+        return self.documents
+
+    def search(self, text: str, k: int) -> List[Tuple[int, float]]:
+        """Return up to k (doc id, BM25 score) pairs, best first."""
+        term_ids = {self.vocab[t] for t in tokenize(text) if t in self.vocab}
+        if not term_ids or k <= 0:
+            return []
+
+        doc_parts, score_parts = [], []
+        for term_id in term_ids:
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            docs = self.postings_doc[start:end]
+            tf = self.postings_tf[start:end].astype(np.float32)
+            df = end - start
+            idf = np.log1p((self.documents - df + 0.5) / (df + 0.5))
+            doc_parts.append(docs)
+            score_parts.append(idf * tf * (self.k1 + 1) / (tf + self._length_norm[docs]))
+
+        docs = np.concatenate(doc_parts)
+        unique_docs, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(unique_docs[i]), float(scores[i])) for i in top]
+
+    def search_chunks(self, text: str, k: int) -> List[RetrievedChunk]:
+        return [self.chunks.chunk(doc_id, score) for doc_id, score in self.search(text, k)]
+
+
+def bm25_index_path() -> Path:
+    settings = get_settings()
+    return settings.vector_store.bm25_index_dir or settings.processed_data_dir / "bm25"
+
+
+def build_bm25_index(rows: Iterable[Tuple[str, str, Any]], path: Path) -> int:
+    """Index (chunk_id, text, metadata) rows into `path`; returns the document count."""
+    builder = BM25IndexBuilder(path)
+    for chunk_id, text, metadata in rows:
+        builder.add(chunk_id, text, metadata)
+    builder.write()
+    return len(builder)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Mapping, Optional, Tuple
+
+import numpy as np
+import orjson
+
+from .schemas import RetrievedChunk
+import logging
+
+logger = logging.getLogger(__name__)
+
+_DATA = "docs.bin"
+_OFFSETS = "doc_offsets.npy"
+
+
+class ChunkStoreWriter:
+    """
+    Streams (chunk_id, text, metadata) records into `directory`/docs.bin;
+    `close()` writes the int64 offsets that make records addressable by
+    position. Used as the sidecar of local indexes (BM25, FAISS).
+    """
+
+    def __init__(self, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self._file = (directory / _DATA).open("wb")
+        self._offsets = [0]
+
+    def add(self, chunk_id: str, text: str, metadata: Optional[Mapping[str, Any]] = None) -> None:
+        record = orjson.dumps([chunk_id, text, metadata])
+        self._file.write(record)
+        self._offsets.append(self._offsets[-1] + len(record))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def close(self) -> None:
+        self._file.close()
+        np.save(self.directory / _OFFSETS, np.asarray(self._offsets, dtype=np.int64))
+
+
+class ChunkStore:
+    """Memory-mapped reader for a ChunkStoreWriter directory."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.offsets = np.load(directory / _OFFSETS, mmap_mode="r")
+        size = int(self.offsets[-1])
+        self._data = np.memmap(directory / _DATA, dtype=np.uint8, mode="r") if size else None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get(self, position: int) -> Tuple[str, str, Any]:
+        """Return (chunk_id, text, metadata) of the record at `position`."""
+        start, end = self.offsets[position], self.offsets[position + 1]
+        chunk_id, text, metadata = orjson.loads(self._data[start:end].tobytes())
+        return chunk_id, text, metadata
+
+    def chunk(self, position: int, score: float) -> RetrievedChunk:
+        chunk_id, text, metadata = self.get(position)
+        return RetrievedChunk(chunk_id=chunk_id, text=text, score=score, metadata=metadata)
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import shutil
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+
+from agentic_rag.embeddings.model import embed_batch, embedding_cache_key
+from agentic_rag.embeddings.query_cache import QueryEmbeddingCache
+from ..settings import get_settings
+from ..utils.io import atomic_replace_dir
+from .base import BaseRetriever
+from .chunk_store import ChunkStore, ChunkStoreWriter
+from .schemas import AnnSearchParams, Query, RetrievedChunk
+import logging
+
+logger = logging.getLogger(__name__)
+
+FAISS_FORMAT_VERSION = 1
+_INDEX_FILE = "index.faiss"
+_VECTORS_FILE = "vectors.f32"  # full-precision copy for re-scoring IVF-PQ shortlists
+_ADD_BATCH = 10_000
+
+
+def faiss_index_path() -> Path:
+    settings = get_settings()
+    return settings.vector_store.faiss_index_dir or settings.processed_data_dir / "faiss"
+
+
+def _faiss_metric(faiss, metric: str) -> int:
+    # cosine is served as inner product over unit vectors
+    return faiss.METRIC_L2 if metric == "l2" else faiss.METRIC_INNER_PRODUCT
+
+
+def to_distances(metric: str, raw: np.ndarray) -> np.ndarray:
+    """Convert FAISS scores to the pgvector operator values (lower = closer)."""
+    if metric == "cosine":
+        return 1.0 - raw
+    if metric == "l2":
+        return np.sqrt(np.maximum(raw, 0.0))  # FAISS reports squared L2
+    return -raw  # <#> is the negative inner product
+
+
+def _prepare(vectors: np.ndarray, metric: str) -> np.ndarray:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if metric == "cosine":
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+    return vectors
+
+
+def _new_index(faiss, kind: str, dim: int, metric: str):
+    config = get_settings().vector_store
+    faiss_metric = _faiss_metric(faiss, metric)
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config.faiss_hnsw_m, faiss_metric)
+        index.hnsw.efConstruction = config.faiss_hnsw_ef_construction
+        return index
+    quantizer = faiss.IndexFlat(dim, faiss_metric)
+    return faiss.IndexIVFPQ(quantizer, dim, config.faiss_ivf_lists, config.faiss_pq_m, config.faiss_pq_bits, faiss_metric)
+
+
+def build_faiss_index(
+    rows: Iterable[Tuple[str, str, Any, np.ndarray]],
+    path: Path,
+    *,
+    kind: Optional[str] = None,
+    metric: Optional[str] = None,
+) -> int:
+    """
+    Build an HNSW or IVF-PQ index from (chunk_id, text, metadata, embedding)
+    rows and write it with its chunk sidecar to `path`. IVF-PQ is trained on
+    the first `faiss_train_size` vectors and keeps a float32 copy of every
+    vector on disk, which is memory-mapped at query time to re-score the
+    PQ shortlist. Returns the number of vectors.
+    """
+    import faiss
+
+    config = get_settings().vector_store
+    kind = kind or config.faiss_index_type
+    metric = metric or config.distance_metric
+
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    store = ChunkStoreWriter(tmp)
+    floats = (tmp / _VECTORS_FILE).open("wb") if kind == "ivfpq" else None
+    index = None
+    pending: List[np.ndarray] = []
+    rows = iter(rows)
+
+    def flush(vectors: List[np.ndarray]) -> None:
+        if vectors:
+            prepared = _prepare(np.stack(vectors), metric)
+            index.add(prepared)
+            if floats is not None:
+                floats.write(prepared.tobytes())
+
+    while True:
+        batch = list(islice(rows, _ADD_BATCH))
+        if not batch:
+            break
+        for chunk_id, text, metadata, embedding in batch:
+            store.add(chunk_id, text, metadata)
+            pending.append(np.asarray(embedding, dtype=np.float32))
+        if index is None:
+            index = _new_index(faiss, kind, pending[0].shape[0], metric)
+        if not index.is_trained:
+            if len(pending) < config.faiss_train_size:
+                continue  # keep buffering training vectors
+            logger.info(f"Training IVF-PQ on {len(pending)} vectors")
+            index.train(_prepare(np.stack(pending), metric))
+        flush(pending)
+        pending = []
+
+    if index is None:
+        raise ValueError("No embeddings to index; run ingestion first")
+    if not index.is_trained:
+        if len(pending) < config.faiss_ivf_lists:
+            raise ValueError(
+                f"IVF-PQ needs at least faiss_ivf_lists={config.faiss_ivf_lists} vectors, got {len(pending)}"
+            )
+        index.train(_prepare(np.stack(pending), metric))
+    flush(pending)
+    store.close()
+    if floats is not None:
+        floats.close()
+
+    faiss.write_index(index, str(tmp / _INDEX_FILE))
+    (tmp / "meta.json").write_bytes(orjson.dumps({
+        "version": FAISS_FORMAT_VERSION,
+        "kind": kind,
+        "metric": metric,
+        "dim": index.d,
+        "count": index.ntotal,
+        "embedding_key": embedding_cache_key(),
+    }))
+
+    atomic_replace_dir(tmp, path)
+    logger.info(f"Wrote FAISS {kind} index with {index.ntotal} vectors to {path}")
+    return index.ntotal
+
+
+def export_faiss_index(path: Optional[Path] = None, *, kind: Optional[str] = None) -> int:
+    """Export the embeddings stored in Postgres into a local FAISS index."""
+    from ..storage.db import iter_documents
+    from ..storage.pool import pooled_connection
+
+    path = path or faiss_index_path()
+    with pooled_connection() as conn:
+        rows = iter_documents(conn, columns="chunk_id, content, metadata, embedding", binary=True)
+        return build_faiss_index(rows, path, kind=kind)
+
+
+class FaissRetriever(BaseRetriever):
+    """
+    Serves ANN lookups from a local FAISS index written by `export-faiss`,
+    with no database round-trip. The index is memory-mapped when the index
+    type allows it; chunk text and metadata come from the mmapped sidecar.
+    Scores use the same convention as PgVectorRetriever (lower = closer).
+    IVF-PQ shortlists of k * rescore_factor are re-ranked by exact distance.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path or faiss_index_path()
+        self.query_cache = QueryEmbeddingCache.from_settings()
+        self._index = None
+        self._chunks: Optional[ChunkStore] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._meta: Dict[str, Any] = {}
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.update(_index=None, _chunks=None, _vectors=None)  # reopened lazily in each process
+        return state
+
+    def _load(self):
+        if self._index is not None:
+            return self._index
+        import faiss
+
+        meta = orjson.loads((self.path / "meta.json").read_bytes())
+        if meta["version"] != FAISS_FORMAT_VERSION:
+            raise ValueError(f"FAISS index at {self.path} has format {meta['version']}; re-run export-faiss")
+        if meta["embedding_key"] != embedding_cache_key():
+            raise ValueError(
+                f"FAISS index at {self.path} was built with {meta['embedding_key']}, "
+                f"but queries use {embedding_cache_key()}; re-run export-faiss"
+            )
+        index_file = str(self.path / _INDEX_FILE)
+        try:
+            index = faiss.read_index(index_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            logger.info("FAISS index type cannot be memory-mapped; loading it into memory")
+            index = faiss.read_index(index_file)
+        self._meta = meta
+        self._chunks = ChunkStore(self.path)
+        if (self.path / _VECTORS_FILE).exists():
+            self._vectors = np.memmap(self.path / _VECTORS_FILE, dtype=np.float32, mode="r").reshape(-1, meta["dim"])
+        self._index = index
+        logger.info(f"Loaded FAISS {meta['kind']} index with {index.ntotal} vectors from {self.path}")
+        return index
+
+    def warmup(self) -> None:
+        self._load()
+
+    def stats(self) -> Dict[str, object]:
+        return {"query_cache": self.query_cache.stats()}
+
+    def footprint(self) -> Dict[str, int]:
+        self._load()
+        vectors, dim = self._meta["count"], self._meta["dim"]
+        return {
+            "vectors": vectors,
+            "index_bytes": (self.path / _INDEX_FILE).stat().st_size,
+            "float32_bytes": vectors * dim * 4,
+        }
+
+    def search_params(self, params: Optional[AnnSearchParams], k: int) -> Tuple[str, int]:
+        """Resolve per-query overrides to ("efSearch" | "nprobe", value) for this index."""
+        index = self._load()
+        config = get_settings().vector_store
+        params = params or AnnSearchParams()
+        if self._meta["kind"] == "hnsw":
+            # exact is best effort: a very wide beam over the graph
+            ef = min(index.ntotal, 10_000) if params.exact else (
+                params.ef_search or config.hnsw_ef_search or min(max(k, 40), 1000)
+            )
+            return "efSearch", max(ef, k)
+        return "nprobe", index.nlist if params.exact else (params.probes or config.faiss_nprobe)
+
+    def _faiss_params(self, resolved: Tuple[str, int]):
+        import faiss
+
+        name, value = resolved
+        if name == "efSearch":
+            return faiss.SearchParametersHNSW(efSearch=value)
+        return faiss.SearchParametersIVF(nprobe=value)
+
+    def _search_vectors(
+        self, vectors: np.ndarray, params: Tuple[str, int], k: int, rescore_factor: int = 1
+    ) -> List[List[RetrievedChunk]]:
+        index = self._load()
+        metric = self._meta["metric"]
+        vectors = _prepare(vectors, metric)
+        depth = k * rescore_factor if self._vectors is not None else k
+        raw, ids = index.search(vectors, depth, params=self._faiss_params(params))
+        if depth > k:
+            raw, ids = self._rescore(vectors, ids, k)
+        distances = to_distances(metric, raw)
+        return [
+            [self._chunks.chunk(int(i), float(d)) for i, d in zip(row_ids, row_d) if i >= 0]
+            for row_ids, row_d in zip(ids, distances)
+        ]
+
+    def _rescore(self, vectors: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Re-rank PQ shortlists by exact distance to the memory-mapped float vectors."""
+        l2 = self._meta["metric"] == "l2"
+        raw = np.full((len(ids), k), np.inf if l2 else -np.inf, dtype=np.float32)
+        best = np.full((len(ids), k), -1, dtype=np.int64)
+        for row, (query, candidates) in enumerate(zip(vectors, ids)):
+            candidates = np.sort(candidates[candidates >= 0])  # ascending ids read the mmap in order
+            stored = self._vectors[candidates]
+            scores = ((stored - query) ** 2).sum(axis=1) if l2 else stored @ query
+            order = np.argsort(scores if l2 else -scores, kind="stable")[:k]
+            raw[row, :len(order)] = scores[order]
+            best[row, :len(order)] = candidates[order]
+        return raw, best
+
+    def _rescore_factor(self, params: Optional[AnnSearchParams]) -> int:
+        return (params and params.rescore_factor) or get_settings().vector_store.rescore_factor
+
+    def search(self, query: Query, *, k: int = 5) -> Sequence[RetrievedChunk]:
+        vector = self.query_cache.embed([query.text], embed_batch)
+        return self._search_vectors(
+            vector, self.search_params(query.ann, k), k, self._rescore_factor(query.ann)
+        )[0]
+
+    def search_many(self, queries: Sequence[Query], *, k: int = 5) -> List[Sequence[RetrievedChunk]]:
+        """One batched encode, then one FAISS call per distinct set of search parameters."""
+        queries = list(queries)
+        if not queries:
+            return []
+        vectors = self.query_cache.embed([q.text for q in queries], embed_batch)
+
+        groups: Dict[Tuple[Tuple[str, int], int], List[int]] = {}
+        for i, query in enumerate(queries):
+            key = (self.search_params(query.ann, k), self._rescore_factor(query.ann))
+            groups.setdefault(key, []).append(i)
+
+        results: List[Sequence[RetrievedChunk]] = [[] for _ in queries]
+        for (params, rescore_factor), indices in groups.items():
+            hits = self._search_vectors(vectors[indices], params, k, rescore_factor)
+            for i, chunk_hits in zip(indices, hits):
+                results[i] = chunk_hits
+        return results
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence
+
+from .base import BaseRetriever
+from .bm25 import BM25Index, bm25_index_path
+from .retriever import PgVectorRetriever
+from .schemas import Query, RetrievedChunk
+from ..settings import get_settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Reciprocal rank fusion constant (Cormack et al.)
+_RRF_K = 60
+
+
+def rrf_score(rank):
+    """Reciprocal rank fusion term 1 / (60 + rank) of a 0-based rank (or array of ranks)."""
+    return 1 / (_RRF_K + rank)
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Sequence[Sequence[RetrievedChunk]], k: int
+) -> List[RetrievedChunk]:
+    """Fuse best-first lists by summing rrf_score(rank); score is the fused value (higher = better)."""
+    fused: Dict[str, float] = {}
+    chunks: Dict[str, RetrievedChunk] = {}
+    for ranked in ranked_lists:
+        for rank, chunk in enumerate(ranked):
+            fused[chunk.chunk_id] = fused.get(chunk.chunk_id, 0.0) + rrf_score(rank)
+            chunks.setdefault(chunk.chunk_id, chunk)
+    return _top(fused, chunks, k)
+
+
+def weighted_fusion(
+    vector_hits: Sequence[RetrievedChunk],
+    lexical_hits: Sequence[RetrievedChunk],
+    k: int,
+    *,
+    vector_weight: float,
+) -> List[RetrievedChunk]:
+    """
+    Weighted sum of min-max normalized scores. Vector scores are distances
+    (lower = closer) and BM25 scores similarities, so vector scores are
+    flipped before normalizing. A chunk missing from one list gets 0 there;
+    a list with a single hit or all scores tied has no spread to normalize
+    and gives each of its hits 1.0.
+    """
+    fused: Dict[str, float] = {}
+    chunks: Dict[str, RetrievedChunk] = {}
+    for hits, weight, flip in ((vector_hits, vector_weight, True), (lexical_hits, 1 - vector_weight, False)):
+        if not hits:
+            continue
+        scores = [-h.score if flip else h.score for h in hits]
+        low, high = min(scores), max(scores)
+        span = high - low
+        for hit, score in zip(hits, scores):
+            normalized = (score - low) / span if span else 1.0
+            fused[hit.chunk_id] = fused.get(hit.chunk_id, 0.0) + weight * normalized
+            chunks.setdefault(hit.chunk_id, hit)
+    return _top(fused, chunks, k)
+
+
+def _top(fused: Dict[str, float], chunks: Dict[str, RetrievedChunk], k: int) -> List[RetrievedChunk]:
+    best = sorted(fused, key=fused.get, reverse=True)[:k]
+    return [
+        RetrievedChunk(
+            chunk_id=chunk_id,
+            text=chunks[chunk_id].text,
+            score=fused[chunk_id],
+            metadata=chunks[chunk_id].metadata,
+        )
+        for chunk_id in best
+    ]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Fuses PgVectorRetriever results with an in-process BM25 index, which
+    catches exact identifiers (function and hook names, error strings) that
+    embeddings miss. The index is written at ingest time
+    (ingestion.build_bm25_index) and memory-mapped on first use.
+    Fused scores are higher-is-better.
+    """
+
+    def __init__(self, vector: Optional[BaseRetriever] = None, index: Optional[BM25Index] = None) -> None:
+        self.vector = vector or PgVectorRetriever()
+        self._index = index
+
+    @property
+    def index(self) -> BM25Index:
+        if self._index is None:
+            config = get_settings().vector_store
+            path = bm25_index_path()
+            if not (path / "meta.json").exists():
+                raise FileNotFoundError(
+                    f"No BM25 index at {path}; run ingestion with ingestion.build_bm25_index=true"
+                )
+            self._index = BM25Index(path, k1=config.bm25_k1, b=config.bm25_b)
+            logger.info(f"Loaded BM25 index with {len(self._index)} documents from {path}")
+        return self._index
+
+    def warmup(self) -> None:
+        self.vector.warmup()
+        _ = self.index
+
+    def stats(self) -> Dict[str, Any]:
+        return self.vector.stats()
+
+    def footprint(self) -> Dict[str, int]:
+        return self.vector.footprint()
+
+    def _fuse(self, vector_hits: Sequence[RetrievedChunk], query: Query, k: int, depth: int) -> List[RetrievedChunk]:
+        lexical_hits = self.index.search_chunks(query.text, depth)
+        config = get_settings().vector_store
+        if config.hybrid_fusion == "weighted":
+            return weighted_fusion(vector_hits, lexical_hits, k, vector_weight=config.hybrid_vector_weight)
+        return reciprocal_rank_fusion([vector_hits, lexical_hits], k)
+
+    def _depth(self, k: int) -> int:
+        return max(get_settings().vector_store.hybrid_candidates or k, k)
+
+    def search(self, query: Query, *, k: int = 5) -> Sequence[RetrievedChunk]:
+        depth = self._depth(k)
+        return self._fuse(self.vector.search(query, k=depth), query, k, depth)
+
+    def search_many(self, queries: Sequence[Query], *, k: int = 5) -> List[Sequence[RetrievedChunk]]:
+        depth = self._depth(k)
+        vector_results = self.vector.search_many(queries, k=depth)
+        return [self._fuse(hits, query, k, depth) for query, hits in zip(queries, vector_results)]
+
+    async def asearch(self, query: Query, *, k: int = 5) -> Sequence[RetrievedChunk]:
+        depth = self._depth(k)
+        vector_hits = await self.vector.asearch(query, k=depth)
+        return await asyncio.to_thread(self._fuse, vector_hits, query, k, depth)
+
+    async def asearch_many(self, queries: Sequence[Query], *, k: int = 5) -> List[Sequence[RetrievedChunk]]:
+        depth = self._depth(k)
+        vector_results = await self.vector.asearch_many(queries, k=depth)
+        return await asyncio.to_thread(
+            lambda: [self._fuse(hits, query, k, depth) for query, hits in zip(queries, vector_results)]
+        )
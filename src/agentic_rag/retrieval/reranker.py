@@ -1,11 +1,36 @@
-from typing import Iterable, Sequence, Optional
-from sentence_transformers import CrossEncoder
+import re
+from typing import Any, Dict, Iterable, List, Sequence, Optional
+
+import numpy as np
+
 from .base import BaseReranker
+from .batching import MicroBatcher
+from .hybrid import rrf_score
 from .schemas import Query, RetrievedChunk
+from .score_cache import PairScoreCache
+from ..utils.inference import backend_tag, current_backend, load_transformer
+from ..utils.models import model_registry
 import logging
 
 logger = logging.getLogger(__name__)
 
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def load_cross_encoder(model_name: str, *, backend: Optional[str] = None):
+    """
+    Return the shared CrossEncoder for `model_name` on the configured
+    inference backend (or `backend`), importing sentence-transformers on first use.
+    """
+    backend = current_backend(backend)
+
+    def load():
+        from sentence_transformers import CrossEncoder
+
+        return load_transformer(CrossEncoder, model_name, backend=backend)
+
+    return model_registry.get(("cross-encoder", model_name, backend), load)
+
 
 class CrossEncoderReranker(BaseReranker):
     """Reranks candidates using a cross-encoder model for precise relevance scoring."""
@@ -29,9 +54,37 @@ class CrossEncoderReranker(BaseReranker):
                     f"No cross-encoder model in settings, using default: {model_name}"
                 )
         
-        logger.info(f"Loading cross-encoder model: {model_name}")
-        self.model = CrossEncoder(model_name)
-        logger.info("Cross-encoder model loaded successfully")
+        self.model_name = model_name
+        self._model = None
+        self.score_cache = PairScoreCache(
+            model_name + backend_tag(),
+            max_entries=settings.vector_store.rerank_cache_size,
+            path=settings.vector_store.rerank_cache_path,
+        )
+
+    def __getstate__(self) -> dict:
+        # process-pool workers load their own copy of the model
+        state = self.__dict__.copy()
+        state["_model"] = None
+        return state
+
+    def stats(self) -> Dict[str, Any]:
+        return {"score_cache": self.score_cache.stats()}
+
+    def warmup(self) -> None:
+        _ = self.model
+
+    def _predict(self, pairs):
+        return self.model.predict(pairs)
+
+    @property
+    def model(self):
+        """The cross-encoder, loaded on first use rather than at construction."""
+        if self._model is None:
+            logger.info(f"Loading cross-encoder model: {self.model_name}")
+            self._model = load_cross_encoder(self.model_name)
+            logger.info("Cross-encoder model loaded successfully")
+        return self._model
     
     def rerank(
         self, 
@@ -62,11 +115,10 @@ class CrossEncoderReranker(BaseReranker):
             extra={"candidate_count": len(candidates_list), "k": k}
         )
         
-        # Create query-document pairs for cross-encoder
-        pairs = [[query.text, c.text] for c in candidates_list]
-        
-        # Get cross-encoder scores
-        scores = self.model.predict(pairs)
+        # Get cross-encoder scores; only pairs not scored before reach the model
+        scores = self.score_cache.scores(
+            query.text, candidates_list, self._predict
+        )
         
         logger.debug(
             f"Cross-encoder scores - min: {scores.min():.4f}, max: {scores.max():.4f}, mean: {scores.mean():.4f}",
@@ -104,3 +156,122 @@ class CrossEncoderReranker(BaseReranker):
         
         return reranked_sorted
 
+
+class BatchingCrossEncoderReranker(CrossEncoderReranker):
+    """
+    CrossEncoderReranker for concurrent callers: pairs from queries reranked
+    at the same time are scored in one forward pass (see MicroBatcher).
+    Batch size and wait window come from vector_store.rerank_max_batch_size
+    and rerank_batch_wait_ms.
+    """
+
+    def __init__(self, model_name: Optional[str] = None):
+        super().__init__(model_name)
+        from ..settings import get_settings
+        config = get_settings().vector_store
+        self.max_batch_size = config.rerank_max_batch_size
+        self.max_wait_ms = config.rerank_batch_wait_ms
+        self.batcher = self._make_batcher()
+
+    def _make_batcher(self) -> MicroBatcher:
+        return MicroBatcher(
+            super()._predict,
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=self.max_wait_ms,
+        )
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        del state["batcher"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.batcher = self._make_batcher()
+
+    def _predict(self, pairs):
+        return self.batcher.predict(pairs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "batches": self.batcher.batches,
+            "mean_batch_size": self.batcher.mean_batch_size(),
+        }
+
+    def close(self) -> None:
+        self.batcher.close()
+
+
+def lexical_overlap(query_text: str, texts: Sequence[str]) -> np.ndarray:
+    """Fraction of distinct query terms that occur in each text."""
+    terms = set(_TOKEN_RE.findall(query_text.lower()))
+    if not terms:
+        return np.zeros(len(texts))
+    return np.array(
+        [len(terms.intersection(_TOKEN_RE.findall(t.lower()))) / len(terms) for t in texts]
+    )
+
+
+class CascadeReranker(CrossEncoderReranker):
+    """
+    Two-stage reranking: a cheap first pass keeps `rerank_cascade_budget`
+    candidates and only those reach the (expensive) cross-encoder.
+
+    The "lexical" first pass fuses the retrieval order with a query-term
+    overlap ranking (reciprocal rank fusion), so candidates the retriever is
+    confident about survive even without shared terms. The "cross_encoder"
+    first pass scores every pair with the small `rerank_cascade_model`.
+    """
+
+    def __init__(self, model_name: Optional[str] = None):
+        super().__init__(model_name)
+        from ..settings import get_settings
+        config = get_settings().vector_store
+        self.budget = config.rerank_cascade_budget
+        self.first_stage = config.rerank_cascade_first_stage
+        self.first_stage_model = config.rerank_cascade_model
+        self.first_stage_cache = None
+        if self.first_stage == "cross_encoder":
+            self.first_stage_cache = PairScoreCache(
+                config.rerank_cascade_model + backend_tag(),
+                max_entries=config.rerank_cache_size,
+                path=config.rerank_cache_path,
+            )
+
+    def first_stage_scores(self, query: Query, candidates: Sequence[RetrievedChunk]) -> np.ndarray:
+        """Higher is better; `candidates` are in retrieval order."""
+        if self.first_stage_cache is not None:
+            model = load_cross_encoder(self.first_stage_model)
+            return self.first_stage_cache.scores(query.text, candidates, model.predict)
+
+        overlap = lexical_overlap(query.text, [c.text for c in candidates])
+        lexical_rank = np.empty(len(candidates))
+        lexical_rank[np.argsort(-overlap, kind="stable")] = np.arange(len(candidates))
+        retrieval_rank = np.arange(len(candidates))
+        return rrf_score(retrieval_rank) + rrf_score(lexical_rank)
+
+    def prune(self, query: Query, candidates: Sequence[RetrievedChunk]) -> List[RetrievedChunk]:
+        """Keep the `budget` best candidates by first-stage score, in retrieval order."""
+        candidates = list(candidates)
+        if len(candidates) <= self.budget:
+            return candidates
+        scores = self.first_stage_scores(query, candidates)
+        keep = np.sort(np.argsort(-scores, kind="stable")[:self.budget])
+        return [candidates[i] for i in keep]
+
+    def rerank(
+        self,
+        query: Query,
+        candidates: Iterable[RetrievedChunk],
+        *,
+        k: int = 5
+    ) -> Sequence[RetrievedChunk]:
+        survivors = self.prune(query, candidates)
+        return super().rerank(query, survivors, k=k)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        if self.first_stage_cache is not None:
+            stats["first_stage_cache"] = self.first_stage_cache.stats()
+        return stats
@@ -1,37 +1,135 @@
 
 from .base import BaseRetriever, BaseReranker
-from .schemas import Query, RetrievedChunk
-from ..storage.db import get_connection
-from typing import Sequence
+from .schemas import AnnSearchParams, Query, RetrievedChunk
+from ..settings import get_settings
+from ..storage.index import (
+    ann_order_by,
+    aset_local,
+    embedding_index_size,
+    get_metric,
+    set_local,
+    uses_ann_index,
+)
+from ..storage.pool import async_pooled_connection, pooled_connection
+from typing import Dict, List, Sequence, Tuple
 from agentic_rag.embeddings.model import embed_batch
+from agentic_rag.embeddings.query_cache import QueryEmbeddingCache
+import asyncio
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
 
 class PgVectorRetriever(BaseRetriever):
-    """Retrieves chunks from Postgres using pgvector cosine similarity."""
+    """Retrieves chunks from Postgres using the configured pgvector distance (cosine by default)."""
 
-    def search(self, query: Query, *, k: int = 5) -> Sequence[RetrievedChunk]: #TODO: make k configurable
-        # Step 1: Embed the query
-        query_vector = embed_batch([query.text])[0]  # returns 1 vector
+    def __init__(self) -> None:
+        config = get_settings().vector_store
+        self.metric = get_metric(config.distance_metric)
+        self.compression = config.compression
+        self.query_cache = QueryEmbeddingCache.from_settings()
+        self._exact_sql = self._SEARCH_SQL.format(operator=self.metric.operator)
+        self._rescore_sql = None
+        if self.compression != "none":
+            self._rescore_sql = self._RESCORE_SQL.format(
+                operator=self.metric.operator,
+                ann_order=ann_order_by(self.metric.name, self.compression, config.embedding_dim),
+            )
 
-        # Step 2: Query the database
-        sql = """
-            SELECT
-                chunk_id,
-                content,
-                metadata,
-                embedding <-> %s::vector AS score
+    def stats(self) -> Dict[str, object]:
+        return {"query_cache": self.query_cache.stats()}
+
+    def footprint(self) -> Dict[str, int]:
+        with pooled_connection() as conn:
+            vectors, index_bytes = embedding_index_size(conn)
+        dim = get_settings().vector_store.embedding_dim
+        return {"vectors": vectors, "index_bytes": index_bytes, "float32_bytes": vectors * dim * 4}
+
+    def warmup(self) -> None:
+        """Check that searches are served by the HNSW index rather than a sequential scan."""
+        if not get_settings().vector_store.verify_index:
+            return
+        with pooled_connection() as conn:
+            used = uses_ann_index(
+                conn, self.metric.name,
+                compression=self.compression, dim=get_settings().vector_store.embedding_dim,
+            )
+        if used is None:
+            logger.info("documents table is empty; skipping ANN index check")
+        elif used:
+            logger.info(f"Vector search uses the ANN index ({self.metric.name})")
+        else:
+            logger.warning(
+                f"Vector search with {self.metric.operator} does not use documents_embedding_idx; "
+                "queries will scan the whole table. Re-run ingestion so the index "
+                "matches vector_store.distance_metric."
+            )
+
+    @staticmethod
+    def session_options(params: AnnSearchParams | None, k: int) -> Dict[str, object]:
+        """Resolve per-query ANN overrides against VectorStoreConfig into Postgres settings."""
+        config = get_settings().vector_store
+        params = params or AnnSearchParams()
+        if params.exact:
+            return {"enable_indexscan": "off"}
+
+        options: Dict[str, object] = {
+            # ef_search below k silently truncates the candidate list
+            "hnsw.ef_search": params.ef_search or config.hnsw_ef_search or min(max(k, 40), 1000),
+        }
+        iterative_scan = params.iterative_scan or config.hnsw_iterative_scan
+        if iterative_scan:
+            options["hnsw.iterative_scan"] = iterative_scan
+        probes = params.probes or config.ivfflat_probes
+        if probes:
+            options["ivfflat.probes"] = probes
+        return options
+
+    # Lower score = closer, ordered by the indexed operator
+    _SEARCH_SQL = """
+        SELECT
+            chunk_id,
+            content,
+            metadata,
+            embedding {operator} %s::vector AS score
+        FROM documents
+        ORDER BY score
+        LIMIT %s;
+        """
+
+    # Compressed index: shortlist by the quantized distance, re-rank by the float column
+    _RESCORE_SQL = """
+        SELECT
+            chunk_id,
+            content,
+            metadata,
+            embedding {operator} %s::vector AS score
+        FROM (
+            SELECT chunk_id, content, metadata, embedding
             FROM documents
-            ORDER BY score
-            LIMIT %s;
-            """
+            ORDER BY {ann_order}
+            LIMIT %s
+        ) AS shortlist
+        ORDER BY score
+        LIMIT %s;
+        """
 
-        with get_connection() as conn, conn.cursor() as cur:
-            cur.execute(sql, (query_vector, k))
-            rows = cur.fetchall()
+    def _plan(self, params: AnnSearchParams | None, k: int) -> Tuple[str, int, Dict[str, object]]:
+        """SQL, shortlist size (0 = no re-scoring) and session options for one query."""
+        if self._rescore_sql is None or (params is not None and params.exact):
+            return self._exact_sql, 0, self.session_options(params, k)
+        factor = (params and params.rescore_factor) or get_settings().vector_store.rescore_factor
+        shortlist = k * factor
+        return self._rescore_sql, shortlist, self.session_options(params, shortlist)
 
-        # print("search rows:", rows)
-        # Step 3: Return as RetrievedChunk
-        results = [
+    @staticmethod
+    def _args(vector, k: int, shortlist: int) -> tuple:
+        return (vector, vector, shortlist, k) if shortlist else (vector, k)
+
+    @staticmethod
+    def _to_chunks(rows) -> List[RetrievedChunk]:
+        return [
             RetrievedChunk(
                 chunk_id=row[0],
                 text=row[1],
@@ -40,4 +138,88 @@ class PgVectorRetriever(BaseRetriever):
             )
             for row in rows
         ]
+
+    def search(self, query: Query, *, k: int = 5) -> Sequence[RetrievedChunk]: #TODO: make k configurable
+        # Step 1: Embed the query
+        query_vector = self.query_cache.embed([query.text], embed_batch)[0]  # sent as binary pgvector
+
+        # Step 2: Query the database
+        sql, shortlist, options = self._plan(query.ann, k)
+
+        with pooled_connection() as conn, conn.cursor() as cur:
+            set_local(cur, options)
+            cur.execute(sql, self._args(query_vector, k, shortlist))
+            rows = cur.fetchall()
+
+        # Step 3: Return as RetrievedChunk
+        return self._to_chunks(rows)
+
+    def search_many(self, queries: Sequence[Query], *, k: int = 5) -> List[Sequence[RetrievedChunk]]:
+        """
+        Embed all queries in one forward pass and run the ANN lookups over a
+        single pooled connection. Queries sharing the same ANN options are
+        sent with one pipelined executemany in their own transaction, so the
+        whole group costs one network round-trip instead of one per query.
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+
+        vectors = self.query_cache.embed([query.text for query in queries], embed_batch)
+
+        results: List[Sequence[RetrievedChunk]] = [[] for _ in queries]
+        with pooled_connection() as conn, conn.cursor() as cur:
+            for (sql, shortlist, options), indices in self._groups(queries, k).items():
+                set_local(cur, dict(options))
+                cur.executemany(sql, [self._args(vectors[i], k, shortlist) for i in indices], returning=True)
+                for n, i in enumerate(indices):
+                    if n:
+                        cur.nextset()
+                    results[i] = self._to_chunks(cur.fetchall())
+                conn.commit()  # ends the transaction so SET LOCAL does not leak into the next group
+        return results
+
+    def _groups(self, queries: Sequence[Query], k: int) -> Dict[tuple, List[int]]:
+        """Indices of queries sharing the same SQL, shortlist and session options."""
+        groups: Dict[tuple, List[int]] = {}
+        for i, query in enumerate(queries):
+            sql, shortlist, options = self._plan(query.ann, k)
+            groups.setdefault((sql, shortlist, tuple(options.items())), []).append(i)
+        return groups
+
+    async def asearch(self, query: Query, *, k: int = 5) -> Sequence[RetrievedChunk]:
+        """
+        `search` on the asyncio pool. Encoding is CPU-bound and runs in a
+        worker thread so the event loop keeps serving other requests.
+        """
+        vectors = await asyncio.to_thread(self.query_cache.embed, [query.text], embed_batch)
+        sql, shortlist, options = self._plan(query.ann, k)
+
+        async with async_pooled_connection() as conn, conn.cursor() as cur:
+            await aset_local(cur, options)
+            await cur.execute(sql, self._args(vectors[0], k, shortlist))
+            rows = await cur.fetchall()
+        return self._to_chunks(rows)
+
+    async def asearch_many(self, queries: Sequence[Query], *, k: int = 5) -> List[Sequence[RetrievedChunk]]:
+        """`search_many` on the asyncio pool, with the batched encode in a worker thread."""
+        queries = list(queries)
+        if not queries:
+            return []
+
+        vectors = await asyncio.to_thread(
+            self.query_cache.embed, [query.text for query in queries], embed_batch
+        )
+
+        results: List[Sequence[RetrievedChunk]] = [[] for _ in queries]
+        async with async_pooled_connection() as conn, conn.cursor() as cur:
+            for (sql, shortlist, options), indices in self._groups(queries, k).items():
+                await aset_local(cur, dict(options))
+                params = [self._args(vectors[i], k, shortlist) for i in indices]
+                await cur.executemany(sql, params, returning=True)
+                for n, i in enumerate(indices):
+                    if n:
+                        cur.nextset()
+                    results[i] = self._to_chunks(await cur.fetchall())
+                await conn.commit()
         return results
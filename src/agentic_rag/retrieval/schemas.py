@@ -4,10 +4,22 @@ from dataclasses import dataclass
 from typing import Mapping
 
 
+@dataclass(slots=True)
+class AnnSearchParams:
+    """Per-query overrides for approximate nearest neighbour search; None keeps the default."""
+
+    ef_search: int | None = None
+    iterative_scan: str | None = None
+    probes: int | None = None
+    exact: bool = False  # bypass the ANN index (ground truth for recall sweeps)
+    rescore_factor: int | None = None  # shortlist size multiplier for compressed indexes
+
+
 @dataclass(slots=True)
 class Query:
     text: str
     metadata: Mapping[str, str] | None = None
+    ann: AnnSearchParams | None = None
 
 
 @dataclass(slots=True)
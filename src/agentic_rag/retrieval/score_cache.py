@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..embeddings.cache import text_key
+from ..utils.cache import CacheStats, SQLiteStore
+from .schemas import RetrievedChunk
+import logging
+
+logger = logging.getLogger(__name__)
+
+def pair_key(query_text: str, chunk: RetrievedChunk) -> bytes:
+    """Hash of (normalized query, chunk id, chunk content); edited chunks get new keys."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(text_key(query_text))
+    digest.update(chunk.chunk_id.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(text_key(chunk.text))
+    return digest.digest()
+
+
+class PairScoreCache(CacheStats):
+    """
+    Cross-encoder scores keyed by (model, query hash, chunk id, content hash).
+
+    An in-memory LRU of `max_entries` scores sits in front of an optional
+    SQLite file at `path`, so reranking sweeps over retrieval_k or
+    reranker_top_k only run the model on pairs never scored before. Safe to
+    share between threads; pickles without its memory tier so process-pool
+    workers open their own connection.
+    """
+
+    def __init__(self, model_name: str, *, max_entries: int = 100_000, path: Optional[Path] = None):
+        super().__init__()
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: OrderedDict[bytes, float] = OrderedDict()
+        self._store = SQLiteStore(path, "pair_score_values", "REAL") if path is not None else None
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        state["_entries"] = OrderedDict()
+        return state
+
+    def _remember(self, key: bytes, score: float) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = score
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def scores(
+        self,
+        query_text: str,
+        candidates: Sequence[RetrievedChunk],
+        predict_fn: Callable[[List[List[str]]], np.ndarray],
+    ) -> np.ndarray:
+        """Return one score per candidate, calling `predict_fn` only for unseen pairs."""
+        keys = [pair_key(query_text, c) for c in candidates]
+        scores = np.empty(len(keys), dtype=np.float64)
+
+        missing: List[int] = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                score = self._entries.get(key)
+                if score is None:
+                    missing.append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    scores[i] = score
+            memory_hits = len(keys) - len(missing)
+
+            disk_hits = 0
+            if missing and self._store is not None:
+                stored = self._store.get_many(self.model_name, [keys[i] for i in missing])
+                still_missing = []
+                for i in missing:
+                    score = stored.get(keys[i])
+                    if score is None:
+                        still_missing.append(i)
+                    else:
+                        scores[i] = score
+                        self._remember(keys[i], score)
+                disk_hits = len(missing) - len(still_missing)
+                missing = still_missing
+
+        if missing:
+            fresh = np.asarray(
+                predict_fn([[query_text, candidates[i].text] for i in missing]), dtype=np.float64
+            )
+            scores[missing] = fresh
+            computed = [(keys[i], score) for i, score in zip(missing, fresh.tolist())]
+            with self._lock:
+                for key, score in computed:
+                    self._remember(key, score)
+            if self._store is not None:
+                self._store.put_many(self.model_name, computed)
+
+        with self._lock:
+            self.hits += memory_hits
+            self.disk_hits += disk_hits
+            self.misses += len(missing)
+        return scores
+
+    def _stats(self) -> Dict[str, float]:
+        return {**super()._stats(), "entries": len(self._entries)}
+
+    def close(self) -> None:
+        if self._store is not None:
+            self._store.close()
+            self._store = None
@@ -0,0 +1,25 @@
+"""Postgres/pgvector storage."""
+
+from .db import SCHEMA_VERSION, ensure_schema, ensure_schema_once, get_connection, iter_documents
+from .pool import (
+    async_pooled_connection,
+    close_async_pool,
+    close_pool,
+    get_async_pool,
+    get_pool,
+    pooled_connection,
+)
+
+__all__ = [
+    "SCHEMA_VERSION",
+    "async_pooled_connection",
+    "close_async_pool",
+    "close_pool",
+    "ensure_schema",
+    "ensure_schema_once",
+    "get_async_pool",
+    "get_connection",
+    "get_pool",
+    "iter_documents",
+    "pooled_connection",
+]
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import struct
+from datetime import datetime, timezone
+from typing import Any, Iterable, Mapping, Sequence
+
+import orjson
+
+from .vector import encode_vectors
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Binary COPY framing, see https://www.postgresql.org/docs/current/sql-copy.html
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_COPY_TRAILER = struct.pack("!h", -1)
+_PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+_JSONB_VERSION = b"\x01"
+
+_DOCUMENT_COLUMNS = "chunk_id, record_id, content, embedding, metadata, created_at"
+
+_CREATE_STAGING = """
+    CREATE TEMP TABLE IF NOT EXISTS documents_staging
+    (LIKE documents INCLUDING DEFAULTS)
+    ON COMMIT DELETE ROWS;
+"""
+
+_MERGE_STAGING = f"""
+    INSERT INTO documents ({_DOCUMENT_COLUMNS})
+    SELECT {_DOCUMENT_COLUMNS} FROM documents_staging
+    ON CONFLICT (chunk_id) DO UPDATE SET
+        content = EXCLUDED.content,
+        embedding = EXCLUDED.embedding,
+        metadata = EXCLUDED.metadata;
+"""
+
+
+def _field(value: bytes) -> bytes:
+    return struct.pack("!i", len(value)) + value
+
+
+def _timestamptz(value: datetime) -> bytes:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - _PG_EPOCH
+    micros = (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return struct.pack("!q", micros)
+
+
+def encode_document_rows(
+    rows: Iterable[tuple[str, str, str, Mapping[str, Any], datetime]],
+    vectors: Sequence[bytes],
+) -> Iterable[bytes]:
+    """Yield binary COPY tuples for the documents columns, framed with header and trailer."""
+    yield _COPY_HEADER
+    row_prefix = struct.pack("!h", 6)
+    for (chunk_id, record_id, content, metadata, created_at), vector in zip(rows, vectors):
+        yield b"".join((
+            row_prefix,
+            _field(chunk_id.encode("utf-8")),
+            _field(record_id.encode("utf-8")),
+            _field(content.encode("utf-8")),
+            _field(vector),
+            _field(_JSONB_VERSION + orjson.dumps(metadata)),
+            _field(_timestamptz(created_at)),
+        ))
+    yield _COPY_TRAILER
+
+
+def copy_documents(
+    conn,
+    rows: Sequence[tuple[str, str, str, Mapping[str, Any], datetime]],
+    embeddings: Any,
+) -> None:
+    """
+    Bulk upsert rows into `documents` via binary COPY into a temp staging
+    table followed by a single INSERT ... ON CONFLICT merge.
+
+    `rows` are (chunk_id, record_id, content, metadata, created_at) tuples
+    aligned with the rows of `embeddings`. The caller owns the transaction.
+    """
+    vectors = encode_vectors(embeddings)
+    if len(vectors) != len(rows):
+        raise ValueError(f"Got {len(rows)} rows but {len(vectors)} embeddings")
+
+    with conn.cursor() as cur:
+        cur.execute(_CREATE_STAGING)
+        with cur.copy(
+            f"COPY documents_staging ({_DOCUMENT_COLUMNS}) FROM STDIN (FORMAT BINARY)"
+        ) as copy:
+            for block in encode_document_rows(rows, vectors):
+                copy.write(block)
+        cur.execute(_MERGE_STAGING)
+
+
+def delete_orphans(conn, removed_records: Sequence[str], chunk_counts: Mapping[str, int]) -> int:
+    """
+    Delete rows of records that disappeared from the corpus, and rows past
+    the new chunk count of records that now produce fewer chunks. Each kind
+    is a single set-based statement. The caller owns the transaction.
+    """
+    deleted = 0
+    with conn.cursor() as cur:
+        if removed_records:
+            cur.execute(
+                "DELETE FROM documents WHERE record_id = ANY(%s)",
+                (list(removed_records),),
+            )
+            deleted += cur.rowcount
+        if chunk_counts:
+            cur.execute(
+                """
+                DELETE FROM documents d
+                USING unnest(%s::text[], %s::int[]) AS s(record_id, chunk_count)
+                WHERE d.record_id = s.record_id
+                  AND (d.metadata->>'chunk_index')::int >= s.chunk_count
+                """,
+                (list(chunk_counts.keys()), list(chunk_counts.values())),
+            )
+            deleted += cur.rowcount
+    return deleted
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterator, Mapping, Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "documents_embedding_idx"
+
+
+@dataclass(frozen=True, slots=True)
+class DistanceMetric:
+    """A pgvector distance operator and the HNSW operator classes that serve it."""
+
+    name: str
+    operator: str
+    opclass: str
+    halfvec_opclass: str
+
+
+DISTANCE_METRICS: Mapping[str, DistanceMetric] = {
+    "cosine": DistanceMetric("cosine", "<=>", "vector_cosine_ops", "halfvec_cosine_ops"),
+    "l2": DistanceMetric("l2", "<->", "vector_l2_ops", "halfvec_l2_ops"),
+    # negative inner product; equals cosine ranking when vectors are unit length
+    "inner_product": DistanceMetric("inner_product", "<#>", "vector_ip_ops", "halfvec_ip_ops"),
+}
+
+# Binary quantization keeps one sign bit per dimension, compared by Hamming distance
+_BIT_OPCLASS = "bit_hamming_ops"
+_KNOWN_OPCLASSES = tuple(
+    opclass for m in DISTANCE_METRICS.values() for opclass in (m.opclass, m.halfvec_opclass)
+) + (_BIT_OPCLASS,)
+
+COMPRESSIONS = ("none", "halfvec", "binary")
+
+
+def get_metric(name: str) -> DistanceMetric:
+    try:
+        return DISTANCE_METRICS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown distance metric {name!r}; expected one of {sorted(DISTANCE_METRICS)}"
+        ) from None
+
+
+def index_target(metric: str, compression: str = "none", dim: int = 384) -> tuple[str, str]:
+    """
+    (indexed expression, operator class) of the embedding index. Compressed
+    indexes are expression indexes over the float column, which is kept for
+    exact re-scoring of their shortlist.
+    """
+    m = get_metric(metric)
+    if compression == "none":
+        return "embedding", m.opclass
+    if compression == "halfvec":
+        return f"(embedding::halfvec({dim}))", m.halfvec_opclass
+    if compression == "binary":
+        return f"(binary_quantize(embedding)::bit({dim}))", _BIT_OPCLASS
+    raise ValueError(f"Unknown compression {compression!r}; expected one of {COMPRESSIONS}")
+
+
+def ann_order_by(metric: str, compression: str = "none", dim: int = 384) -> str:
+    """ORDER BY expression served by the embedding index; its one %s takes the query vector."""
+    m = get_metric(metric)
+    if compression == "none":
+        return f"embedding {m.operator} %s::vector"
+    if compression == "halfvec":
+        return f"embedding::halfvec({dim}) {m.operator} %s::vector::halfvec({dim})"
+    if compression == "binary":
+        return f"binary_quantize(embedding)::bit({dim}) <~> binary_quantize(%s::vector)::bit({dim})"
+    raise ValueError(f"Unknown compression {compression!r}; expected one of {COMPRESSIONS}")
+
+
+def current_index_opclass(conn) -> str | None:
+    """Return the operator class of the existing embedding index, or None if there is none."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT indexdef FROM pg_indexes WHERE indexname = %s", (INDEX_NAME,))
+        row = cur.fetchone()
+    if row is None:
+        return None
+    for opclass in _KNOWN_OPCLASSES:
+        if opclass in row[0]:
+            return opclass
+    return row[0]
+
+
+def drop_embedding_index(conn) -> None:
+    """Drop the ANN index so a full reload does not maintain it row by row."""
+    logger.info(f"Dropping {INDEX_NAME} for bulk reload")
+    with conn.cursor() as cur:
+        cur.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+    conn.commit()
+
+
+def create_embedding_index(conn, metric: str = "cosine", *, compression: str = "none", dim: int = 384) -> None:
+    """
+    (Re)build the HNSW index over documents.embedding for `metric`, over
+    the full vectors or a compressed form of them (see index_target).
+    An existing index built for a different metric or compression is
+    dropped first, since the planner can only use it for its own operator.
+    """
+    expression, opclass = index_target(metric, compression, dim)
+    existing = current_index_opclass(conn)
+    if existing == opclass:
+        conn.commit()
+        return
+    if existing is not None:
+        logger.warning(f"{INDEX_NAME} uses {existing}, rebuilding for {opclass}")
+        drop_embedding_index(conn)
+
+    logger.info(f"Building {INDEX_NAME} ({opclass})")
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS {INDEX_NAME}
+            ON documents
+            USING hnsw ({expression} {opclass})
+            """
+        )
+    conn.commit()
+
+
+def _plan_nodes(plan: Mapping[str, Any]) -> Iterator[Mapping[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+def uses_ann_index(
+    conn, metric: str = "cosine", *, k: int = 10, compression: str = "none", dim: int = 384
+) -> bool | None:
+    """
+    EXPLAIN a top-k search with a stored vector and report whether the
+    plan scans the embedding index. Returns None when the table is empty.
+    """
+    order_by = ann_order_by(metric, compression, dim)
+    with conn.cursor() as cur:
+        cur.execute("SELECT embedding FROM documents WHERE embedding IS NOT NULL LIMIT 1")
+        row = cur.fetchone()
+        if row is None:
+            conn.rollback()
+            return None
+        cur.execute(
+            f"""
+            EXPLAIN (FORMAT JSON)
+            SELECT chunk_id FROM documents
+            ORDER BY {order_by}
+            LIMIT %s
+            """,
+            (row[0], k),
+        )
+        plan = cur.fetchone()[0]
+    conn.rollback()
+
+    if isinstance(plan, list):
+        plan = plan[0]
+    return any(node.get("Index Name") == INDEX_NAME for node in _plan_nodes(plan["Plan"]))
+
+
+def embedding_index_size(conn) -> tuple[int, int]:
+    """Return (stored embeddings, bytes on disk of the embedding index)."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT count(embedding), coalesce(pg_relation_size(to_regclass(%s)), 0) FROM documents",
+            (INDEX_NAME,),
+        )
+        vectors, index_bytes = cur.fetchone()
+    conn.rollback()
+    return int(vectors), int(index_bytes)
+
+
+def _set_local_query(options: Mapping[str, Any]) -> Optional[tuple[str, list[str]]]:
+    """One `SELECT set_config(name, value, true), ...` for all options, or None when there are none."""
+    if not options:
+        return None
+    query = "SELECT " + ", ".join(["set_config(%s, %s, true)"] * len(options))
+    return query, [part for name, value in options.items() for part in (name, str(value))]
+
+
+def set_local(cur, options: Mapping[str, Any]) -> None:
+    """
+    Apply session options for the current transaction only, like SET LOCAL
+    (pooled connections are reused, so plain SET would leak). All options
+    go in a single set_config() statement: one round trip per search.
+    """
+    query = _set_local_query(options)
+    if query is not None:
+        cur.execute(*query)
+
+
+async def aset_local(cur, options: Mapping[str, Any]) -> None:
+    """`set_local` for an AsyncCursor."""
+    query = _set_local_query(options)
+    if query is not None:
+        await cur.execute(*query)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional
+
+import psycopg
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from ..settings import get_settings
+from .vector import register_vector, register_vector_async
+import logging
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+_async_pool: Optional[AsyncConnectionPool] = None
+_async_pool_lock: Optional[asyncio.Lock] = None
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, opening it on first use."""
+    global _pool
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        if _pool is None:
+            config = get_settings().database
+            logger.info(
+                "Opening Postgres connection pool",
+                extra={"min_size": config.pool_min_size, "max_size": config.pool_max_size},
+            )
+            _pool = ConnectionPool(
+                config.dsn,
+                min_size=config.pool_min_size,
+                max_size=config.pool_max_size,
+                timeout=config.pool_timeout,
+                kwargs={"autocommit": False},
+                configure=register_vector,
+                name="agentic-rag",
+                open=True,
+            )
+            atexit.register(close_pool)
+    return _pool
+
+
+@contextmanager
+def pooled_connection() -> Iterator[psycopg.Connection]:
+    """
+    Borrow a connection from the shared pool.
+    Usage:
+        with pooled_connection() as conn:
+            # do stuff
+    The transaction is committed on a clean exit and rolled back on error.
+    """
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def close_pool() -> None:
+    """Close the shared pool; the next `get_pool()` call opens a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+async def get_async_pool() -> AsyncConnectionPool:
+    """
+    Return the asyncio connection pool, opening it on first use. Sized by
+    the same DatabaseConfig values as the blocking pool; it belongs to the
+    event loop that first opened it.
+    """
+    global _async_pool, _async_pool_lock
+    if _async_pool is not None:
+        return _async_pool
+    if _async_pool_lock is None:
+        _async_pool_lock = asyncio.Lock()
+    async with _async_pool_lock:
+        if _async_pool is None:
+            config = get_settings().database
+            logger.info(
+                "Opening async Postgres connection pool",
+                extra={"min_size": config.pool_min_size, "max_size": config.pool_max_size},
+            )
+            pool = AsyncConnectionPool(
+                config.dsn,
+                min_size=config.pool_min_size,
+                max_size=config.pool_max_size,
+                timeout=config.pool_timeout,
+                kwargs={"autocommit": False},
+                configure=register_vector_async,
+                name="agentic-rag-async",
+                open=False,
+            )
+            await pool.open()
+            _async_pool = pool
+    return _async_pool
+
+
+@asynccontextmanager
+async def async_pooled_connection() -> AsyncIterator[psycopg.AsyncConnection]:
+    """
+    Borrow a connection from the async pool; the async counterpart of
+    `pooled_connection()`, with the same commit/rollback behaviour.
+    """
+    pool = await get_async_pool()
+    async with pool.connection() as conn:
+        yield conn
+
+
+async def close_async_pool() -> None:
+    """Close the async pool (call from the owning event loop, e.g. on server shutdown)."""
+    global _async_pool
+    if _async_pool is not None:
+        pool, _async_pool = _async_pool, None
+        await pool.close()
@@ -9,6 +9,9 @@ CREATE TABLE IF NOT EXISTS documents (
   created_at TIMESTAMPTZ DEFAULT now()
 );
 
-CREATE INDEX IF NOT EXISTS documents_embedding_idx
-ON documents
-USING hnsw (embedding vector_cosine_ops);
+-- documents_embedding_idx is created by storage.index.create_embedding_index
+-- with the operator class matching vector_store.distance_metric.
+
+CREATE TABLE IF NOT EXISTS agentic_rag_schema (
+  version INTEGER NOT NULL
+);
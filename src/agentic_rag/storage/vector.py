@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import struct
+from typing import Any
+
+import numpy as np
+from psycopg.adapt import Dumper, Loader
+from psycopg.pq import Format
+from psycopg.types import TypeInfo
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+_BIG_ENDIAN_F4 = np.dtype(">f4")
+
+
+def encode_vector(vector: Any) -> bytes:
+    """Encode one vector in pgvector's binary format: int16 dim, int16 unused, float32[dim]."""
+    values = np.ascontiguousarray(vector, dtype=_BIG_ENDIAN_F4)
+    if values.ndim != 1:
+        raise ValueError(f"Expected a 1-D vector, got shape {values.shape}")
+    return struct.pack("!hh", values.shape[0], 0) + values.tobytes()
+
+
+def encode_vectors(embeddings: Any) -> list[bytes]:
+    """
+    Encode a (n, dim) matrix into pgvector's binary wire format.
+
+    The byte-swap happens once for the whole batch on the NumPy buffer; no
+    per-float Python objects are created.
+    """
+    matrix = np.ascontiguousarray(embeddings, dtype=_BIG_ENDIAN_F4)
+    if matrix.ndim != 2:
+        raise ValueError(f"Expected a 2-D embedding matrix, got shape {matrix.shape}")
+    header = struct.pack("!hh", matrix.shape[1], 0)
+    return [header + row.tobytes() for row in matrix]
+
+
+def decode_vector(data: bytes | memoryview) -> np.ndarray:
+    """Decode pgvector's binary format into a native float32 array."""
+    dim, _ = struct.unpack_from("!hh", data)
+    return np.frombuffer(data, dtype=_BIG_ENDIAN_F4, count=dim, offset=4).astype(np.float32)
+
+
+class VectorBinaryDumper(Dumper):
+    """Send NumPy arrays to Postgres as binary pgvector values."""
+
+    format = Format.BINARY
+
+    def dump(self, obj: np.ndarray) -> bytes:
+        return encode_vector(obj)
+
+
+class VectorBinaryLoader(Loader):
+    """Load binary pgvector values as float32 NumPy arrays."""
+
+    format = Format.BINARY
+
+    def load(self, data: bytes | memoryview) -> np.ndarray:
+        return decode_vector(data)
+
+
+def register_vector(conn) -> None:
+    """
+    Register NumPy <-> pgvector binary adapters on `conn`.
+
+    If the extension is not installed yet the dumper is registered without
+    a type oid, which still works wherever the value is cast (`%b::vector`).
+    """
+    info = TypeInfo.fetch(conn, "vector")
+    if not conn.autocommit:
+        conn.rollback()  # leave the connection idle, as the pool requires
+    _register_adapters(conn, info)
+
+
+async def register_vector_async(conn) -> None:
+    """`register_vector` for an AsyncConnection (configure hook of the async pool)."""
+    info = await TypeInfo.fetch(conn, "vector")
+    if not conn.autocommit:
+        await conn.rollback()
+    _register_adapters(conn, info)
+
+
+def _register_adapters(conn, info: TypeInfo | None) -> None:
+    dumper = type("VectorBinaryDumper", (VectorBinaryDumper,), {"oid": info.oid if info else 0})
+    conn.adapters.register_dumper(np.ndarray, dumper)
+    if info is None:
+        logger.debug("vector type not found; registered NumPy dumper without oid")
+        return
+    conn.adapters.register_loader(info.oid, VectorBinaryLoader)
@@ -1,6 +1,14 @@
 """Utility helpers."""
 
 from .imports import resolve_dotted_path
-from .io import read_jsonl, write_jsonl
+from .io import external_sort, read_jsonl, write_jsonl
+from .models import ModelRegistry, model_registry
 
-__all__ = ["read_jsonl", "write_jsonl", "resolve_dotted_path"]
+__all__ = [
+    "ModelRegistry",
+    "external_sort",
+    "model_registry",
+    "read_jsonl",
+    "resolve_dotted_path",
+    "write_jsonl",
+]
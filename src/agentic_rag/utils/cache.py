@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement.
+_LOOKUP_CHUNK = 500
+
+
+class SQLiteStore:
+    """
+    (namespace, key) -> value table in a local SQLite file, the disk tier of
+    the embedding and pair-score caches. Namespaces keep values of different
+    models apart. Safe to share between threads; pickles without its
+    connection, and the copy (e.g. in a process-pool worker) reopens the file.
+    """
+
+    def __init__(self, path: Path, table: str, value_type: str = "BLOB"):
+        self.path = path
+        self.table = table
+        self.value_type = value_type
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            f"namespace TEXT NOT NULL, key BLOB NOT NULL, value {self.value_type} NOT NULL, "
+            f"PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for name in ("_lock", "_conn"):
+            state.pop(name)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._connect()
+
+    def get_many(self, namespace: str, keys: Sequence[bytes]) -> Dict[bytes, Any]:
+        """Return {key: value} for the keys that are stored."""
+        found: Dict[bytes, Any] = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                batch = keys[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM {self.table} WHERE namespace = ? AND key IN ({placeholders})",
+                    (namespace, *batch),
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_many(self, namespace: str, items: Iterable[Tuple[bytes, Any]]) -> None:
+        rows = [(namespace, key, value) for key, value in items]
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (namespace, key, value) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CacheStats:
+    """
+    Hit counters shared by the caches: `hits` (memory, or the only tier),
+    `disk_hits` and `misses`, guarded by `_lock`, which subclasses also use
+    for their own state. Pickles with a fresh lock.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.pop("_lock")
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def hit_rate(self) -> float:
+        """Share of lookups served from memory or disk."""
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+    def _stats(self) -> Dict[str, float]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+        }
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return self._stats()
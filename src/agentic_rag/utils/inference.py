@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ..settings import get_settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+TORCH = "torch"
+
+
+def current_backend(backend: Optional[str] = None) -> str:
+    return backend or get_settings().inference.backend
+
+
+def backend_tag(backend: Optional[str] = None) -> str:
+    """
+    Suffix identifying outputs of a non-default backend, appended to cache
+    keys so int8 vectors and scores never mix with fp32 ones.
+    """
+    backend = current_backend(backend)
+    if backend == TORCH:
+        return ""
+    if backend == "onnx-int8":
+        return f"#onnx-int8-{get_settings().inference.quantization}"
+    return f"#{backend}"
+
+
+def _export_dir(model_name: str) -> Path:
+    settings = get_settings()
+    root = settings.inference.onnx_cache_dir or settings.artifacts_dir / "onnx"
+    return root / re.sub(r"[^\w.-]+", "--", model_name)
+
+
+def load_transformer(cls: type, model_name: str, *, backend: Optional[str] = None, **kwargs: Any) -> Any:
+    """
+    Build a sentence-transformers `cls` (SentenceTransformer or CrossEncoder)
+    on the requested backend.
+
+    ONNX models are exported on first use into <onnx_cache_dir>/<model> and
+    loaded from there afterwards; onnx-int8 additionally writes a
+    dynamically quantized copy next to the fp32 export.
+    """
+    backend = current_backend(backend)
+    if backend == TORCH:
+        return cls(model_name, **kwargs)
+
+    export_dir = _export_dir(model_name)
+    file_name = "onnx/model.onnx"
+    if backend == "onnx-int8":
+        quantization = get_settings().inference.quantization
+        file_name = f"onnx/model_qint8_{quantization}.onnx"
+
+    if not (export_dir / file_name).exists():
+        _export(cls, model_name, export_dir, backend)
+
+    logger.info(f"Loading {model_name} from {export_dir / file_name}")
+    return cls(str(export_dir), backend="onnx", model_kwargs={"file_name": file_name}, **kwargs)
+
+
+def _export(cls: type, model_name: str, export_dir: Path, backend: str) -> None:
+    logger.info(f"Exporting {model_name} to ONNX in {export_dir}")
+    model = cls(model_name, backend="onnx")  # converts the PyTorch weights on the fly
+    export_dir.mkdir(parents=True, exist_ok=True)
+    model.save_pretrained(str(export_dir))
+
+    if backend == "onnx-int8":
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        quantization = get_settings().inference.quantization
+        logger.info(f"Quantizing {model_name} to int8 ({quantization})")
+        export_dynamic_quantized_onnx_model(model, quantization, str(export_dir))
+
+
+def embedding_parity(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """Row-wise cosine similarity between two embedding matrices of the same texts."""
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    cosine = np.einsum("ij,ij->i", reference, candidate) / np.maximum(norms, 1e-12)
+    return {"min_cosine": float(cosine.min()), "mean_cosine": float(cosine.mean())}
+
+
+def score_parity(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """
+    Absolute score difference between two cross-encoder runs on the same
+    pairs, and how often the pairwise order of two pairs is preserved.
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    candidate = np.asarray(candidate, dtype=np.float64)
+    ref_order = np.sign(reference[:, None] - reference[None, :])
+    cand_order = np.sign(candidate[:, None] - candidate[None, :])
+    upper = np.triu_indices(len(reference), k=1)
+    agreement = float(np.mean(ref_order[upper] == cand_order[upper])) if upper[0].size else 1.0
+    return {
+        "max_abs_diff": float(np.max(np.abs(reference - candidate))),
+        "order_agreement": agreement,
+    }
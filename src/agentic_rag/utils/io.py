@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import heapq
+import os
+import shutil
+import tempfile
 from pathlib import Path
-from typing import Iterable, Iterator, Mapping
+from typing import Callable, Iterable, Iterator, Mapping
 
 import orjson
 
@@ -13,8 +17,71 @@ def read_jsonl(path: Path) -> Iterator[Mapping[str, object]]:
                 yield orjson.loads(line)
 
 
-def write_jsonl(path: Path, rows: Iterable[Mapping[str, object]]) -> None:
+def write_jsonl(path: Path, rows: Iterable[Mapping[str, object]], *, append: bool = False) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("wb") as fh:
+    with path.open("ab" if append else "wb") as fh:
         for row in rows:
             fh.write(orjson.dumps(row) + b"\n")
+
+
+def atomic_replace_dir(tmp: Path, path: Path) -> None:
+    """
+    Move the finished directory `tmp` to `path`. The previous `path` is first
+    renamed aside to `<path>.old` and deleted only after the swap, so a
+    reader sees either the old or the new directory, never a partial one.
+    """
+    old = path.with_name(path.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if path.exists():
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def external_sort(
+    rows: Iterable[Mapping[str, object]],
+    *,
+    key: Callable[[Mapping[str, object]], object],
+    run_size: int = 50_000,
+    tmp_dir: Path | None = None,
+) -> Iterator[Mapping[str, object]]:
+    """
+    Sort JSON rows with bounded memory.
+
+    Rows are buffered into runs of at most `run_size`; each run is sorted and
+    spilled to a temporary JSONL file, then all runs are k-way merged lazily.
+    Inputs that fit in a single run never touch disk. Ordering is stable, so
+    the output matches `sorted(rows, key=key)`.
+    """
+    if run_size <= 0:
+        raise ValueError(f"run_size must be positive, got {run_size}")
+
+    with tempfile.TemporaryDirectory(prefix="agentic-rag-sort-", dir=tmp_dir) as tmp:
+        runs: list[Path] = []
+        buffer: list[Mapping[str, object]] = []
+
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= run_size:
+                runs.append(_spill_run(buffer, key, Path(tmp) / f"run-{len(runs):05d}.jsonl"))
+                buffer = []
+
+        if not runs:
+            yield from sorted(buffer, key=key)
+            return
+
+        if buffer:
+            runs.append(_spill_run(buffer, key, Path(tmp) / f"run-{len(runs):05d}.jsonl"))
+            buffer = []
+
+        yield from heapq.merge(*(read_jsonl(run) for run in runs), key=key)
+
+
+def _spill_run(
+    buffer: list[Mapping[str, object]],
+    key: Callable[[Mapping[str, object]], object],
+    path: Path,
+) -> Path:
+    buffer.sort(key=key)
+    write_jsonl(path, buffer)
+    return path
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Hashable
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of lazily loaded models.
+
+    Models are created by `factory` the first time their key is requested
+    and shared afterwards, so importing a module never pays for torch or
+    weight loading and every caller in the process reuses one instance.
+    """
+
+    def __init__(self) -> None:
+        self._models: dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                logger.info(f"Loading model {key}")
+                model = factory()
+                self._models[key] = model
+        return model
+
+    def loaded(self) -> list[Hashable]:
+        return list(self._models)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,38 @@
+# tests/conftest.py
+
+import json
+
+import pytest
+from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors, trainers
+
+TOKENIZER_CORPUS = [
+    "How do I register a custom post type in my theme?",
+    "The add_action hook runs the callback on init, before the admin menu is built.",
+]
+
+
+@pytest.fixture
+def wordpiece_tokenizer() -> Tokenizer:
+    """Tiny BERT-style fast tokenizer trained in memory, so tests need no download"""
+    tokenizer = Tokenizer(models.WordPiece(unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer.train_from_iterator(
+        TOKENIZER_CORPUS,
+        trainers.WordPieceTrainer(vocab_size=200, special_tokens=["[UNK]", "[CLS]", "[SEP]"], show_progress=False),
+    )
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]",
+        special_tokens=[("[CLS]", tokenizer.token_to_id("[CLS]")), ("[SEP]", tokenizer.token_to_id("[SEP]"))],
+    )
+    return tokenizer
+
+
+@pytest.fixture
+def embedding_model_dir(tmp_path, wordpiece_tokenizer):
+    """Local sentence-transformers layout: the tokenizer and a 16-token max_seq_length"""
+    model_dir = tmp_path / "embedder"
+    model_dir.mkdir()
+    wordpiece_tokenizer.save(str(model_dir / "tokenizer.json"))
+    (model_dir / "sentence_bert_config.json").write_text(json.dumps({"max_seq_length": 16}))
+    return model_dir
@@ -1,9 +1,122 @@
+# tests/test_agent.py
+
+from unittest.mock import Mock, patch
+
 import pytest
+from fastapi.testclient import TestClient
 
 from agentic_rag.agent import BaseAgentController
+from agentic_rag.agent.agent import AgentController
+from agentic_rag.agent.server import LatencyHistogram, create_app
+from agentic_rag.agent.types import Message, Role
+from agentic_rag.retrieval.base import BaseRetriever
+from agentic_rag.retrieval.schemas import RetrievedChunk
+
+
+class StaticRetriever(BaseRetriever):
+    """Returns chunks c0..c(k-1) and records each batched call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def search(self, query, *, k=5):
+        return [RetrievedChunk(chunk_id=f"c{i}", text=f"{query.text} {i}", score=float(i)) for i in range(k)]
+
+    def search_many(self, queries, *, k=5):
+        self.calls.append((len(queries), k))
+        return [self.search(q, k=k) for q in queries]
+
+
+def reverse_reranker():
+    reranker = Mock()
+    reranker.rerank.side_effect = lambda query, chunks, k: list(reversed(chunks))[:k]
+    reranker.stats.return_value = {}
+    del reranker.batcher
+    del reranker.close
+    return reranker
+
+
+class TestAgentController:
+    def test_is_a_controller(self):
+        assert issubclass(AgentController, BaseAgentController)
+
+    def test_run_retrieves_and_responds(self):
+        controller = AgentController(retriever=StaticRetriever())
+
+        message = controller.run([Message(role=Role.USER, content="css")])
+
+        assert message.role == Role.ASSISTANT
+        assert message.content.startswith("css 0")
+        assert message.metadata["chunk_ids"] == ["c0", "c1", "c2", "c3", "c4"]
+
+    def test_plan_reranks_a_deeper_candidate_list(self):
+        controller = AgentController(retriever=StaticRetriever(), reranker=reverse_reranker())
+
+        steps = controller.plan([Message(role=Role.USER, content="css")])
+
+        assert [s.name for s in steps] == ["retrieve", "rerank", "respond"]
+        assert steps[0].arguments["k"] >= steps[1].arguments["k"]
+
+
+class TestServer:
+    @pytest.fixture
+    def client(self):
+        retriever = StaticRetriever()
+        controller = AgentController(retriever=retriever, reranker=reverse_reranker())
+        with patch('agentic_rag.embeddings.model.get_embedding_model'):
+            with TestClient(create_app(controller)) as client:
+                yield client, retriever
+
+    def test_retrieve_reranks(self, client):
+        client, retriever = client
+
+        response = client.post("/retrieve", json={"query": "hooks", "k": 2})
+
+        assert response.status_code == 200
+        chunks = response.json()["chunks"]
+        assert len(chunks) == 2
+        # reranked from the deeper retrieval_k candidate list
+        assert retriever.calls[0][1] > 2
+        assert chunks[0]["chunk_id"] == f"c{retriever.calls[0][1] - 1}"
+
+    def test_retrieve_without_rerank(self, client):
+        client, _ = client
+
+        response = client.post("/retrieve", json={"query": "hooks", "k": 3, "rerank": False})
+
+        assert [c["chunk_id"] for c in response.json()["chunks"]] == ["c0", "c1", "c2"]
+
+    def test_answer(self, client):
+        client, _ = client
+
+        body = client.post("/answer", json={"query": "hooks", "k": 1}).json()
+
+        assert body["answer"] == body["chunks"][0]["text"]
+
+    def test_metrics(self, client):
+        client, _ = client
+        client.post("/retrieve", json={"query": "hooks", "rerank": False})
+
+        metrics = client.get("/metrics").json()
+
+        assert metrics["latency_ms"]["retrieve"]["count"] == 1
+        assert metrics["queue_depth"] == {"retrieval": 0}
+        assert metrics["in_flight"] == 0
+        assert metrics["retrieval_batches"]["batches"] == 1
+
+    def test_rejects_empty_query(self, client):
+        client, _ = client
+        assert client.post("/retrieve", json={"query": ""}).status_code == 422
+
+
+class TestLatencyHistogram:
+    def test_cumulative_buckets(self):
+        histogram = LatencyHistogram([10, 100])
+        for ms in (5, 10, 50, 500):
+            histogram.observe(ms)
 
+        snapshot = histogram.snapshot()
 
-@pytest.mark.skip(reason="Implement tests covering your agent planning/execution.")
-def test_agent_controller_contract() -> None:
-    """Replace with behavioural tests for your controller."""
-    assert issubclass(BaseAgentController, object)
+        assert snapshot["buckets"] == {"10": 2, "100": 3, "+Inf": 4}
+        assert snapshot["count"] == 4
+        assert snapshot["mean_ms"] == pytest.approx(141.25)
@@ -0,0 +1,142 @@
+# tests/test_batching.py
+
+import asyncio
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from agentic_rag.retrieval.batching import AsyncMicroBatcher, MicroBatcher
+from agentic_rag.retrieval.reranker import BatchingCrossEncoderReranker
+from agentic_rag.retrieval.schemas import Query, RetrievedChunk
+
+
+def fake_predict(pairs):
+    """Score = length of the candidate text"""
+    return np.array([len(doc) for _, doc in pairs], dtype=np.float32)
+
+
+class TestMicroBatcher:
+    """Unit tests for MicroBatcher"""
+
+    def test_concurrent_requests_share_a_batch(self):
+        """Test that requests arriving within the wait window run as one predict call"""
+        predict = Mock(side_effect=fake_predict)
+        batcher = MicroBatcher(predict, max_batch_size=100, max_wait_ms=200)
+        start = threading.Barrier(4)
+
+        def call(n):
+            start.wait()
+            return batcher.predict([["q", "x" * n]] * n)
+
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(call, [1, 2, 3, 4]))
+        batcher.close()
+
+        assert predict.call_count == 1
+        assert [r.tolist() for r in results] == [[1.0], [2.0, 2.0], [3.0] * 3, [4.0] * 4]
+        assert batcher.mean_batch_size() == 10
+
+    def test_max_batch_size_bounds_batches(self):
+        predict = Mock(side_effect=fake_predict)
+        batcher = MicroBatcher(predict, max_batch_size=3, max_wait_ms=200)
+        start = threading.Barrier(3)
+
+        def call(_):
+            start.wait()
+            return batcher.predict([["q", "ab"], ["q", "abc"]])
+
+        with ThreadPoolExecutor(3) as pool:
+            results = list(pool.map(call, range(3)))
+        batcher.close()
+
+        assert predict.call_count == 3
+        assert all(len(call[0][0]) <= 3 for call in predict.call_args_list)
+        assert all(r.tolist() == [2.0, 3.0] for r in results)
+
+    def test_errors_reach_every_caller(self):
+        batcher = MicroBatcher(Mock(side_effect=RuntimeError("boom")), max_wait_ms=0)
+
+        with pytest.raises(RuntimeError, match="boom"):
+            batcher.predict([["q", "d"]])
+        batcher.close()
+
+    def test_empty_request(self):
+        predict = Mock()
+        assert MicroBatcher(predict).predict([]).size == 0
+        predict.assert_not_called()
+
+    def test_invalid_batch_size(self):
+        with pytest.raises(ValueError):
+            MicroBatcher(fake_predict, max_batch_size=0)
+
+
+class TestBatchingCrossEncoderReranker:
+    @patch('agentic_rag.retrieval.reranker.load_cross_encoder')
+    def test_concurrent_reranks_batch_predict(self, mock_load):
+        mock_model = Mock()
+        mock_model.predict.side_effect = fake_predict
+        mock_load.return_value = mock_model
+        reranker = BatchingCrossEncoderReranker("ce")
+        reranker.batcher.max_wait = 0.2
+        start = threading.Barrier(2)
+
+        def rerank(text):
+            start.wait()
+            candidates = [RetrievedChunk(chunk_id=f"{text}{i}", text="x" * i, score=0.0) for i in range(1, 4)]
+            return reranker.rerank(Query(text=text), candidates, k=2)
+
+        with ThreadPoolExecutor(2) as pool:
+            first, second = pool.map(rerank, ["a", "b"])
+        reranker.close()
+
+        assert mock_model.predict.call_count == 1
+        assert [c.chunk_id for c in first] == ["a3", "a2"]
+        assert [c.chunk_id for c in second] == ["b3", "b2"]
+        assert reranker.stats()["batches"] == 1
+
+    @patch('agentic_rag.retrieval.reranker.load_cross_encoder')
+    def test_pickles_with_fresh_batcher(self, mock_load):
+        reranker = BatchingCrossEncoderReranker("ce")
+
+        clone = pickle.loads(pickle.dumps(reranker))
+
+        assert clone.batcher is not reranker.batcher
+        assert clone.batcher.max_batch_size == reranker.max_batch_size
+
+
+class TestAsyncMicroBatcher:
+    """Unit tests for the event-loop batcher used by the HTTP server"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_items_share_a_batch(self):
+        calls = []
+
+        async def double(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = AsyncMicroBatcher(double, max_batch_size=10, max_wait_ms=50)
+
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(4)))
+        await batcher.close()
+
+        assert results == [0, 2, 4, 6]
+        assert calls == [[0, 1, 2, 3]]
+        assert batcher.mean_batch_size() == 4
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_item(self):
+        async def fail(items):
+            raise RuntimeError("boom")
+
+        batcher = AsyncMicroBatcher(fail, max_batch_size=2, max_wait_ms=50)
+
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+        await batcher.close()
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert batcher.pending() == 0
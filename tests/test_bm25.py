@@ -0,0 +1,88 @@
+# tests/test_bm25.py
+
+import math
+import pickle
+
+import numpy as np
+import pytest
+
+from agentic_rag.retrieval.bm25 import BM25Index, BM25IndexBuilder, build_bm25_index, tokenize
+
+DOCS = [
+    ("c0", "Use wp_enqueue_scripts to add CSS to a theme", {"original_id": "d0"}),
+    ("c1", "The loop and the_content filter", {"original_id": "d1"}),
+    ("c2", "Add custom CSS CSS CSS in the customizer", {"original_id": "d2"}),
+    ("c3", "Fix error 404 on permalinks", {"original_id": "d3"}),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    build_bm25_index(DOCS, tmp_path / "bm25")
+    return BM25Index(tmp_path / "bm25")
+
+
+def brute_force(query, k1=1.2, b=0.75):
+    docs = [tokenize(text) for _, text, _ in DOCS]
+    avgdl = sum(map(len, docs)) / len(docs)
+    scores = []
+    for tokens in docs:
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in d for d in docs)
+            tf = tokens.count(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avgdl))
+        scores.append(score)
+    return scores
+
+
+class TestBM25Index:
+    """Unit tests for the memory-mapped BM25 index"""
+
+    def test_tokenize_keeps_identifiers(self):
+        assert tokenize("Hook wp_enqueue_scripts, error 404!") == ["hook", "wp_enqueue_scripts", "error", "404"]
+
+    def test_scores_match_reference_bm25(self, index):
+        expected = brute_force("add css theme")
+
+        results = index.search("add css theme", k=4)
+
+        assert [doc for doc, _ in results] == [0, 2]  # only documents sharing a term
+        for doc_id, score in results:
+            assert score == pytest.approx(expected[doc_id], rel=1e-5)
+
+    def test_identifier_query(self, index):
+        chunks = index.search_chunks("wp_enqueue_scripts", k=3)
+
+        assert [c.chunk_id for c in chunks] == ["c0"]
+        assert chunks[0].text == DOCS[0][1]
+        assert chunks[0].metadata == {"original_id": "d0"}
+
+    def test_top_k_truncates(self, index):
+        assert len(index.search("the css 404", k=2)) == 2
+
+    def test_unknown_terms(self, index):
+        assert index.search("nonexistentterm", k=5) == []
+
+    def test_arrays_are_memory_mapped(self, index):
+        assert isinstance(index.postings_doc, np.memmap)
+        assert index.postings_tf.dtype == np.uint16
+
+    def test_pickle_reopens(self, index):
+        clone = pickle.loads(pickle.dumps(index))
+        assert clone.search("404", k=1) == index.search("404", k=1)
+
+    def test_rewrite_replaces_index(self, tmp_path):
+        path = tmp_path / "bm25"
+        build_bm25_index(DOCS, path)
+        build_bm25_index(DOCS[:1], path)
+
+        assert len(BM25Index(path)) == 1
+        assert not path.with_name("bm25.tmp").exists()
+
+    def test_empty_index(self, tmp_path):
+        BM25IndexBuilder(tmp_path / "bm25").write()
+        assert BM25Index(tmp_path / "bm25").search("css", k=3) == []
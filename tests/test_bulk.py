@@ -0,0 +1,121 @@
+# tests/test_bulk.py
+
+import struct
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from agentic_rag.storage.bulk import (
+    copy_documents,
+    delete_orphans,
+    encode_document_rows,
+    encode_vectors,
+)
+
+
+class TestEncodeVectors:
+    """Unit tests for pgvector binary encoding"""
+
+    def test_vector_layout(self):
+        """Test dim header followed by big-endian float32 values"""
+        encoded = encode_vectors(np.array([[1.0, -2.5, 0.0]], dtype=np.float32))
+
+        assert len(encoded) == 1
+        dim, unused = struct.unpack("!hh", encoded[0][:4])
+        assert (dim, unused) == (3, 0)
+        assert struct.unpack("!3f", encoded[0][4:]) == (1.0, -2.5, 0.0)
+
+    def test_accepts_python_lists(self):
+        """Test that nested lists are encoded the same as arrays"""
+        as_list = encode_vectors([[0.5, 0.25], [1.0, 2.0]])
+        as_array = encode_vectors(np.array([[0.5, 0.25], [1.0, 2.0]], dtype=np.float32))
+
+        assert as_list == as_array
+
+    def test_rejects_1d_input(self):
+        """Test that a single flat vector is rejected"""
+        with pytest.raises(ValueError):
+            encode_vectors(np.zeros(4, dtype=np.float32))
+
+
+class TestEncodeDocumentRows:
+    """Unit tests for binary COPY framing"""
+
+    def test_header_rows_and_trailer(self):
+        """Test that the stream is framed as a valid binary COPY payload"""
+        created = datetime(2000, 1, 1, 0, 0, 1, tzinfo=timezone.utc)
+        rows = [("doc1_0", "doc1", "text", {"chunk_index": 0}, created)]
+        vectors = encode_vectors([[1.0, 2.0]])
+
+        blocks = list(encode_document_rows(rows, vectors))
+
+        assert blocks[0].startswith(b"PGCOPY\n\xff\r\n\x00")
+        assert blocks[-1] == struct.pack("!h", -1)
+        row = blocks[1]
+        assert struct.unpack("!h", row[:2])[0] == 6
+        # last field is timestamptz: one second after the Postgres epoch
+        assert struct.unpack("!iq", row[-12:]) == (8, 1_000_000)
+
+    def test_naive_timestamps_are_utc(self):
+        """Test that naive datetimes are encoded as UTC"""
+        naive = datetime(2000, 1, 1, 0, 0, 2)
+        aware = naive.replace(tzinfo=timezone.utc)
+        vectors = encode_vectors([[0.0]])
+
+        naive_row = list(encode_document_rows([("a", "a", "", {}, naive)], vectors))[1]
+        aware_row = list(encode_document_rows([("a", "a", "", {}, aware)], vectors))[1]
+
+        assert naive_row == aware_row
+
+
+class TestCopyDocuments:
+    """Unit tests for copy_documents"""
+
+    def test_copies_into_staging_and_merges(self):
+        """Test staging table creation, COPY and a single merge statement"""
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock()
+        mock_copy = MagicMock()
+        mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+        mock_cursor.copy.return_value.__enter__.return_value = mock_copy
+        rows = [("doc1_0", "doc1", "text", {}, datetime(2024, 1, 1))]
+
+        copy_documents(mock_conn, rows, np.ones((1, 4), dtype=np.float32))
+
+        executed = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        assert "CREATE TEMP TABLE" in executed[0]
+        assert "ON CONFLICT (chunk_id)" in executed[-1]
+        assert "FORMAT BINARY" in mock_cursor.copy.call_args[0][0]
+        assert mock_copy.write.call_count == 3  # header, one row, trailer
+
+    def test_length_mismatch(self):
+        """Test that rows and embeddings must align"""
+        with pytest.raises(ValueError):
+            copy_documents(MagicMock(), [], np.ones((1, 4), dtype=np.float32))
+
+
+class TestDeleteOrphans:
+    """Unit tests for delete_orphans"""
+
+    def test_no_work(self):
+        """Test that nothing is executed when there are no orphans"""
+        mock_conn = MagicMock()
+
+        assert delete_orphans(mock_conn, [], {}) == 0
+        mock_conn.cursor.return_value.__enter__.return_value.execute.assert_not_called()
+
+    def test_deletes_removed_and_shrunk(self):
+        """Test one set-based statement per orphan kind"""
+        mock_conn = MagicMock()
+        mock_cursor = MagicMock(rowcount=2)
+        mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+
+        deleted = delete_orphans(mock_conn, ["a", "b"], {"c": 1})
+
+        assert deleted == 4
+        first, second = mock_cursor.execute.call_args_list
+        assert first[0][1] == (["a", "b"],)
+        assert "unnest" in second[0][0]
+        assert second[0][1] == (["c"], [1])
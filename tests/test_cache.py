@@ -0,0 +1,45 @@
+# tests/test_cache.py
+
+import pickle
+
+from agentic_rag.utils.cache import CacheStats, SQLiteStore
+
+
+class TestSQLiteStore:
+    """Unit tests for the shared SQLite disk tier"""
+
+    def test_round_trip_per_namespace(self, tmp_path):
+        store = SQLiteStore(tmp_path / "store.sqlite3", "values_table", "REAL")
+        store.put_many("a", [(b"k1", 1.0), (b"k2", 2.0)])
+        store.put_many("b", [(b"k1", 9.0)])
+
+        assert store.get_many("a", [b"k1", b"k2", b"k3"]) == {b"k1": 1.0, b"k2": 2.0}
+        assert store.get_many("b", [b"k1"]) == {b"k1": 9.0}
+        store.close()
+
+    def test_lookups_larger_than_one_statement(self, tmp_path):
+        store = SQLiteStore(tmp_path / "store.sqlite3", "values_table")
+        keys = [i.to_bytes(4, "big") for i in range(1200)]
+        store.put_many("a", [(k, k) for k in keys])
+
+        assert len(store.get_many("a", keys)) == 1200
+        store.close()
+
+    def test_pickled_copy_reopens_the_file(self, tmp_path):
+        store = SQLiteStore(tmp_path / "store.sqlite3", "values_table")
+        store.put_many("a", [(b"k", b"v")])
+
+        copy = pickle.loads(pickle.dumps(store))
+
+        assert copy.get_many("a", [b"k"]) == {b"k": b"v"}
+        store.close()
+        copy.close()
+
+
+def test_cache_stats_hit_rate_survives_pickling():
+    stats = CacheStats()
+    stats.hits, stats.disk_hits, stats.misses = 2, 1, 1
+
+    copy = pickle.loads(pickle.dumps(stats))
+
+    assert copy.stats() == {"hits": 2, "disk_hits": 1, "misses": 1, "hit_rate": 0.75}
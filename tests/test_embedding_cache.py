@@ -0,0 +1,90 @@
+# tests/test_embedding_cache.py
+
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from agentic_rag.embeddings.cache import EmbeddingCache, text_key
+
+
+def fake_embed(texts):
+    """Deterministic 3-d embedding: (len, first char code, 1)"""
+    return np.array([[len(t), ord(t[0]) if t else 0, 1] for t in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = EmbeddingCache(tmp_path / "cache.sqlite3", "model-a")
+    yield c
+    c.close()
+
+
+class TestEmbeddingCache:
+    """Unit tests for EmbeddingCache"""
+
+    def test_first_call_embeds_everything(self, cache):
+        """Test that a cold cache calls the model for every text"""
+        embed_fn = Mock(side_effect=fake_embed)
+
+        result = cache.embed(["alpha", "beta"], embed_fn)
+
+        embed_fn.assert_called_once_with(["alpha", "beta"])
+        np.testing.assert_array_equal(result, fake_embed(["alpha", "beta"]))
+        assert cache.misses == 2
+
+    def test_only_misses_are_embedded(self, cache):
+        """Test that cached texts skip the model and order is preserved"""
+        cache.embed(["alpha", "beta"], fake_embed)
+        embed_fn = Mock(side_effect=fake_embed)
+
+        result = cache.embed(["beta", "gamma", "alpha"], embed_fn)
+
+        embed_fn.assert_called_once_with(["gamma"])
+        np.testing.assert_array_equal(result, fake_embed(["beta", "gamma", "alpha"]))
+
+    def test_fully_cached_batch_skips_model(self, cache):
+        """Test that a repeat batch never calls the model"""
+        cache.embed(["alpha"], fake_embed)
+        embed_fn = Mock(side_effect=fake_embed)
+
+        cache.embed(["alpha"], embed_fn)
+
+        embed_fn.assert_not_called()
+        assert cache.hit_rate() == 0.5
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that vectors survive reopening the cache file"""
+        path = tmp_path / "cache.sqlite3"
+        first = EmbeddingCache(path, "model-a")
+        first.embed(["alpha"], fake_embed)
+        first.close()
+
+        second = EmbeddingCache(path, "model-a")
+        embed_fn = Mock(side_effect=fake_embed)
+        second.embed(["alpha"], embed_fn)
+        second.close()
+
+        embed_fn.assert_not_called()
+
+    def test_keyed_by_model(self, tmp_path):
+        """Test that a different model name does not reuse vectors"""
+        path = tmp_path / "cache.sqlite3"
+        EmbeddingCache(path, "model-a").embed(["alpha"], fake_embed)
+        embed_fn = Mock(side_effect=fake_embed)
+
+        EmbeddingCache(path, "model-b").embed(["alpha"], embed_fn)
+
+        embed_fn.assert_called_once()
+
+    def test_output_dtype(self, tmp_path):
+        """Test that results use the configured dtype for hits and misses"""
+        cache = EmbeddingCache(tmp_path / "c.sqlite3", "m", dtype="float16")
+        cache.embed(["alpha"], fake_embed)
+
+        assert cache.embed(["alpha", "beta"], fake_embed).dtype == np.float16
+
+
+def test_text_key_normalizes_whitespace():
+    assert text_key("a  b\n c") == text_key("a b c")
+    assert text_key("a b") != text_key("ab")
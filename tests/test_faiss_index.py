@@ -0,0 +1,129 @@
+# tests/test_faiss_index.py
+
+import pickle
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from agentic_rag.retrieval.chunk_store import ChunkStore
+from agentic_rag.retrieval.faiss_index import FaissRetriever, build_faiss_index, to_distances
+from agentic_rag.retrieval.schemas import AnnSearchParams, Query
+from agentic_rag.settings import get_settings
+
+
+def _vectors(n=300, dim=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _rows(vectors):
+    return [(f"c{i}", f"text {i}", {"original_id": f"d{i}"}, v) for i, v in enumerate(vectors)]
+
+
+def _settings(**overrides):
+    settings = get_settings()
+    return settings.model_copy(update={"vector_store": settings.vector_store.model_copy(update=overrides)})
+
+
+class TestBuild:
+    def test_writes_index_and_sidecar(self, tmp_path):
+        vectors = _vectors(50)
+        assert build_faiss_index(_rows(vectors), tmp_path / "faiss", kind="hnsw", metric="cosine") == 50
+
+        store = ChunkStore(tmp_path / "faiss")
+        assert len(store) == 50
+        assert store.get(7) == ("c7", "text 7", {"original_id": "d7"})
+        assert not (tmp_path / "faiss.tmp").exists()
+
+    def test_empty_input_rejected(self, tmp_path):
+        with pytest.raises(ValueError, match="No embeddings"):
+            build_faiss_index([], tmp_path / "faiss", kind="hnsw")
+
+    def test_distances_match_pgvector(self):
+        raw = np.array([[0.8, 4.0]])
+        assert to_distances("cosine", raw)[0, 0] == pytest.approx(0.2)
+        assert to_distances("l2", raw)[0, 1] == pytest.approx(2.0)
+        assert to_distances("inner_product", raw)[0, 0] == pytest.approx(-0.8)
+
+
+class TestFaissRetriever:
+    @pytest.fixture
+    def vectors(self):
+        return _vectors()
+
+    @pytest.fixture(autouse=True)
+    def embed(self, vectors):
+        # query "q<i>" embeds to the i-th indexed vector
+        with patch('agentic_rag.retrieval.faiss_index.embed_batch',
+                   side_effect=lambda texts: vectors[[int(t[1:]) for t in texts]]):
+            yield
+
+    def test_hnsw_finds_own_vector(self, tmp_path, vectors):
+        build_faiss_index(_rows(vectors), tmp_path / "faiss", kind="hnsw", metric="cosine")
+        retriever = FaissRetriever(tmp_path / "faiss")
+
+        results = retriever.search(Query(text="q12"), k=3)
+
+        assert results[0].chunk_id == "c12"
+        assert results[0].score == pytest.approx(0.0, abs=1e-5)
+        assert results[0].metadata == {"original_id": "d12"}
+        assert [r.score for r in results] == sorted(r.score for r in results)
+
+    def test_search_many_matches_search(self, tmp_path, vectors):
+        build_faiss_index(_rows(vectors), tmp_path / "faiss", kind="hnsw", metric="cosine")
+        retriever = FaissRetriever(tmp_path / "faiss")
+        queries = [Query(text="q1"), Query(text="q2", ann=AnnSearchParams(exact=True)), Query(text="q3")]
+
+        batched = retriever.search_many(queries, k=4)
+
+        assert [[c.chunk_id for c in hits] for hits in batched] == [
+            [c.chunk_id for c in retriever.search(q, k=4)] for q in queries
+        ]
+
+    def test_ivfpq_with_exact_probe(self, tmp_path, vectors):
+        settings = _settings(faiss_ivf_lists=4, faiss_pq_m=4, faiss_pq_bits=4, faiss_train_size=200)
+        with patch('agentic_rag.retrieval.faiss_index.get_settings', return_value=settings):
+            build_faiss_index(_rows(vectors), tmp_path / "faiss", kind="ivfpq", metric="cosine")
+            retriever = FaissRetriever(tmp_path / "faiss")
+            assert retriever.search_params(AnnSearchParams(exact=True), 5) == ("nprobe", 4)
+
+            results = retriever.search(Query(text="q5", ann=AnnSearchParams(exact=True)), k=5)
+
+        assert "c5" in [c.chunk_id for c in results]
+
+    def test_ivfpq_rescores_shortlist(self, tmp_path, vectors):
+        settings = _settings(faiss_ivf_lists=4, faiss_pq_m=4, faiss_pq_bits=4, faiss_train_size=200)
+        with patch('agentic_rag.retrieval.faiss_index.get_settings', return_value=settings):
+            build_faiss_index(_rows(vectors), tmp_path / "faiss", kind="ivfpq", metric="cosine")
+            retriever = FaissRetriever(tmp_path / "faiss")
+
+            results = retriever.search(Query(text="q9", ann=AnnSearchParams(exact=True, rescore_factor=8)), k=3)
+            footprint = retriever.footprint()
+
+        # exact float distances, so the query's own vector is first at distance 0
+        assert results[0].chunk_id == "c9"
+        assert results[0].score == pytest.approx(0.0, abs=1e-5)
+        assert [r.score for r in results] == sorted(r.score for r in results)
+        assert footprint["vectors"] == len(vectors)
+        assert footprint["index_bytes"] < footprint["float32_bytes"]
+
+    def test_rejects_index_from_other_model(self, tmp_path, vectors):
+        build_faiss_index(_rows(vectors), tmp_path / "faiss", kind="hnsw", metric="cosine")
+        retriever = FaissRetriever(tmp_path / "faiss")
+        with patch('agentic_rag.retrieval.faiss_index.embedding_cache_key', return_value="other-model"):
+            with pytest.raises(ValueError, match="export-faiss"):
+                retriever.warmup()
+
+    def test_pickles_without_index(self, tmp_path, vectors):
+        build_faiss_index(_rows(vectors), tmp_path / "faiss", kind="hnsw", metric="cosine")
+        retriever = FaissRetriever(tmp_path / "faiss")
+        retriever.warmup()
+
+        clone = pickle.loads(pickle.dumps(retriever))
+
+        assert clone._index is None
+        clone.warmup()
+        assert clone._index.ntotal == len(vectors)
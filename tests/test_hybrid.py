@@ -0,0 +1,82 @@
+# tests/test_hybrid.py
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from agentic_rag.retrieval.bm25 import BM25Index, build_bm25_index
+from agentic_rag.retrieval.hybrid import HybridRetriever, reciprocal_rank_fusion, weighted_fusion
+from agentic_rag.retrieval.schemas import Query, RetrievedChunk
+
+
+def _hits(*pairs):
+    return [RetrievedChunk(chunk_id=c, text=c, score=s, metadata={"original_id": c}) for c, s in pairs]
+
+
+class TestFusion:
+    def test_rrf_rewards_agreement(self):
+        vector = _hits(("a", 0.1), ("b", 0.2), ("c", 0.3))
+        lexical = _hits(("c", 9.0), ("b", 5.0), ("d", 1.0))
+
+        fused = reciprocal_rank_fusion([vector, lexical], k=3)
+
+        assert [c.chunk_id for c in fused] == ["c", "b", "a"]
+        assert fused[0].score == pytest.approx(1 / 62 + 1 / 60)
+
+    def test_weighted_flips_distances(self):
+        vector = _hits(("a", 0.1), ("b", 0.5))   # a is closer
+        lexical = _hits(("b", 2.0), ("c", 1.0))
+
+        fused = weighted_fusion(vector, lexical, k=3, vector_weight=0.5)
+
+        assert {c.chunk_id: c.score for c in fused} == pytest.approx({"a": 0.5, "b": 0.5, "c": 0.0})
+
+    def test_weighted_single_hit_list_counts_fully(self):
+        vector = _hits(("a", 0.1), ("b", 0.5))
+        lexical = _hits(("b", 3.0))
+
+        fused = weighted_fusion(vector, lexical, k=2, vector_weight=0.5)
+
+        assert {c.chunk_id: c.score for c in fused} == pytest.approx({"a": 0.5, "b": 0.5})
+
+    def test_weighted_vector_only(self):
+        fused = weighted_fusion(_hits(("a", 0.1), ("b", 0.5)), [], k=1, vector_weight=1.0)
+        assert [c.chunk_id for c in fused] == ["a"]
+
+
+class TestHybridRetriever:
+    @pytest.fixture
+    def index(self, tmp_path):
+        build_bm25_index(
+            [("x", "wp_enqueue_scripts hook", {"original_id": "x"}), ("a", "styles", {"original_id": "a"})],
+            tmp_path / "bm25",
+        )
+        return BM25Index(tmp_path / "bm25")
+
+    def test_lexical_hit_joins_vector_results(self, index):
+        vector = Mock()
+        vector.search.return_value = _hits(("a", 0.1), ("b", 0.2))
+        retriever = HybridRetriever(vector=vector, index=index)
+
+        results = retriever.search(Query(text="wp_enqueue_scripts"), k=3)
+
+        vector.search.assert_called_once()
+        assert {c.chunk_id for c in results} == {"a", "b", "x"}
+        assert next(c for c in results if c.chunk_id == "x").metadata == {"original_id": "x"}
+
+    def test_search_many_batches_vector_side(self, index):
+        vector = Mock()
+        vector.search_many.return_value = [_hits(("a", 0.1)), _hits(("b", 0.1))]
+        retriever = HybridRetriever(vector=vector, index=index)
+
+        results = retriever.search_many([Query(text="styles"), Query(text="hook")], k=2)
+
+        vector.search_many.assert_called_once()
+        assert [c.chunk_id for c in results[0]] == ["a"]
+        assert [c.chunk_id for c in results[1]] == ["b", "x"]  # tie keeps vector-first order
+
+    def test_missing_index_explains_fix(self, tmp_path):
+        retriever = HybridRetriever(vector=Mock())
+        with patch('agentic_rag.retrieval.hybrid.bm25_index_path', return_value=tmp_path / "none"):
+            with pytest.raises(FileNotFoundError, match="build_bm25_index"):
+                retriever.warmup()
@@ -0,0 +1,130 @@
+# tests/test_index.py
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from agentic_rag.storage.index import (
+    ann_order_by,
+    create_embedding_index,
+    get_metric,
+    uses_ann_index,
+)
+
+
+def _conn(fetchone):
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_cursor.fetchone.side_effect = fetchone
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    return mock_conn, mock_cursor
+
+
+class TestDistanceMetrics:
+    """Operator and operator class must agree for the planner to use the index"""
+
+    @pytest.mark.parametrize("name, operator, opclass", [
+        ("cosine", "<=>", "vector_cosine_ops"),
+        ("l2", "<->", "vector_l2_ops"),
+        ("inner_product", "<#>", "vector_ip_ops"),
+    ])
+    def test_metric_mapping(self, name, operator, opclass):
+        metric = get_metric(name)
+        assert (metric.operator, metric.opclass) == (operator, opclass)
+
+    def test_unknown_metric(self):
+        with pytest.raises(ValueError):
+            get_metric("hamming")
+
+
+class TestCreateEmbeddingIndex:
+    """Unit tests for create_embedding_index"""
+
+    def test_creates_missing_index(self):
+        """Test that a missing index is built with the metric's opclass"""
+        mock_conn, mock_cursor = _conn([None])
+
+        create_embedding_index(mock_conn, "l2")
+
+        ddl = mock_cursor.execute.call_args[0][0]
+        assert "USING hnsw (embedding vector_l2_ops)" in ddl
+
+    def test_keeps_matching_index(self):
+        """Test that an index for the same metric is left alone"""
+        mock_conn, mock_cursor = _conn([("CREATE INDEX ... USING hnsw (embedding vector_cosine_ops)",)])
+
+        create_embedding_index(mock_conn, "cosine")
+
+        assert mock_cursor.execute.call_count == 1  # only the pg_indexes lookup
+
+    def test_rebuilds_mismatched_index(self):
+        """Test that an index for another metric is dropped and rebuilt"""
+        mock_conn, mock_cursor = _conn([("CREATE INDEX ... USING hnsw (embedding vector_cosine_ops)",)])
+
+        create_embedding_index(mock_conn, "inner_product")
+
+        executed = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        assert any("DROP INDEX" in sql for sql in executed)
+        assert "vector_ip_ops" in executed[-1]
+
+
+class TestCompressedIndex:
+    """Compressed indexes are expression indexes the ORDER BY must repeat"""
+
+    def test_halfvec_index(self):
+        mock_conn, mock_cursor = _conn([None])
+
+        create_embedding_index(mock_conn, "cosine", compression="halfvec", dim=384)
+
+        ddl = mock_cursor.execute.call_args[0][0]
+        assert "USING hnsw ((embedding::halfvec(384)) halfvec_cosine_ops)" in ddl
+        assert "embedding::halfvec(384) <=>" in ann_order_by("cosine", "halfvec", 384)
+
+    def test_binary_index(self):
+        mock_conn, mock_cursor = _conn([None])
+
+        create_embedding_index(mock_conn, "l2", compression="binary", dim=384)
+
+        ddl = mock_cursor.execute.call_args[0][0]
+        assert "(binary_quantize(embedding)::bit(384)) bit_hamming_ops" in ddl
+
+    def test_switching_to_compression_rebuilds(self):
+        mock_conn, mock_cursor = _conn([("CREATE INDEX ... USING hnsw (embedding vector_cosine_ops)",)])
+
+        create_embedding_index(mock_conn, "cosine", compression="halfvec")
+
+        executed = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        assert any("DROP INDEX" in sql for sql in executed)
+        assert "halfvec_cosine_ops" in executed[-1]
+
+    def test_unknown_compression(self):
+        with pytest.raises(ValueError):
+            ann_order_by("cosine", "pq")
+
+
+class TestUsesAnnIndex:
+    """Unit tests for the query plan check"""
+
+    def test_index_scan_detected(self):
+        """Test that a nested Index Scan on the embedding index is found"""
+        plan = [{"Plan": {"Node Type": "Limit", "Plans": [
+            {"Node Type": "Index Scan", "Index Name": "documents_embedding_idx"}
+        ]}}]
+        mock_conn, mock_cursor = _conn([("[0.1,0.2]",), (plan,)])
+
+        assert uses_ann_index(mock_conn, "cosine") is True
+        assert "<=>" in mock_cursor.execute.call_args[0][0]
+
+    def test_seq_scan_detected(self):
+        """Test that a sequential scan plan is reported"""
+        plan = json.loads('[{"Plan": {"Node Type": "Limit", "Plans": [{"Node Type": "Seq Scan"}]}}]')
+        mock_conn, _ = _conn([("[0.1,0.2]",), (plan,)])
+
+        assert uses_ann_index(mock_conn, "l2") is False
+
+    def test_empty_table(self):
+        """Test that an empty table skips the check"""
+        mock_conn, _ = _conn([None])
+
+        assert uses_ann_index(mock_conn) is None
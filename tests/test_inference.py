@@ -0,0 +1,105 @@
+# tests/test_inference.py
+
+import sys
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from agentic_rag.utils import inference
+from agentic_rag.utils.inference import backend_tag, embedding_parity, load_transformer, score_parity
+
+
+@pytest.fixture
+def inference_settings(tmp_path):
+    config = SimpleNamespace(backend="torch", quantization="avx2", onnx_cache_dir=tmp_path / "onnx")
+    with patch("agentic_rag.utils.inference.get_settings") as mock_settings:
+        mock_settings.return_value.inference = config
+        yield config
+
+
+class FakeModel:
+    """Stands in for SentenceTransformer/CrossEncoder; records construction and export"""
+
+    instances = []
+
+    def __init__(self, name, **kwargs):
+        self.name, self.kwargs = name, kwargs
+        FakeModel.instances.append(self)
+
+    def save_pretrained(self, path):
+        (inference.Path(path) / "onnx").mkdir(parents=True, exist_ok=True)
+        (inference.Path(path) / "onnx" / "model.onnx").write_bytes(b"fp32")
+
+
+def fake_quantize(model, config, path):
+    (inference.Path(path) / "onnx" / f"model_qint8_{config}.onnx").write_bytes(b"int8")
+
+
+class TestBackendTag:
+    def test_torch_has_no_tag(self, inference_settings):
+        assert backend_tag() == ""
+
+    def test_onnx_tags(self, inference_settings):
+        assert backend_tag("onnx") == "#onnx"
+        inference_settings.quantization = "arm64"
+        assert backend_tag("onnx-int8") == "#onnx-int8-arm64"
+
+
+class TestLoadTransformer:
+    def setup_method(self):
+        FakeModel.instances = []
+
+    def test_torch_passthrough(self, inference_settings):
+        model = load_transformer(FakeModel, "org/model", device="cpu")
+
+        assert model.name == "org/model"
+        assert model.kwargs == {"device": "cpu"}
+
+    def test_int8_exports_once_then_loads_cached(self, inference_settings):
+        fake_st = SimpleNamespace(export_dynamic_quantized_onnx_model=Mock(side_effect=fake_quantize))
+        with patch.dict(sys.modules, {"sentence_transformers": fake_st}):
+            first = load_transformer(FakeModel, "org/model", backend="onnx-int8")
+            second = load_transformer(FakeModel, "org/model", backend="onnx-int8")
+
+        export_dir = inference_settings.onnx_cache_dir / "org--model"
+        assert (export_dir / "onnx" / "model_qint8_avx2.onnx").exists()
+        fake_st.export_dynamic_quantized_onnx_model.assert_called_once()
+        # one export-time model plus one load per call
+        assert [m.name for m in FakeModel.instances] == ["org/model", str(export_dir), str(export_dir)]
+        assert second.kwargs == {"backend": "onnx", "model_kwargs": {"file_name": "onnx/model_qint8_avx2.onnx"}}
+
+    def test_fp32_onnx_skips_quantization(self, inference_settings):
+        model = load_transformer(FakeModel, "org/model", backend="onnx")
+
+        assert model.kwargs["model_kwargs"] == {"file_name": "onnx/model.onnx"}
+
+
+class TestParity:
+    def test_embedding_parity(self):
+        reference = np.array([[1.0, 0.0], [0.0, 1.0]])
+        candidate = np.array([[2.0, 0.0], [1.0, 1.0]])
+
+        report = embedding_parity(reference, candidate)
+
+        assert report["min_cosine"] == pytest.approx(np.sqrt(0.5))
+        assert report["mean_cosine"] == pytest.approx((1 + np.sqrt(0.5)) / 2)
+
+    def test_score_parity(self):
+        report = score_parity(np.array([0.1, 0.5, 0.9]), np.array([0.15, 0.95, 0.9]))
+
+        assert report["max_abs_diff"] == pytest.approx(0.45)
+        assert report["order_agreement"] == pytest.approx(2 / 3)
+
+
+class TestCacheKeys:
+    def test_embedding_cache_key_includes_backend(self, inference_settings):
+        """Test that int8 vectors never share cache entries with fp32 ones"""
+        from agentic_rag.embeddings.model import embedding_cache_key
+
+        torch_key = embedding_cache_key("m")
+        inference_settings.backend = "onnx-int8"
+
+        assert embedding_cache_key("m") != torch_key
+        assert "#onnx-int8-avx2" in embedding_cache_key("m")
@@ -26,4 +26,101 @@ def test_clean_text_removes_html_and_normalizes_whitespace():
     assert "=>" in cleaned
     assert "NULL" in cleaned
     assert "Is there a best practice for that?" in cleaned
-    assert cleaned == cleaned.strip()
\ No newline at end of file
+    assert cleaned == cleaned.strip()
+
+
+def test_clean_text_matches_reference():
+    import random
+    import runpy
+    from pathlib import Path
+
+    benchmark = Path(__file__).resolve().parents[1] / "scripts" / "benchmark_clean_text.py"
+    clean_text_reference = runpy.run_path(str(benchmark))["clean_text_reference"]
+
+    rng = random.Random(0)
+    alphabet = [" ", "\t", "\n", "\r", "\x00", "a", "&amp;", "&#9;", "&#10;", "&#13;", "&nbsp;", "&"]
+    samples = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24))) for _ in range(20000)]
+
+    for text in samples:
+        assert clean_text(text) == clean_text_reference(text), repr(text)
+
+
+def _records(n):
+    from agentic_rag.data.types import RawRecord
+
+    return [
+        RawRecord(identifier=f"r{i}", title=f"Title {i}", body=" ".join(f"w{j}" for j in range(i * 40)))
+        for i in range(n)
+    ]
+
+
+def test_parallel_transform_matches_serial(monkeypatch, embedding_model_dir):
+    from agentic_rag.data import rag_pipeline
+    from agentic_rag.data.rag_pipeline import WordPressIngestionPipeline
+
+    # spawned workers receive these settings and the tokenizer through the pool initializer
+    monkeypatch.setattr(rag_pipeline.settings.vector_store, "embedding_model", str(embedding_model_dir))
+    monkeypatch.setattr(rag_pipeline.settings.chunking, "max_tokens", None)
+    monkeypatch.setattr(rag_pipeline.settings.chunking, "overlap", 2)
+    pipeline = WordPressIngestionPipeline()
+    serial = list(pipeline.transform(_records(30)))
+
+    monkeypatch.setattr(rag_pipeline.settings.ingestion, "transform_workers", 2)
+    monkeypatch.setattr(rag_pipeline.settings.ingestion, "transform_batch_size", 4)
+    parallel = list(pipeline.transform(iter(_records(30))))
+
+    assert [c.chunk_id for c in parallel] == [c.chunk_id for c in serial]
+    assert [c.text for c in parallel] == [c.text for c in serial]
+    assert len({c.chunk_id for c in parallel}) == len(parallel)
+    assert [c.metadata for c in parallel] == [c.metadata for c in serial]
+
+
+def test_transform_worker_uses_the_parent_token_budget(monkeypatch, wordpiece_tokenizer):
+    from unittest.mock import Mock
+
+    from agentic_rag.data import chunk_text, rag_pipeline
+    from agentic_rag.settings.schema import ChunkingConfig
+
+    # the initializer overwrites these; monkeypatch restores them afterwards
+    monkeypatch.setattr(rag_pipeline.settings, "chunking", rag_pipeline.settings.chunking)
+    monkeypatch.setattr(rag_pipeline.settings.vector_store, "embedding_model", "test/wordpiece")
+    monkeypatch.setattr(rag_pipeline, "_worker_budget", None)
+    monkeypatch.setattr(chunk_text, "max_seq_length", Mock(side_effect=AssertionError("model lookup in worker")))
+
+    rag_pipeline._init_transform_worker(ChunkingConfig(overlap=2), "test/wordpiece", wordpiece_tokenizer, 6)
+    chunks = rag_pipeline._chunk_records_in_worker(_records(3))
+
+    assert chunks
+    assert max(c.metadata["token_count"] for c in chunks) == 6
+
+
+@pytest.mark.parametrize("incremental, rebuilt", [(False, True), (True, False)])
+def test_index_is_rebuilt_only_on_full_loads(monkeypatch, tmp_path, incremental, rebuilt):
+    from unittest.mock import MagicMock, Mock, patch
+
+    from agentic_rag.data import rag_pipeline
+
+    options = {
+        "bulk_copy": True,
+        "rebuild_index": True,
+        "incremental": incremental,
+        "pipelined": False,
+        "build_bm25_index": False,
+        "embedding_cache": False,
+    }
+    for name, value in options.items():
+        monkeypatch.setattr(rag_pipeline.settings.ingestion, name, value)
+    pipeline = rag_pipeline.WordPressIngestionPipeline()
+    monkeypatch.setattr(pipeline, "load_raw", lambda raw_dir: iter(()))
+    monkeypatch.setattr(pipeline, "transform", lambda records: iter(()))
+    monkeypatch.setattr(pipeline, "_change_tracker", lambda output_dir: MagicMock())
+    monkeypatch.setattr(pipeline, "_finish_incremental", Mock())
+
+    with patch.object(rag_pipeline, "pooled_connection"), \
+            patch.object(rag_pipeline, "ensure_schema_once"), \
+            patch.object(rag_pipeline, "drop_embedding_index") as drop, \
+            patch.object(rag_pipeline, "create_embedding_index") as create:
+        pipeline.run(tmp_path, tmp_path / "out")
+
+    assert drop.called is rebuilt
+    assert create.called is rebuilt
@@ -0,0 +1,83 @@
+# tests/test_io.py
+
+import random
+
+import pytest
+
+from agentic_rag.utils.io import atomic_replace_dir, external_sort, read_jsonl, write_jsonl
+
+
+class TestExternalSort:
+    """Unit tests for external_sort"""
+
+    def test_matches_sorted_in_memory(self):
+        """Test that small inputs are sorted without spilling"""
+        rows = [{"_id": i} for i in [3, 1, 2]]
+
+        result = list(external_sort(rows, key=lambda r: r["_id"], run_size=10))
+
+        assert [r["_id"] for r in result] == [1, 2, 3]
+
+    def test_merges_spilled_runs(self, tmp_path):
+        """Test that multi-run inputs are k-way merged into one ordering"""
+        ids = [f"doc{i:04d}" for i in range(250)]
+        random.Random(7).shuffle(ids)
+        rows = [{"_id": i} for i in ids]
+
+        result = list(external_sort(rows, key=lambda r: r["_id"], run_size=16, tmp_dir=tmp_path))
+
+        assert [r["_id"] for r in result] == sorted(ids)
+
+    def test_sort_is_stable(self):
+        """Test that rows with equal keys keep input order across runs"""
+        rows = [{"_id": i % 3, "pos": i} for i in range(30)]
+
+        result = list(external_sort(rows, key=lambda r: r["_id"], run_size=4))
+
+        assert result == sorted(rows, key=lambda r: r["_id"])
+
+    def test_temp_runs_are_removed(self, tmp_path):
+        """Test that spilled run files are cleaned up after the merge"""
+        rows = [{"_id": i} for i in range(20, 0, -1)]
+
+        list(external_sort(rows, key=lambda r: r["_id"], run_size=5, tmp_dir=tmp_path))
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_invalid_run_size(self):
+        """Test that a non-positive run size is rejected"""
+        with pytest.raises(ValueError):
+            list(external_sort([], key=lambda r: r, run_size=0))
+
+
+def test_jsonl_round_trip(tmp_path):
+    path = tmp_path / "nested" / "rows.jsonl"
+    rows = [{"_id": "a", "text": "x"}, {"_id": "b", "text": "y"}]
+
+    write_jsonl(path, rows)
+
+    assert list(read_jsonl(path)) == rows
+
+
+class TestAtomicReplaceDir:
+    """Unit tests for atomic_replace_dir"""
+
+    def test_replaces_existing_directory(self, tmp_path):
+        path, tmp = tmp_path / "index", tmp_path / "index.tmp"
+        path.mkdir()
+        (path / "stale").write_text("old")
+        tmp.mkdir()
+        (tmp / "fresh").write_text("new")
+
+        atomic_replace_dir(tmp, path)
+
+        assert sorted(p.name for p in path.iterdir()) == ["fresh"]
+        assert not tmp.exists() and not (tmp_path / "index.old").exists()
+
+    def test_creates_missing_directory(self, tmp_path):
+        path, tmp = tmp_path / "index", tmp_path / "index.tmp"
+        tmp.mkdir()
+
+        atomic_replace_dir(tmp, path)
+
+        assert path.is_dir() and not tmp.exists()
@@ -0,0 +1,111 @@
+# tests/test_manifest.py
+
+from agentic_rag.data.manifest import (
+    ChangeTracker,
+    IngestManifest,
+    ManifestEntry,
+    ingest_fingerprint,
+    record_hash,
+)
+from agentic_rag.data.types import Chunk, RawRecord
+
+
+def _record(identifier, body="body"):
+    return RawRecord(identifier=identifier, title="t", body=body)
+
+
+def _chunks(record, n):
+    return [Chunk(chunk_id=f"{record.identifier}_{i}", record_id=record.identifier, text="x")
+            for i in range(n)]
+
+
+def _run(tracker, records, chunk_counts):
+    """Drive a tracker the way the pipeline does"""
+    passed = list(tracker.changed_records(records))
+    chunks = [c for r in passed for c in _chunks(r, chunk_counts[r.identifier])]
+    list(tracker.count_chunks(chunks))
+    return [r.identifier for r in passed]
+
+
+class TestChangeTracker:
+    """Unit tests for incremental change detection"""
+
+    def test_first_run_passes_everything(self):
+        """Test that an empty manifest treats all records as new"""
+        tracker = ChangeTracker(IngestManifest("fp"))
+
+        passed = _run(tracker, [_record("a"), _record("b")], {"a": 2, "b": 1})
+
+        assert passed == ["a", "b"]
+        assert tracker.current.entries["a"].chunk_count == 2
+        assert tracker.orphans() == ([], {})
+
+    def test_unchanged_records_are_skipped(self):
+        """Test that records with the same hash are not re-ingested"""
+        a, b = _record("a"), _record("b")
+        previous = IngestManifest("fp", {
+            "a": ManifestEntry(record_hash(a), 2),
+            "b": ManifestEntry("stale-hash", 3),
+        })
+        tracker = ChangeTracker(previous)
+
+        passed = _run(tracker, [a, b], {"b": 3})
+
+        assert passed == ["b"]
+        assert tracker.skipped == 1
+        assert tracker.current.entries["a"].chunk_count == 2
+
+    def test_orphans(self):
+        """Test vanished records and shrunk chunk counts are reported"""
+        b = _record("b", body="shorter")
+        previous = IngestManifest("fp", {
+            "a": ManifestEntry("h", 2),
+            "b": ManifestEntry("old", 5),
+        })
+        tracker = ChangeTracker(previous)
+
+        _run(tracker, [b], {"b": 2})
+
+        assert tracker.orphans() == (["a"], {"b": 2})
+
+    def test_fingerprint_change_reingests_all(self):
+        """Test that changed settings invalidate every entry"""
+        a = _record("a")
+        previous = IngestManifest(
+            "new-fp", {"a": ManifestEntry(record_hash(a), 1)}, source_fingerprint="old-fp"
+        )
+        tracker = ChangeTracker(previous)
+
+        assert _run(tracker, [a], {"a": 1}) == ["a"]
+
+
+class TestIngestManifest:
+    """Unit tests for manifest persistence"""
+
+    def test_round_trip(self, tmp_path):
+        """Test that saved entries load back under the same fingerprint"""
+        path = tmp_path / "manifest.json"
+        IngestManifest("fp", {"a": ManifestEntry("h", 3)}).save(path)
+
+        loaded = IngestManifest.load(path, "fp")
+
+        assert loaded.entries == {"a": ManifestEntry("h", 3)}
+        assert loaded.unchanged("a", "h")
+
+    def test_missing_file(self, tmp_path):
+        """Test that a missing manifest starts empty"""
+        assert IngestManifest.load(tmp_path / "nope.json", "fp").entries == {}
+
+    def test_fingerprint_mismatch_keeps_counts(self, tmp_path):
+        """Test that stale manifests still expose counts but report changes"""
+        path = tmp_path / "manifest.json"
+        IngestManifest("old", {"a": ManifestEntry("h", 3)}).save(path)
+
+        loaded = IngestManifest.load(path, "new")
+
+        assert loaded.entries["a"].chunk_count == 3
+        assert not loaded.unchanged("a", "h")
+
+
+def test_fingerprint_depends_on_settings():
+    assert ingest_fingerprint("model", 150, 20) != ingest_fingerprint("model", 150, 30)
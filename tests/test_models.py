@@ -0,0 +1,86 @@
+# tests/test_models.py
+
+import os
+import subprocess
+import sys
+import threading
+from unittest.mock import Mock, patch
+
+from agentic_rag.utils.models import ModelRegistry
+
+
+class TestModelRegistry:
+    """Unit tests for ModelRegistry"""
+
+    def test_loads_once_per_key(self):
+        """Test that the factory runs only on first use of a key"""
+        registry = ModelRegistry()
+        factory = Mock(return_value="model-a")
+
+        assert registry.get(("kind", "a"), factory) == "model-a"
+        assert registry.get(("kind", "a"), factory) == "model-a"
+        factory.assert_called_once()
+
+    def test_keys_are_independent(self):
+        """Test that different keys load different models"""
+        registry = ModelRegistry()
+
+        registry.get("a", lambda: 1)
+        registry.get("b", lambda: 2)
+
+        assert registry.loaded() == ["a", "b"]
+
+    def test_concurrent_first_use_loads_once(self):
+        """Test that racing callers share a single load"""
+        registry = ModelRegistry()
+        factory = Mock(return_value=object())
+        results = []
+
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.get("k", factory)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        factory.assert_called_once()
+        assert len({id(r) for r in results}) == 1
+
+    def test_clear(self):
+        """Test that clear forces a reload"""
+        registry = ModelRegistry()
+        factory = Mock(side_effect=[1, 2])
+
+        registry.get("k", factory)
+        registry.clear()
+
+        assert registry.get("k", factory) == 2
+
+
+class TestLazyLoading:
+    """Models must not be imported or loaded at module import time"""
+
+    def test_imports_do_not_load_torch(self):
+        """Test that CLI, retriever, reranker and pipeline imports stay light"""
+        code = (
+            "import sys\n"
+            "import agentic_rag.cli, agentic_rag.retrieval.retriever\n"
+            "import agentic_rag.retrieval.reranker, agentic_rag.data.rag_pipeline\n"
+            "heavy = {'torch', 'sentence_transformers'} & set(sys.modules)\n"
+            "assert not heavy, heavy\n"
+        )
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+        subprocess.run([sys.executable, "-c", code], check=True, env=env)
+
+    @patch('agentic_rag.retrieval.reranker.load_cross_encoder')
+    def test_reranker_defers_model_load(self, mock_load):
+        """Test that constructing a reranker does not load the model"""
+        from agentic_rag.retrieval.reranker import CrossEncoderReranker
+
+        reranker = CrossEncoderReranker(model_name="some/model")
+        mock_load.assert_not_called()
+
+        reranker.model
+        mock_load.assert_called_once_with("some/model")
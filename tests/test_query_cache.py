@@ -0,0 +1,134 @@
+# tests/test_query_cache.py
+
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from agentic_rag.embeddings.cache import EmbeddingCache
+from agentic_rag.embeddings.query_cache import QueryEmbeddingCache
+
+
+def fake_embed(texts):
+    """Deterministic 3-d embedding: (len, first char code, 1)"""
+    return np.array([[len(t), ord(t[0]) if t else 0, 1] for t in texts], dtype=np.float32)
+
+
+class TestQueryEmbeddingCache:
+    """Unit tests for QueryEmbeddingCache"""
+
+    def test_repeated_query_skips_model(self):
+        """Test that a repeated (whitespace-variant) query is served from memory"""
+        cache = QueryEmbeddingCache("model-a")
+        embed_fn = Mock(side_effect=fake_embed)
+
+        first = cache.embed(["add css"], embed_fn)
+        second = cache.embed(["add   css "], embed_fn)
+
+        embed_fn.assert_called_once_with(["add css"])
+        np.testing.assert_array_equal(first, second)
+        assert cache.hits == 1 and cache.misses == 1
+        assert cache.hit_rate() == 0.5
+
+    def test_mixed_batch_preserves_order(self):
+        cache = QueryEmbeddingCache("model-a")
+        cache.embed(["beta"], fake_embed)
+        embed_fn = Mock(side_effect=fake_embed)
+
+        result = cache.embed(["alpha", "beta", "gamma"], embed_fn)
+
+        embed_fn.assert_called_once_with(["alpha", "gamma"])
+        np.testing.assert_array_equal(result, fake_embed(["alpha", "beta", "gamma"]))
+
+    def test_repeated_text_in_batch_is_encoded_once(self):
+        cache = QueryEmbeddingCache("model-a")
+        embed_fn = Mock(side_effect=fake_embed)
+
+        result = cache.embed(["alpha", "beta", "alpha "], embed_fn)
+
+        embed_fn.assert_called_once_with(["alpha", "beta"])
+        np.testing.assert_array_equal(result, fake_embed(["alpha", "beta", "alpha"]))
+        assert cache.misses == 3
+
+    def test_disk_and_fresh_rows_share_the_encoder_dtype(self, tmp_path):
+        """Test that float32 disk rows are cast to a float16 encoder's dtype"""
+        path = tmp_path / "queries.sqlite3"
+        warm = QueryEmbeddingCache("model-a", disk=EmbeddingCache(path, "model-a"))
+        warm.embed(["alpha"], fake_embed)
+        warm.close()
+
+        cache = QueryEmbeddingCache("model-a", disk=EmbeddingCache(path, "model-a"), dtype="float16")
+        result = cache.embed(["alpha", "beta"], lambda texts: fake_embed(texts).astype(np.float16))
+        cache.close()
+
+        assert result.dtype == np.float16
+        assert cache.disk_hits == 1 and cache.misses == 1
+        assert cache.embed(["alpha"], fake_embed).dtype == np.float16  # memory hit
+
+    def test_lru_eviction_and_memory(self):
+        """Test that the least recently used entry is evicted and memory is tracked"""
+        cache = QueryEmbeddingCache("model-a", max_entries=2)
+        cache.embed(["a", "b"], fake_embed)
+        cache.embed(["a"], fake_embed)  # touch a, so b is oldest
+        cache.embed(["c"], fake_embed)
+
+        embed_fn = Mock(side_effect=fake_embed)
+        cache.embed(["a", "c"], embed_fn)
+        embed_fn.assert_not_called()
+        cache.embed(["b"], embed_fn)
+        embed_fn.assert_called_once_with(["b"])
+
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["memory_bytes"] == 2 * (3 * 4 + 16)  # float32 x3 + 16-byte key
+
+    def test_ttl_expiry(self):
+        cache = QueryEmbeddingCache("model-a", ttl=10)
+        embed_fn = Mock(side_effect=fake_embed)
+
+        with patch("agentic_rag.embeddings.query_cache.time.monotonic", side_effect=[0.0, 5.0, 20.0]):
+            cache.embed(["q"], embed_fn)
+            cache.embed(["q"], embed_fn)
+            cache.embed(["q"], embed_fn)
+
+        assert embed_fn.call_count == 2
+
+    def test_size_zero_disables_memory(self):
+        cache = QueryEmbeddingCache("model-a", max_entries=0)
+        embed_fn = Mock(side_effect=fake_embed)
+
+        cache.embed(["q"], embed_fn)
+        cache.embed(["q"], embed_fn)
+
+        assert embed_fn.call_count == 2
+        assert cache.stats()["entries"] == 0
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Test that a fresh process-level cache is warmed from the disk tier"""
+        path = tmp_path / "queries.sqlite3"
+        first = QueryEmbeddingCache("model-a", disk=EmbeddingCache(path, "model-a"))
+        first.embed(["alpha"], fake_embed)
+        first.close()
+
+        second = QueryEmbeddingCache("model-a", disk=EmbeddingCache(path, "model-a"))
+        embed_fn = Mock(side_effect=fake_embed)
+        result = second.embed(["alpha"], embed_fn)
+        second.close()
+
+        embed_fn.assert_not_called()
+        np.testing.assert_array_equal(result, fake_embed(["alpha"]))
+        assert second.disk_hits == 1
+
+    def test_pickle_drops_memory_tier(self, tmp_path):
+        """Test that process-pool copies start empty but keep the disk tier"""
+        import pickle
+
+        cache = QueryEmbeddingCache("model-a", disk=EmbeddingCache(tmp_path / "q.sqlite3", "model-a"))
+        cache.embed(["alpha"], fake_embed)
+
+        clone = pickle.loads(pickle.dumps(cache))
+        embed_fn = Mock(side_effect=fake_embed)
+        clone.embed(["alpha"], embed_fn)
+
+        embed_fn.assert_not_called()
+        assert clone.disk_hits == 1
@@ -2,7 +2,7 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 import numpy as np
 
-from agentic_rag.retrieval.reranker import CrossEncoderReranker
+from agentic_rag.retrieval.reranker import CascadeReranker, CrossEncoderReranker, lexical_overlap
 from agentic_rag.retrieval.schemas import Query, RetrievedChunk
 
 
@@ -36,7 +36,7 @@ def sample_candidates():
 
 
 class TestCrossEncoderReranker:
-    @patch('agentic_rag.retrieval.reranker.CrossEncoder')
+    @patch('agentic_rag.retrieval.reranker.load_cross_encoder')
     def test_rerank_basic(self, mock_cross_encoder_class, sample_query, sample_candidates):
         """Test basic reranking functionality"""
         # Mock the cross-encoder model
@@ -61,7 +61,7 @@ class TestCrossEncoderReranker:
         assert results[1].score == 0.6
         assert results[2].score == 0.3
     
-    @patch('agentic_rag.retrieval.reranker.CrossEncoder')
+    @patch('agentic_rag.retrieval.reranker.load_cross_encoder')
     def test_rerank_top_k(self, mock_cross_encoder_class, sample_query, sample_candidates):
         """Test that only top-k results are returned"""
         mock_model = MagicMock()
@@ -76,7 +76,7 @@ class TestCrossEncoderReranker:
         assert results[0].chunk_id == "doc3_0"
         assert results[1].chunk_id == "doc1_0"
     
-    @patch('agentic_rag.retrieval.reranker.CrossEncoder')
+    @patch('agentic_rag.retrieval.reranker.load_cross_encoder')
     def test_rerank_empty_candidates(self, mock_cross_encoder_class, sample_query):
         """Test reranking with no candidates"""
         mock_model = MagicMock()
@@ -88,7 +88,7 @@ class TestCrossEncoderReranker:
         assert len(results) == 0
         mock_model.predict.assert_not_called()
     
-    @patch('agentic_rag.retrieval.reranker.CrossEncoder')
+    @patch('agentic_rag.retrieval.reranker.load_cross_encoder')
     def test_rerank_creates_new_chunks(self, mock_cross_encoder_class, sample_query, sample_candidates):
         """Test that reranker creates new chunks, doesn't modify originals"""
         mock_model = MagicMock()
@@ -106,3 +106,71 @@ class TestCrossEncoderReranker:
         
         # Results should be different objects
         assert results[0] is not sample_candidates[0]
+
+
+def _length_scores(pairs):
+    return np.array([len(doc) for _, doc in pairs], dtype=np.float32)
+
+
+class TestCascadeReranker:
+    """Tests for two-stage (cheap first pass -> cross-encoder) reranking"""
+
+    def test_lexical_overlap(self):
+        scores = lexical_overlap("Add CSS theme", ["custom css for a theme", "javascript", ""])
+        assert scores.tolist() == pytest.approx([2 / 3, 0.0, 0.0])
+
+    @patch('agentic_rag.retrieval.reranker.load_cross_encoder')
+    def test_only_budget_reaches_cross_encoder(self, mock_load, sample_query):
+        mock_model = MagicMock()
+        mock_model.predict.side_effect = _length_scores
+        mock_load.return_value = mock_model
+        candidates = [
+            RetrievedChunk(chunk_id=f"c{i}", text=text, score=0.1 * i)
+            for i, text in enumerate([
+                "unrelated intro", "how to add css", "more filler", "css", "add css now please",
+            ])
+        ]
+        reranker = CascadeReranker("ce")
+        reranker.budget = 3
+
+        results = reranker.rerank(sample_query, candidates, k=2)
+
+        scored = [doc for _, doc in mock_model.predict.call_args[0][0]]
+        assert len(scored) == 3
+        # top retrieval hit survives via rank fusion even without shared terms
+        assert "unrelated intro" in scored
+        assert "more filler" not in scored
+        assert [r.chunk_id for r in results] == ["c4", "c0"]
+
+    @patch('agentic_rag.retrieval.reranker.load_cross_encoder')
+    def test_small_candidate_lists_skip_first_pass(self, mock_load, sample_query, sample_candidates):
+        mock_load.return_value.predict.side_effect = _length_scores
+        reranker = CascadeReranker("ce")
+        reranker.first_stage_scores = Mock()
+
+        reranker.rerank(sample_query, sample_candidates, k=3)
+
+        reranker.first_stage_scores.assert_not_called()
+
+    @patch('agentic_rag.retrieval.reranker.load_cross_encoder')
+    def test_cross_encoder_first_stage(self, mock_load, sample_query, sample_candidates):
+        small, large = MagicMock(), MagicMock()
+        small.predict.return_value = np.array([0.1, 0.9, 0.5])
+        large.predict.side_effect = _length_scores
+        mock_load.side_effect = lambda name: small if name == "ce-small" else large
+
+        with patch('agentic_rag.settings.get_settings') as mock_settings:
+            config = mock_settings.return_value.vector_store
+            config.rerank_cascade_first_stage = "cross_encoder"
+            config.rerank_cascade_model = "ce-small"
+            config.rerank_cascade_budget = 2
+            config.rerank_cache_size = 100
+            config.rerank_cache_path = None
+            reranker = CascadeReranker("ce")
+
+        reranker.rerank(sample_query, sample_candidates, k=2)
+
+        # the small model keeps candidates 1 and 2; only they reach the large model
+        scored = [doc for _, doc in large.predict.call_args[0][0]]
+        assert scored == [sample_candidates[1].text, sample_candidates[2].text]
+        assert small.predict.call_count == 1
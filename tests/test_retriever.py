@@ -4,9 +4,11 @@ from __future__ import annotations
 
 import pytest
 import json
-from unittest.mock import Mock, patch, MagicMock
+import numpy as np
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
+from agentic_rag.retrieval.base import BaseRetriever
 from agentic_rag.retrieval.retriever import PgVectorRetriever
-from agentic_rag.retrieval.schemas import Query, RetrievedChunk
+from agentic_rag.retrieval.schemas import AnnSearchParams, Query, RetrievedChunk
 
 
 @pytest.fixture
@@ -49,7 +51,7 @@ def mock_db_rows():
 class TestPgVectorRetriever:
     """Tests for PgVectorRetriever"""
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_basic(self, mock_embed_batch, mock_get_connection, sample_query, mock_embedding, mock_db_rows):
         """Test basic search functionality"""
@@ -85,14 +87,15 @@ class TestPgVectorRetriever:
         # Verify embed_batch was called with query text
         mock_embed_batch.assert_called_once_with([sample_query.text])
         
-        # Verify SQL was executed with correct parameters
-        mock_cursor.execute.assert_called_once()
+        # Verify SQL was executed with correct parameters (after the set_config for ef_search)
+        assert mock_cursor.execute.call_count == 2
         sql_call = mock_cursor.execute.call_args
-        assert "embedding <-> %s::vector" in sql_call[0][0]
+        assert "embedding <=> %s::vector" in sql_call[0][0]
         assert "LIMIT %s" in sql_call[0][0]
-        assert sql_call[0][1] == (mock_embedding, 3)
+        np.testing.assert_array_equal(sql_call[0][1][0], np.float32(mock_embedding))  # encoder dtype
+        assert sql_call[0][1][1] == 3
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_custom_k(self, mock_embed_batch, mock_get_connection, sample_query, mock_embedding):
         """Test search with custom k parameter"""
@@ -114,9 +117,10 @@ class TestPgVectorRetriever:
         
         # Verify k was passed to SQL
         sql_call = mock_cursor.execute.call_args
-        assert sql_call[0][1] == (mock_embedding, 10)
+        np.testing.assert_array_equal(sql_call[0][1][0], np.float32(mock_embedding))  # encoder dtype
+        assert sql_call[0][1][1] == 10
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_no_results(self, mock_embed_batch, mock_get_connection, sample_query, mock_embedding):
         """Test search when no results are found"""
@@ -140,7 +144,7 @@ class TestPgVectorRetriever:
         assert len(results) == 0
         assert isinstance(results, list)
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_single_result(self, mock_embed_batch, mock_get_connection, sample_query, mock_embedding):
         """Test search with single result"""
@@ -172,7 +176,7 @@ class TestPgVectorRetriever:
         assert results[0].chunk_id == "doc1_0"
         assert results[0].score == 0.10
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_ordered_by_score(self, mock_embed_batch, mock_get_connection, sample_query, mock_embedding):
         """Test that results are ordered by score (ascending distance)"""
@@ -205,7 +209,7 @@ class TestPgVectorRetriever:
         assert results[2].score == 0.30
         assert results[0].text == "Best match"
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_metadata_parsing(self, mock_embed_batch, mock_get_connection, sample_query, mock_embedding):
         """Test that JSON metadata is correctly parsed"""
@@ -246,7 +250,7 @@ class TestPgVectorRetriever:
         assert parsed_metadata["chunk_index"] == 0
         assert parsed_metadata["tags"] == ["css", "styling"]
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_connection_closed(self, mock_embed_batch, mock_get_connection, sample_query, mock_embedding):
         """Test that database connection is properly closed"""
@@ -270,7 +274,7 @@ class TestPgVectorRetriever:
         assert mock_conn.__enter__.called
         assert mock_conn.__exit__.called
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_database_error(self, mock_embed_batch, mock_get_connection, sample_query, mock_embedding):
         """Test handling of database errors"""
@@ -291,7 +295,7 @@ class TestPgVectorRetriever:
         with pytest.raises(Exception, match="Database connection failed"):
             retriever.search(sample_query, k=5)
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_embedding_error(self, mock_embed_batch, mock_get_connection, sample_query):
         """Test handling of embedding generation errors"""
@@ -305,7 +309,7 @@ class TestPgVectorRetriever:
         # Database should not be called if embedding fails
         mock_get_connection.assert_not_called()
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_empty_query_text(self, mock_embed_batch, mock_get_connection, mock_embedding):
         """Test search with empty query text"""
@@ -330,7 +334,7 @@ class TestPgVectorRetriever:
         mock_embed_batch.assert_called_once_with([""])
         assert isinstance(results, list)
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_k_zero(self, mock_embed_batch, mock_get_connection, sample_query, mock_embedding):
         """Test search with k=0"""
@@ -353,7 +357,7 @@ class TestPgVectorRetriever:
         # Should return empty results
         assert len(results) == 0
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_k_large(self, mock_embed_batch, mock_get_connection, sample_query, mock_embedding):
         """Test search with very large k"""
@@ -382,7 +386,7 @@ class TestPgVectorRetriever:
         # Should return only available results
         assert len(results) == 2
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_sql_injection_safety(self, mock_embed_batch, mock_get_connection, mock_embedding):
         """Test that SQL injection is prevented via parameterization"""
@@ -415,7 +419,7 @@ class TestPgVectorRetriever:
         # The malicious text is in the embedding, not the SQL
         mock_embed_batch.assert_called_once_with(["'; DROP TABLE documents; --"])
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_vector_dimensions(self, mock_embed_batch, mock_get_connection, sample_query):
         """Test that embedding vector dimensions are correct"""
@@ -442,13 +446,109 @@ class TestPgVectorRetriever:
             
             # Verify the embedding was passed correctly
             sql_call = mock_cursor.execute.call_args
-            assert sql_call[0][1][0] == embedding
+            np.testing.assert_array_equal(sql_call[0][1][0], np.float32(embedding))
+
+
+    @pytest.mark.parametrize("metric, operator", [
+        ("cosine", "<=>"), ("l2", "<->"), ("inner_product", "<#>"),
+    ])
+    @patch('agentic_rag.retrieval.retriever.get_settings')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
+    @patch('agentic_rag.retrieval.retriever.embed_batch')
+    def test_search_uses_configured_metric(self, mock_embed_batch, mock_get_connection, mock_get_settings,
+                                           sample_query, mock_embedding, metric, operator):
+        """Test that ORDER BY uses the operator served by the HNSW index"""
+        mock_get_settings.return_value.vector_store.distance_metric = metric
+        mock_get_settings.return_value.vector_store.compression = "none"
+        mock_embed_batch.return_value = [mock_embedding]
+        
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = []
+        
+        mock_conn = MagicMock()
+        mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+        mock_conn.__enter__.return_value = mock_conn
+        mock_conn.__exit__.return_value = None
+        
+        mock_get_connection.return_value = mock_conn
+        
+        retriever = PgVectorRetriever()
+        retriever.search(sample_query, k=5)
+        
+        sql = mock_cursor.execute.call_args[0][0]
+        assert f"embedding {operator} %s::vector AS score" in sql
+        assert "ORDER BY score" in sql
+
+
+class TestAnnSessionOptions:
+    """Tests for per-query ANN search parameters"""
+
+    @pytest.fixture
+    def vector_store(self):
+        with patch('agentic_rag.retrieval.retriever.get_settings') as mock_get_settings:
+            config = mock_get_settings.return_value.vector_store
+            config.hnsw_ef_search = None
+            config.hnsw_iterative_scan = None
+            config.ivfflat_probes = None
+            config.compression = "none"
+            yield config
+
+    def test_default_ef_search_covers_k(self, vector_store):
+        """Test that ef_search is never below k (default ef_search=40 truncates k=100)"""
+        assert PgVectorRetriever.session_options(None, 5) == {"hnsw.ef_search": 40}
+        assert PgVectorRetriever.session_options(None, 100) == {"hnsw.ef_search": 100}
+
+    def test_config_values(self, vector_store):
+        """Test that VectorStoreConfig values are applied"""
+        vector_store.hnsw_ef_search = 200
+        vector_store.hnsw_iterative_scan = "relaxed_order"
+
+        assert PgVectorRetriever.session_options(None, 10) == {
+            "hnsw.ef_search": 200,
+            "hnsw.iterative_scan": "relaxed_order",
+        }
+
+    def test_query_overrides_config(self, vector_store):
+        """Test that per-query parameters win over configuration"""
+        vector_store.hnsw_ef_search = 200
+
+        options = PgVectorRetriever.session_options(AnnSearchParams(ef_search=64, probes=8), 10)
+
+        assert options == {"hnsw.ef_search": 64, "ivfflat.probes": 8}
+
+    def test_exact_search_disables_index(self, vector_store):
+        """Test that exact mode bypasses the ANN index"""
+        assert PgVectorRetriever.session_options(AnnSearchParams(exact=True), 10) == {
+            "enable_indexscan": "off"
+        }
+
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
+    @patch('agentic_rag.retrieval.retriever.embed_batch')
+    def test_set_local_precedes_search(self, mock_embed_batch, mock_get_connection, vector_store, mock_embedding):
+        """Test that options are applied transaction-locally, in one statement, before the search"""
+        vector_store.distance_metric = "cosine"
+        mock_embed_batch.return_value = [mock_embedding]
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = []
+        mock_conn = MagicMock()
+        mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+        mock_conn.__enter__.return_value = mock_conn
+        mock_get_connection.return_value = mock_conn
+
+        PgVectorRetriever().search(
+            Query(text="q", ann=AnnSearchParams(ef_search=80, iterative_scan="relaxed_order")), k=5
+        )
+
+        set_stmt, set_args = mock_cursor.execute.call_args_list[0][0]
+        assert set_stmt == "SELECT set_config(%s, %s, true), set_config(%s, %s, true)"
+        assert set_args == ["hnsw.ef_search", "80", "hnsw.iterative_scan", "relaxed_order"]
+        assert mock_cursor.execute.call_count == 2
 
 
 class TestPgVectorRetrieverIntegration:
     """Integration-style tests (still using mocks but testing full flow)"""
     
-    @patch('agentic_rag.retrieval.retriever.get_connection')
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
     @patch('agentic_rag.retrieval.retriever.embed_batch')
     def test_search_full_flow(self, mock_embed_batch, mock_get_connection, sample_query, mock_embedding, mock_db_rows):
         """Test complete search flow from query to results"""
@@ -485,4 +585,191 @@ class TestPgVectorRetrieverIntegration:
         assert mock_embed_batch.called
         assert mock_get_connection.called
         assert mock_cursor.execute.called
-        assert mock_cursor.fetchall.called
\ No newline at end of file
+        assert mock_cursor.fetchall.called
+
+class TestSearchMany:
+    """Tests for batched multi-query search"""
+
+    @staticmethod
+    def _connection(mock_get_connection, result_sets):
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = result_sets
+        mock_conn = MagicMock()
+        mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+        mock_conn.__enter__.return_value = mock_conn
+        mock_get_connection.return_value = mock_conn
+        return mock_conn, mock_cursor
+
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
+    @patch('agentic_rag.retrieval.retriever.embed_batch')
+    def test_single_encode_and_connection(self, mock_embed_batch, mock_get_connection, mock_db_rows):
+        """Test that all queries share one encode call and one pipelined executemany"""
+        mock_embed_batch.return_value = [[0.1] * 768, [0.2] * 768]
+        _, mock_cursor = self._connection(mock_get_connection, [mock_db_rows[:1], mock_db_rows[1:]])
+
+        results = PgVectorRetriever().search_many([Query(text="a"), Query(text="b")], k=2)
+
+        mock_embed_batch.assert_called_once_with(["a", "b"])
+        assert mock_get_connection.call_count == 1
+        mock_cursor.executemany.assert_called_once()
+        assert mock_cursor.executemany.call_args.kwargs == {"returning": True}
+        assert [r.chunk_id for r in results[0]] == ["doc1_0"]
+        assert [r.chunk_id for r in results[1]] == ["doc2_0", "doc3_1"]
+        assert mock_cursor.nextset.call_count == 1
+
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
+    @patch('agentic_rag.retrieval.retriever.embed_batch')
+    def test_groups_by_ann_params(self, mock_embed_batch, mock_get_connection, mock_db_rows):
+        """Test that queries with different ANN settings run in separate transactions, order preserved"""
+        mock_embed_batch.return_value = [[0.1] * 768] * 3
+        mock_conn, mock_cursor = self._connection(
+            mock_get_connection, [mock_db_rows[:1], mock_db_rows[2:], mock_db_rows[1:2]]
+        )
+        queries = [
+            Query(text="a"),
+            Query(text="b", ann=AnnSearchParams(exact=True)),
+            Query(text="c"),
+        ]
+
+        results = PgVectorRetriever().search_many(queries, k=1)
+
+        assert mock_cursor.executemany.call_count == 2
+        assert mock_conn.commit.call_count == 2
+        # group (a, c) runs first, then the exact group (b)
+        assert [r[0].chunk_id for r in results] == ["doc1_0", "doc2_0", "doc3_1"]
+
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
+    @patch('agentic_rag.retrieval.retriever.embed_batch')
+    def test_repeated_queries_use_query_cache(self, mock_embed_batch, mock_get_connection, mock_db_rows):
+        """Test that a query already searched is not re-encoded"""
+        mock_embed_batch.side_effect = lambda texts: [[0.1] * 768 for _ in texts]
+        self._connection(mock_get_connection, [mock_db_rows] * 3)
+        retriever = PgVectorRetriever()
+
+        retriever.search(Query(text="a"), k=3)
+        retriever.search_many([Query(text="a"), Query(text="b")], k=3)
+
+        assert [c[0][0] for c in mock_embed_batch.call_args_list] == [["a"], ["b"]]
+        assert retriever.stats()["query_cache"]["hits"] == 1
+
+    @patch('agentic_rag.retrieval.retriever.embed_batch')
+    def test_empty(self, mock_embed_batch):
+        assert PgVectorRetriever().search_many([], k=3) == []
+        mock_embed_batch.assert_not_called()
+
+
+class TestCompressedSearch:
+    """Tests for shortlist-and-rescore search over a compressed index"""
+
+    @pytest.fixture
+    def vector_store(self):
+        with patch('agentic_rag.retrieval.retriever.get_settings') as mock_get_settings:
+            config = mock_get_settings.return_value.vector_store
+            config.distance_metric = "cosine"
+            config.compression = "binary"
+            config.embedding_dim = 384
+            config.rescore_factor = 4
+            config.hnsw_ef_search = None
+            config.hnsw_iterative_scan = None
+            config.ivfflat_probes = None
+            yield config
+
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
+    @patch('agentic_rag.retrieval.retriever.embed_batch')
+    def test_shortlist_rescored_by_float_distance(self, mock_embed_batch, mock_get_connection, vector_store):
+        """Test that the index orders by the quantized expression and the outer query by exact distance"""
+        mock_embed_batch.return_value = [[0.1] * 384]
+        _, mock_cursor = TestSearchMany._connection(mock_get_connection, [[]])
+
+        PgVectorRetriever().search(Query(text="q"), k=10)
+
+        sql, args = mock_cursor.execute.call_args[0]
+        assert "binary_quantize(embedding)::bit(384) <~>" in sql
+        assert "embedding <=> %s::vector AS score" in sql
+        assert args[2:] == (40, 10)  # shortlist of k * rescore_factor
+        set_args = mock_cursor.execute.call_args_list[0][0][1]
+        assert set_args[:2] == ["hnsw.ef_search", "40"]  # ef_search covers the shortlist
+
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
+    @patch('agentic_rag.retrieval.retriever.embed_batch')
+    def test_exact_skips_compressed_index(self, mock_embed_batch, mock_get_connection, vector_store):
+        mock_embed_batch.return_value = [[0.1] * 384]
+        _, mock_cursor = TestSearchMany._connection(mock_get_connection, [[]])
+
+        PgVectorRetriever().search(Query(text="q", ann=AnnSearchParams(exact=True, rescore_factor=2)), k=10)
+
+        sql, args = mock_cursor.execute.call_args[0]
+        assert "binary_quantize" not in sql
+        assert args[1] == 10
+
+    @patch('agentic_rag.retrieval.retriever.pooled_connection')
+    @patch('agentic_rag.retrieval.retriever.embed_batch')
+    def test_search_many_groups_by_rescore_factor(self, mock_embed_batch, mock_get_connection, vector_store):
+        mock_embed_batch.return_value = [[0.1] * 384] * 2
+        _, mock_cursor = TestSearchMany._connection(mock_get_connection, [[], []])
+
+        PgVectorRetriever().search_many(
+            [Query(text="a"), Query(text="b", ann=AnnSearchParams(rescore_factor=2))], k=5
+        )
+
+        shortlists = [c[0][1][0][2] for c in mock_cursor.executemany.call_args_list]
+        assert shortlists == [20, 10]
+
+
+class TestAsyncSearch:
+    """Tests for the asyncio retrieval path"""
+
+    @staticmethod
+    def _async_connection(mock_get_connection, result_sets):
+        mock_cursor = MagicMock()
+        mock_cursor.execute = AsyncMock()
+        mock_cursor.executemany = AsyncMock()
+        mock_cursor.fetchall = AsyncMock(side_effect=result_sets)
+        mock_conn = MagicMock()
+        mock_conn.commit = AsyncMock()
+        mock_conn.cursor.return_value.__aenter__.return_value = mock_cursor
+        mock_get_connection.return_value.__aenter__.return_value = mock_conn
+        return mock_conn, mock_cursor
+
+    @pytest.mark.asyncio
+    @patch('agentic_rag.retrieval.retriever.async_pooled_connection')
+    @patch('agentic_rag.retrieval.retriever.embed_batch')
+    async def test_asearch(self, mock_embed_batch, mock_get_connection, sample_query, mock_db_rows):
+        """Test that asearch awaits SET LOCAL and the search on the async pool"""
+        mock_embed_batch.return_value = [[0.1] * 768]
+        _, mock_cursor = self._async_connection(mock_get_connection, [mock_db_rows])
+
+        results = await PgVectorRetriever().asearch(sample_query, k=3)
+
+        assert [r.chunk_id for r in results] == ["doc1_0", "doc2_0", "doc3_1"]
+        assert "set_config(%s, %s, true)" in mock_cursor.execute.await_args_list[0][0][0]
+        assert mock_cursor.execute.await_args[0][1][1] == 3
+
+    @pytest.mark.asyncio
+    @patch('agentic_rag.retrieval.retriever.async_pooled_connection')
+    @patch('agentic_rag.retrieval.retriever.embed_batch')
+    async def test_asearch_many_matches_order(self, mock_embed_batch, mock_get_connection, mock_db_rows):
+        """Test that asearch_many encodes once and keeps input order across groups"""
+        mock_embed_batch.return_value = [[0.1] * 768] * 3
+        mock_conn, mock_cursor = self._async_connection(
+            mock_get_connection, [mock_db_rows[:1], mock_db_rows[2:], mock_db_rows[1:2]]
+        )
+        queries = [Query(text="a"), Query(text="b", ann=AnnSearchParams(exact=True)), Query(text="c")]
+
+        results = await PgVectorRetriever().asearch_many(queries, k=1)
+
+        mock_embed_batch.assert_called_once_with(["a", "b", "c"])
+        assert mock_cursor.executemany.await_count == 2
+        assert mock_conn.commit.await_count == 2
+        assert [r[0].chunk_id for r in results] == ["doc1_0", "doc2_0", "doc3_1"]
+
+    @pytest.mark.asyncio
+    async def test_default_runs_search_in_thread(self):
+        """Test that retrievers without native async support still get asearch"""
+        class Static(BaseRetriever):
+            def search(self, query, *, k=5):
+                return [RetrievedChunk(chunk_id=query.text, text="", score=0.0)]
+
+        results = await Static().asearch_many([Query(text="a"), Query(text="b")], k=1)
+
+        assert [r[0].chunk_id for r in results] == ["a", "b"]
@@ -3,11 +3,20 @@
 import pytest
 from pathlib import Path
 from unittest.mock import Mock, MagicMock, patch
+from agentic_rag.evaluation.checkpoint import EvaluationCheckpoint, settings_run_key
 from agentic_rag.evaluation.runner import QrelsEvaluator
+from agentic_rag.retrieval.base import BaseRetriever
 from agentic_rag.evaluation.metrics import MetricSuite, RecallAtK, MRR
 from agentic_rag.retrieval import Query, RetrievedChunk
 
 
+class StaticRetriever(BaseRetriever):
+    """Picklable retriever for process-pool tests"""
+
+    def search(self, query, *, k=5):
+        return [RetrievedChunk(chunk_id="doc1_0", text="", score=0.9, metadata={"original_id": "doc1"})]
+
+
 class TestQrelsEvaluator:
     @pytest.fixture
     def mock_data_dir(self, tmp_path):
@@ -40,6 +49,10 @@ class TestQrelsEvaluator:
             RetrievedChunk(chunk_id="doc1_0", text="", score=0.9, metadata={"original_id": "doc1"}),
             RetrievedChunk(chunk_id="doc2_0", text="", score=0.8, metadata={"original_id": "doc2"}),
         ])
+        # Same fallback as BaseRetriever.search_many
+        retriever.search_many = Mock(
+            side_effect=lambda queries, k: [retriever.search(q, k=k) for q in queries]
+        )
         return retriever
 
     @pytest.fixture
@@ -102,6 +115,20 @@ class TestQrelsEvaluator:
         # Verify logging occurred
         assert mock_logger.info.call_count >= 3  # Header + metrics
 
+    def test_evaluate_batches_queries(self, mock_data_dir, mock_retriever, metric_suite):
+        """Test that queries are retrieved in search_many batches"""
+        evaluator = QrelsEvaluator(
+            retriever=mock_retriever,
+            metrics=metric_suite,
+            data_dir=mock_data_dir
+        )
+
+        with patch('agentic_rag.evaluation.runner.settings.evaluation.batch_size', 1):
+            evaluator.evaluate()
+
+        assert mock_retriever.search_many.call_count == 2
+        assert [len(c[0][0]) for c in mock_retriever.search_many.call_args_list] == [1, 1]
+
     @patch('agentic_rag.evaluation.runner.logger')
     def test_evaluate_logs_results(self, mock_logger, mock_data_dir, mock_retriever, metric_suite):
         """Test that evaluation logs results correctly"""
@@ -143,4 +170,132 @@ class TestQrelsEvaluator:
         evaluator.evaluate()
         
         # Should complete without errors
-        assert mock_retriever.search.call_count == 1
\ No newline at end of file
+        assert mock_retriever.search.call_count == 1
+
+
+class TestParallelResumableEvaluation:
+    """Tests for pooled evaluation with checkpoint/resume"""
+
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        (data_dir / "queries.jsonl").write_text(
+            "".join(f'{{"_id": "q{i}", "text": "query {i}"}}\n' for i in range(6))
+        )
+        (data_dir / "qrels.jsonl").write_text(
+            "".join(f'{{"query-id": "q{i}", "corpus-id": "doc{i % 2}"}}\n' for i in range(6))
+        )
+        return data_dir
+
+    @pytest.fixture(autouse=True)
+    def small_batches(self):
+        with patch('agentic_rag.evaluation.runner.settings.evaluation.batch_size', 2):
+            yield
+
+    def _evaluator(self, data_dir, **kwargs):
+        return QrelsEvaluator(
+            retriever=StaticRetriever(),
+            metrics=MetricSuite(metrics=[RecallAtK(k=5), MRR()]),
+            data_dir=data_dir,
+            **kwargs,
+        )
+
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_pool_scores_every_query(self, data_dir, tmp_path, executor):
+        """Process pools are spawned, so everything sent to workers must pickle"""
+        checkpoint = EvaluationCheckpoint(tmp_path / "ckpt.jsonl", "run1")
+        appended = []
+        checkpoint.append = Mock(side_effect=appended.extend)
+        evaluator = self._evaluator(data_dir, workers=2, executor=executor, checkpoint=checkpoint)
+
+        evaluator.evaluate()
+
+        done = dict(appended)
+        assert sorted(done) == [f"q{i}" for i in range(6)]
+        assert done["q0"] == {"recall@5": 0.0, "mrr": 0.0}
+        assert done["q1"] == {"recall@5": 1.0, "mrr": 1.0}
+        assert evaluator.summary == {"recall@5": 0.5, "mrr": 0.5}
+
+    def test_resume_skips_checkpointed_queries(self, data_dir, tmp_path):
+        checkpoint = EvaluationCheckpoint(tmp_path / "ckpt.jsonl", "run1")
+        checkpoint.append([("q0", {"recall@5": 0.0, "mrr": 0.0}), ("q1", {"recall@5": 1.0, "mrr": 1.0})])
+        evaluator = self._evaluator(data_dir, checkpoint=checkpoint)
+        evaluator.retriever = Mock(wraps=evaluator.retriever)
+
+        evaluator.evaluate()
+
+        searched = [q.text for call in evaluator.retriever.search_many.call_args_list for q in call[0][0]]
+        assert searched == ["query 2", "query 3", "query 4", "query 5"]
+        assert evaluator.summary == {"recall@5": 0.5, "mrr": 0.5}
+
+    def test_finished_run_clears_checkpoint(self, data_dir, tmp_path):
+        checkpoint = EvaluationCheckpoint(tmp_path / "ckpt.jsonl", "run1")
+        evaluator = self._evaluator(data_dir, checkpoint=checkpoint)
+        evaluator.evaluate()
+
+        assert checkpoint.load() == {}
+        evaluator.retriever = Mock(wraps=evaluator.retriever)
+        evaluator.evaluate()
+        assert sum(len(call[0][0]) for call in evaluator.retriever.search_many.call_args_list) == 6
+
+    def test_settings_run_key_ignores_runtime_knobs(self):
+        from agentic_rag.settings.schema import AppSettings
+
+        base = AppSettings()
+        tuned = base.model_copy(deep=True)
+        tuned.evaluation.workers = 8
+        tuned.evaluation.executor = "process"
+        tuned.database.dsn = "postgresql://other:secret@db:5432/rag"
+        tuned.ingestion.transform_workers = 4
+        tuned.vector_store.query_cache_size = 0
+        tuned.vector_store.rerank_cache_path = Path("/tmp/scores.sqlite3")
+        int8 = base.model_copy(deep=True)
+        int8.inference.backend = "onnx-int8"
+        ef = base.model_copy(deep=True)
+        ef.vector_store.hnsw_ef_search = 400
+
+        assert settings_run_key(tuned) == settings_run_key(base)
+        assert settings_run_key(int8) != settings_run_key(base)
+        assert settings_run_key(ef) != settings_run_key(base)
+
+    def test_settings_run_key_covers_every_scoring_field(self):
+        """Test that the allowlist names only fields that exist, so a rename cannot drop one silently"""
+        from agentic_rag.evaluation.checkpoint import _SCORING_SETTINGS
+        from agentic_rag.settings.schema import AppSettings
+
+        for name, fields in _SCORING_SETTINGS.items():
+            assert name in AppSettings.model_fields
+            if fields is not True:
+                assert fields <= set(AppSettings.model_fields[name].annotation.model_fields)
+
+    def test_checkpoint_from_other_run_is_discarded(self, tmp_path):
+        path = tmp_path / "ckpt.jsonl"
+        EvaluationCheckpoint(path, "old").append([("q0", {"mrr": 1.0})])
+
+        assert EvaluationCheckpoint(path, "new").load() == {}
+        assert path.read_bytes() == b""
+
+    def test_torn_line_is_truncated(self, tmp_path):
+        path = tmp_path / "ckpt.jsonl"
+        checkpoint = EvaluationCheckpoint(path, "run1")
+        checkpoint.append([("q0", {"mrr": 1.0})])
+        with path.open("ab") as f:
+            f.write(b'{"run": "run1", "query_id": "q1", "sco')
+
+        assert checkpoint.load() == {"q0": {"mrr": 1.0}}
+        checkpoint.append([("q1", {"mrr": 0.5})])
+        assert checkpoint.load() == {"q0": {"mrr": 1.0}, "q1": {"mrr": 0.5}}
+
+    def test_reports_rerank_seconds(self, data_dir):
+        """Test that reranked runs report reranker time next to quality metrics"""
+        reranker = Mock()
+        reranker.rerank.side_effect = lambda query, chunks, k: chunks[:k]
+        evaluator = self._evaluator(data_dir)
+        evaluator.reranker = reranker
+
+        evaluator.evaluate()
+
+        assert reranker.rerank.call_count == 6
+        assert {"recall@5", "mrr", "rerank_seconds", "rerank_seconds_total"} <= set(evaluator.summary)
+        assert evaluator.summary["rerank_seconds_total"] >= 0
@@ -0,0 +1,107 @@
+# tests/test_score_cache.py
+
+import pickle
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from agentic_rag.retrieval.reranker import CrossEncoderReranker
+from agentic_rag.retrieval.schemas import Query, RetrievedChunk
+from agentic_rag.retrieval.score_cache import PairScoreCache
+
+
+def fake_predict(pairs):
+    """Score = length of the candidate text"""
+    return np.array([len(doc) for _, doc in pairs], dtype=np.float32)
+
+
+def _chunks(*texts):
+    return [RetrievedChunk(chunk_id=f"c{i}", text=t, score=0.0) for i, t in enumerate(texts)]
+
+
+class TestPairScoreCache:
+    """Unit tests for PairScoreCache"""
+
+    def test_only_unseen_pairs_are_scored(self):
+        cache = PairScoreCache("ce")
+        cache.scores("q", _chunks("aa", "bbb"), fake_predict)
+        predict = Mock(side_effect=fake_predict)
+
+        scores = cache.scores("q", _chunks("aa", "bbb", "cccc"), predict)
+
+        predict.assert_called_once_with([["q", "cccc"]])
+        assert scores.tolist() == [2.0, 3.0, 4.0]
+        assert cache.hits == 2 and cache.misses == 3
+
+    def test_edited_content_is_rescored(self):
+        """Test that the same chunk id with new text is a different pair"""
+        cache = PairScoreCache("ce")
+        cache.scores("q", _chunks("old"), fake_predict)
+        predict = Mock(side_effect=fake_predict)
+
+        cache.scores("q", _chunks("new text"), predict)
+
+        predict.assert_called_once()
+
+    def test_lru_bound(self):
+        cache = PairScoreCache("ce", max_entries=2)
+        cache.scores("q", _chunks("a", "b", "c"), fake_predict)
+
+        assert cache.stats()["entries"] == 2
+
+    def test_persistent_tier(self, tmp_path):
+        """Test that scores survive a new cache instance and are keyed by model"""
+        path = tmp_path / "scores.sqlite3"
+        first = PairScoreCache("ce", path=path)
+        first.scores("q", _chunks("aa"), fake_predict)
+        first.close()
+
+        predict = Mock(side_effect=fake_predict)
+        second = PairScoreCache("ce", path=path)
+        assert second.scores("q", _chunks("aa"), predict).tolist() == [2.0]
+        predict.assert_not_called()
+        assert second.disk_hits == 1
+
+        other_model = PairScoreCache("ce-large", path=path)
+        other_model.scores("q", _chunks("aa"), predict)
+        predict.assert_called_once()
+
+    def test_pickle_reopens_database(self, tmp_path):
+        cache = PairScoreCache("ce", path=tmp_path / "scores.sqlite3")
+        cache.scores("q", _chunks("aa"), fake_predict)
+
+        clone = pickle.loads(pickle.dumps(cache))
+        predict = Mock(side_effect=fake_predict)
+
+        assert clone.scores("q", _chunks("aa"), predict).tolist() == [2.0]
+        predict.assert_not_called()
+
+
+class TestRerankerScoreCache:
+    @patch('agentic_rag.retrieval.reranker.load_cross_encoder')
+    def test_rerank_sweep_reuses_scores(self, mock_load):
+        """Test that reranking the same candidates with a different k skips the model"""
+        mock_model = Mock()
+        mock_model.predict.side_effect = fake_predict
+        mock_load.return_value = mock_model
+        reranker = CrossEncoderReranker("ce")
+        query = Query(text="q")
+
+        first = reranker.rerank(query, _chunks("a", "bbb", "cc"), k=3)
+        second = reranker.rerank(query, _chunks("a", "bbb", "cc"), k=1)
+
+        assert mock_model.predict.call_count == 1
+        assert [c.chunk_id for c in first] == ["c1", "c2", "c0"]
+        assert [c.chunk_id for c in second] == ["c1"]
+        assert reranker.stats()["score_cache"]["hit_rate"] == 0.5
+
+    @patch('agentic_rag.retrieval.reranker.load_cross_encoder')
+    def test_reranker_pickles_without_model(self, mock_load):
+        reranker = CrossEncoderReranker("ce")
+        reranker._model = object()
+
+        clone = pickle.loads(pickle.dumps(reranker))
+
+        assert clone._model is None
+        assert clone.model_name == "ce"
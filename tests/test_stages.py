@@ -0,0 +1,139 @@
+# tests/test_stages.py
+
+import threading
+import time
+
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from agentic_rag.data.stages import Stage, StagedPipeline, ordered_map
+
+
+class TestStagedPipeline:
+    """Unit tests for StagedPipeline"""
+
+    def test_single_worker_preserves_order(self):
+        """Test that items flow through all stages in order"""
+        pipeline = StagedPipeline([
+            Stage("double", lambda x: x * 2),
+            Stage("inc", lambda x: x + 1),
+        ])
+
+        assert list(pipeline.run(range(10))) == [x * 2 + 1 for x in range(10)]
+
+    def test_multiple_workers_process_every_item(self):
+        """Test that fan-out stages neither drop nor duplicate items"""
+        pipeline = StagedPipeline(
+            [Stage("square", lambda x: x * x, workers=4), Stage("id", lambda x: x, workers=2)],
+            queue_size=2,
+        )
+
+        assert sorted(pipeline.run(range(100))) == [x * x for x in range(100)]
+
+    def test_stages_overlap(self):
+        """Test that a slow downstream stage runs concurrently with upstream work"""
+        active = set()
+        overlapped = threading.Event()
+        lock = threading.Lock()
+
+        def track(name):
+            def fn(x):
+                with lock:
+                    active.add(name)
+                    if len(active) == 2:
+                        overlapped.set()
+                time.sleep(0.01)
+                with lock:
+                    active.discard(name)
+                return x
+            return fn
+
+        pipeline = StagedPipeline([Stage("a", track("a")), Stage("b", track("b"))])
+        list(pipeline.run(range(20)))
+
+        assert overlapped.is_set()
+
+    def test_bounded_queues_apply_backpressure(self):
+        """Test that the source is not drained far ahead of a slow consumer"""
+        produced = []
+
+        def source():
+            for i in range(50):
+                produced.append(i)
+                yield i
+
+        pipeline = StagedPipeline([Stage("slow", lambda x: x)], queue_size=1)
+        results = pipeline.run(source())
+        next(results)
+        time.sleep(0.05)
+
+        assert len(produced) < 10
+        results.close()
+
+    def test_stage_error_is_raised(self):
+        """Test that a failing stage stops the pipeline and re-raises"""
+        def boom(x):
+            if x == 3:
+                raise RuntimeError("stage failed")
+            return x
+
+        pipeline = StagedPipeline([Stage("boom", boom), Stage("id", lambda x: x)])
+
+        with pytest.raises(RuntimeError, match="stage failed"):
+            list(pipeline.run(range(100)))
+
+    def test_source_error_is_raised(self):
+        """Test that errors raised while producing items propagate"""
+        def source():
+            yield 1
+            raise ValueError("bad record")
+
+        pipeline = StagedPipeline([Stage("id", lambda x: x)])
+
+        with pytest.raises(ValueError, match="bad record"):
+            list(pipeline.run(source()))
+
+    def test_invalid_configuration(self):
+        """Test that empty pipelines and zero workers are rejected"""
+        with pytest.raises(ValueError):
+            StagedPipeline([])
+        with pytest.raises(ValueError):
+            StagedPipeline([Stage("x", lambda x: x, workers=0)])
+
+
+def _slow_square(x):
+    time.sleep(0.01 * (5 - x))  # early items finish last
+    return x * x
+
+
+class TestOrderedMap:
+    """Unit tests for ordered_map"""
+
+    def test_preserves_input_order(self):
+        with ThreadPoolExecutor(4) as pool:
+            assert list(ordered_map(_slow_square, range(5), pool, window=4)) == [0, 1, 4, 9, 16]
+
+    def test_bounds_items_in_flight(self):
+        submitted = []
+
+        def items():
+            for i in range(10):
+                submitted.append(i)
+                yield i
+
+        with ThreadPoolExecutor(2) as pool:
+            results = ordered_map(lambda x: x, items(), pool, window=3)
+            assert next(results) == 0
+            assert len(submitted) == 3
+            assert list(results) == list(range(1, 10))
+
+    def test_errors_propagate(self):
+        def fail(x):
+            if x == 2:
+                raise ValueError("bad record")
+            return x
+
+        with ThreadPoolExecutor(2) as pool:
+            with pytest.raises(ValueError, match="bad record"):
+                list(ordered_map(fail, range(5), pool, window=2))
@@ -0,0 +1,131 @@
+# tests/test_storage.py
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from agentic_rag.storage import db, pool
+
+
+@pytest.fixture(autouse=True)
+def reset_storage_state():
+    db.reset_schema_state()
+    pool._pool = None
+    yield
+    db.reset_schema_state()
+    pool._pool = None
+
+
+def _mock_conn(fetch_rows):
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_cursor.fetchone.side_effect = fetch_rows
+    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
+    return mock_conn, mock_cursor
+
+
+@pytest.fixture(autouse=True)
+def mock_create_index():
+    with patch('agentic_rag.storage.db.create_embedding_index') as mock:
+        yield mock
+
+
+class TestEnsureSchemaOnce:
+    """Unit tests for ensure_schema_once"""
+
+    @patch('agentic_rag.storage.db.ensure_schema')
+    def test_applies_schema_on_fresh_database(self, mock_ensure_schema):
+        """Test that DDL runs and the version is recorded when no version exists"""
+        mock_conn, mock_cursor = _mock_conn([(False,)])
+
+        db.ensure_schema_once(mock_conn)
+
+        mock_ensure_schema.assert_called_once_with(mock_conn)
+        executed = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        assert any("INSERT INTO agentic_rag_schema" in sql for sql in executed)
+
+    @patch('agentic_rag.storage.db.ensure_schema')
+    def test_skips_schema_when_version_matches(self, mock_ensure_schema):
+        """Test that DDL is skipped when the database is already current"""
+        mock_conn, _ = _mock_conn([(True,), (db.SCHEMA_VERSION,)])
+
+        db.ensure_schema_once(mock_conn)
+
+        mock_ensure_schema.assert_not_called()
+
+    @patch('agentic_rag.storage.db.ensure_schema')
+    def test_reapplies_schema_on_version_mismatch(self, mock_ensure_schema):
+        """Test that an outdated version triggers the DDL"""
+        mock_conn, _ = _mock_conn([(True,), (db.SCHEMA_VERSION - 1,)])
+
+        db.ensure_schema_once(mock_conn)
+
+        mock_ensure_schema.assert_called_once_with(mock_conn)
+
+    @patch('agentic_rag.storage.db.ensure_schema')
+    def test_ensures_metric_index(self, mock_ensure_schema, mock_create_index):
+        """Test that the embedding index is checked against the configured metric"""
+        mock_conn, _ = _mock_conn([(True,), (db.SCHEMA_VERSION,)])
+
+        db.ensure_schema_once(mock_conn)
+
+        mock_create_index.assert_called_once_with(mock_conn, "cosine", compression="none", dim=384)
+
+    @patch('agentic_rag.storage.db.ensure_schema')
+    def test_runs_once_per_process(self, mock_ensure_schema):
+        """Test that repeated calls do not touch the database again"""
+        mock_conn, mock_cursor = _mock_conn([(False,)])
+
+        db.ensure_schema_once(mock_conn)
+        calls = mock_cursor.execute.call_count
+        db.ensure_schema_once(mock_conn)
+
+        assert mock_ensure_schema.call_count == 1
+        assert mock_cursor.execute.call_count == calls
+
+
+class TestConnectionPool:
+    """Unit tests for the shared connection pool"""
+
+    @patch('agentic_rag.storage.pool.ConnectionPool')
+    def test_pool_is_shared(self, mock_pool_class):
+        """Test that the pool is created once and reused"""
+        first = pool.get_pool()
+        second = pool.get_pool()
+
+        assert first is second
+        mock_pool_class.assert_called_once()
+
+    @patch('agentic_rag.storage.pool.get_settings')
+    @patch('agentic_rag.storage.pool.ConnectionPool')
+    def test_pool_uses_database_settings(self, mock_pool_class, mock_get_settings):
+        """Test that DSN and sizes come from settings"""
+        config = mock_get_settings.return_value.database
+        config.dsn = "postgresql://u:p@db:5432/x"
+        config.pool_min_size = 2
+        config.pool_max_size = 8
+
+        pool.get_pool()
+
+        args, kwargs = mock_pool_class.call_args
+        assert args[0] == "postgresql://u:p@db:5432/x"
+        assert kwargs["min_size"] == 2
+        assert kwargs["max_size"] == 8
+
+    @patch('agentic_rag.storage.pool.ConnectionPool')
+    def test_pooled_connection_borrows_from_pool(self, mock_pool_class):
+        """Test that pooled_connection yields a pooled connection"""
+        mock_conn = MagicMock()
+        mock_pool_class.return_value.connection.return_value.__enter__.return_value = mock_conn
+
+        with pool.pooled_connection() as conn:
+            assert conn is mock_conn
+
+    @patch('agentic_rag.storage.pool.ConnectionPool')
+    def test_close_pool(self, mock_pool_class):
+        """Test that closing the pool allows a fresh one to be opened"""
+        pool.get_pool()
+        pool.close_pool()
+
+        mock_pool_class.return_value.close.assert_called_once()
+        pool.get_pool()
+        assert mock_pool_class.call_count == 2
@@ -0,0 +1,58 @@
+# tests/test_sweep.py
+
+from unittest.mock import Mock
+
+import pytest
+
+from agentic_rag.evaluation.sweep import AnnSweep
+from agentic_rag.retrieval import AnnSearchParams, Query, RetrievedChunk
+
+
+def _chunks(ids):
+    return [RetrievedChunk(chunk_id=i, text="", score=0.0) for i in ids]
+
+
+@pytest.fixture
+def retriever():
+    """Exact search returns a,b,c,d; ANN with ef_search<100 misses d"""
+    def search(query, *, k):
+        if query.ann.exact or query.ann.ef_search >= 100:
+            return _chunks(["a", "b", "c", "d"][:k])
+        return _chunks(["a", "b", "c", "x"][:k])
+
+    mock = Mock()
+    mock.search.side_effect = search
+    return mock
+
+
+class TestAnnSweep:
+    """Unit tests for AnnSweep"""
+
+    def test_recall_against_exact_search(self, retriever):
+        """Test that recall is measured per setting against exact results"""
+        sweep = AnnSweep(retriever, [Query(text="q1"), Query(text="q2")], k=4)
+
+        results = sweep.run([AnnSearchParams(ef_search=40), AnnSearchParams(ef_search=100)])
+
+        assert [r.recall for r in results] == [0.75, 1.0]
+        assert all(r.p99_ms >= r.p50_ms >= 0 for r in results)
+
+    def test_queries_carry_params(self, retriever):
+        """Test that each search receives the setting under test"""
+        sweep = AnnSweep(retriever, [Query(text="q1")], k=2)
+
+        sweep.run([AnnSearchParams(ef_search=64)])
+
+        seen = {call[0][0].ann.ef_search for call in retriever.search.call_args_list}
+        assert seen == {None, 64}  # exact pass + the sweep setting
+
+    def test_result_row(self, retriever):
+        """Test the flattened row written to ann_sweep.jsonl"""
+        row = AnnSweep(retriever, [Query(text="q")], k=4).run([AnnSearchParams(ef_search=40)])[0].to_row()
+
+        assert row["ef_search"] == 40
+        assert {"recall", "p50_ms", "p99_ms", "mean_ms"} <= set(row)
+
+    def test_requires_queries(self, retriever):
+        with pytest.raises(ValueError):
+            AnnSweep(retriever, [], k=5)
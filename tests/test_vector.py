@@ -0,0 +1,93 @@
+# tests/test_vector.py
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from agentic_rag.storage.vector import (
+    VectorBinaryDumper,
+    decode_vector,
+    encode_vector,
+    encode_vectors,
+    register_vector,
+    register_vector_async,
+)
+
+
+class TestVectorCodec:
+    """Unit tests for the pgvector binary codec"""
+
+    def test_round_trip(self):
+        """Test that encode/decode preserves float32 values"""
+        vector = np.array([0.1, -0.2, 3.5], dtype=np.float32)
+
+        decoded = decode_vector(encode_vector(vector))
+
+        assert decoded.dtype == np.float32
+        np.testing.assert_array_equal(decoded, vector)
+
+    def test_float16_input(self):
+        """Test that half-precision arrays are widened to float32 on the wire"""
+        vector = np.array([0.5, 1.5], dtype=np.float16)
+
+        assert encode_vector(vector) == encode_vector(vector.astype(np.float32))
+
+    def test_matrix_rows_match_single_encoding(self):
+        """Test that batch encoding matches per-row encoding"""
+        matrix = np.arange(6, dtype=np.float32).reshape(2, 3)
+
+        assert encode_vectors(matrix) == [encode_vector(row) for row in matrix]
+
+    def test_rejects_matrix_for_single_vector(self):
+        """Test that encode_vector only accepts 1-D input"""
+        with pytest.raises(ValueError):
+            encode_vector(np.zeros((2, 2), dtype=np.float32))
+
+    def test_dumper_encodes_arrays(self):
+        """Test that the psycopg dumper emits the binary format"""
+        dumper = VectorBinaryDumper(np.ndarray)
+        vector = np.ones(4, dtype=np.float32)
+
+        assert dumper.dump(vector) == encode_vector(vector)
+
+
+class TestRegisterVector:
+    """Unit tests for register_vector"""
+
+    @patch('agentic_rag.storage.vector.TypeInfo.fetch')
+    def test_registers_dumper_and_loader(self, mock_fetch):
+        """Test adapter registration when the extension exists"""
+        mock_fetch.return_value = MagicMock(oid=12345)
+        conn = MagicMock(autocommit=False)
+
+        register_vector(conn)
+
+        dumper = conn.adapters.register_dumper.call_args[0][1]
+        assert dumper.oid == 12345
+        conn.adapters.register_loader.assert_called_once()
+        conn.rollback.assert_called_once()
+
+    @patch('agentic_rag.storage.vector.TypeInfo.fetch')
+    def test_missing_extension(self, mock_fetch):
+        """Test that only an untyped dumper is registered before CREATE EXTENSION"""
+        mock_fetch.return_value = None
+        conn = MagicMock(autocommit=False)
+
+        register_vector(conn)
+
+        dumper = conn.adapters.register_dumper.call_args[0][1]
+        assert dumper.oid == 0
+        conn.adapters.register_loader.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch('agentic_rag.storage.vector.TypeInfo.fetch', new_callable=AsyncMock)
+    async def test_async_connection(self, mock_fetch):
+        """Test that the async pool hook awaits the type lookup and rollback"""
+        mock_fetch.return_value = MagicMock(oid=12345)
+        conn = MagicMock(autocommit=False, rollback=AsyncMock())
+
+        await register_vector_async(conn)
+
+        assert conn.adapters.register_dumper.call_args[0][1].oid == 12345
+        conn.rollback.assert_awaited_once()